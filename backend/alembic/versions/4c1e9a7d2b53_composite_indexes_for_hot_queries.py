@@ -0,0 +1,48 @@
+"""Composite indexes for hot queries
+
+Messages of a session are always read in created_at order, and a user's
+sessions are listed by is_active and newest started_at first. Without these
+indexes both queries scan the whole table.
+
+Tables are created by init_db on startup, so this is the first revision and
+it only adds the indexes that are missing. On PostgreSQL they are built
+CONCURRENTLY so that writes are not blocked on large tables.
+
+Revision ID: 4c1e9a7d2b53
+Revises:
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c1e9a7d2b53'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_messages_session_id_created_at", "messages", ["session_id", "created_at", "id"]),
+    ("ix_ai_sessions_user_id_is_active_started_at", "ai_sessions", ["user_id", "is_active", "started_at"]),
+]
+
+
+def _existing_indexes(table: str) -> set:
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            if name not in _existing_indexes(table):
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            if name in _existing_indexes(table):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
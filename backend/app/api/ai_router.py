@@ -1,25 +1,52 @@
 """
 AI Router API endpoints
 """
-from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+import asyncio
+import json
 import logging
+import math
+import time
 
-from app.core.database import get_db
-from app.core.security import get_current_user
+from app.core.config import settings
+from app.core.database import get_db, get_read_db, get_db_pool_stats, AsyncSessionLocal
+from app.core.security import get_current_user, get_current_user_readonly, get_current_active_superuser
+from app.core.http_client import get_http_stats
 from app.models import User, AISession, Message, MessageRole, MessageType
 from app.services.ai_service import ai_router as ai_service, AIModel
+from app.api.websocket import manager as ws_manager
+from app.services.completion_cache import completion_cache
+from app.services.completion_jobs import completion_jobs, JobQueueFullError
+from app.services.context_builder import pack_history
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.deadline import Deadline, DeadlineExceeded
+from app.services.fair_scheduler import fair_scheduler, weight_for_user
+from app.services.history_cache import history_cache, HISTORY_ROLES
+from app.services.load_shedder import load_shedder, OverloadedError
+from app.services.pagination import InvalidCursorError, encode_cursor, keyset_page
+from app.services.session_stats import add_session_usage
+from app.services.rate_limiter import AdmissionTimeoutError, Priority, priority_for_task
+from app.services.summarizer import conversation_summarizer, summary_message
 from app.schemas.ai import (
     MessageCreate,
     MessageResponse,
     SessionCreate,
     SessionResponse,
     AICompletionRequest,
-    AICompletionResponse
+    AICompletionResponse,
+    CompletionJobRequest,
+    CompletionJobResponse,
+    BatchCompletionItem,
+    BatchCompletionRequest,
+    BatchCompletionResponse,
+    BatchItemResult
 )
 
 router = APIRouter()
@@ -50,33 +77,73 @@ async def create_session(
     return session
 
 
+def _keyset_page(
+    query: Any,
+    columns: List[Any],
+    limit: int,
+    before: Optional[str],
+    after: Optional[str],
+    newest_first: bool
+) -> Tuple[Any, bool]:
+    """``keyset_page`` with cursor errors reported as 400"""
+    try:
+        return keyset_page(query, columns, limit, before=before, after=after, newest_first=newest_first)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def _set_page_cursors(response: Response, page: List[Any], newest_first: bool) -> None:
+    """Return cursors for the pages just older and just newer than ``page`` as headers"""
+    if not page:
+        return
+    oldest, newest = (page[-1], page[0]) if newest_first else (page[0], page[-1])
+    response.headers["X-Before-Cursor"] = encode_cursor(oldest.id)
+    response.headers["X-After-Cursor"] = encode_cursor(newest.id)
+
+
 @router.get("/sessions", response_model=List[SessionResponse])
 async def get_sessions(
+    response: Response,
     skip: int = 0,
     limit: int = 20,
     active_only: bool = True,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    current_user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_read_db)
 ) -> Any:
-    """Get user's AI sessions"""
+    """
+    Get user's AI sessions, newest first.
+
+    Pass the ``X-Before-Cursor`` header of a page as ``before`` for the next
+    (older) page, or its ``X-After-Cursor`` as ``after`` for newer sessions.
+    Without a cursor, ``skip`` pages by offset.
+    """
     query = select(AISession).where(AISession.user_id == current_user.id)
     
     if active_only:
         query = query.where(AISession.is_active == True)
     
-    query = query.order_by(AISession.started_at.desc()).offset(skip).limit(limit)
+    reverse = False
+    if before or after:
+        query, reverse = _keyset_page(query, [AISession.started_at, AISession.id], limit, before, after, newest_first=True)
+    else:
+        query = query.order_by(AISession.started_at.desc(), AISession.id.desc()).offset(skip).limit(limit)
     
     result = await db.execute(query)
-    sessions = result.scalars().all()
+    sessions = list(result.scalars().all())
+    if reverse:
+        sessions.reverse()
     
+    _set_page_cursors(response, sessions, newest_first=True)
     return sessions
 
 
 @router.get("/sessions/{session_id}", response_model=SessionResponse)
 async def get_session(
     session_id: int,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    current_user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_read_db)
 ) -> Any:
     """Get a specific session"""
     session = await db.get(AISession, session_id)
@@ -90,107 +157,256 @@ async def get_session(
     return session
 
 
-@router.post("/process", response_model=AICompletionResponse)
-@limiter.limit("10/minute")  # 10 AI requests per minute per user
-async def process_message(
-    http_request: Request,
-    request: AICompletionRequest,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
-) -> Any:
-    """Process a message using AI router with proper transaction management"""
-    try:
-        # Get or create session
-        session = None
-        if request.session_id:
-            session = await db.get(AISession, request.session_id)
-            if not session or session.user_id != current_user.id:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Session not found"
-                )
-        else:
-            # Create new session
-            session = AISession(
-                user_id=current_user.id,
-                title=request.message[:50] + "..." if len(request.message) > 50 else request.message,
-                ai_model=request.model or current_user.preferred_ai_model,
-                temperature=int((request.temperature or 0.7) * 10),
-                max_tokens=request.max_tokens or 2000
+def request_deadline(http_request: Request) -> Deadline:
+    """
+    Time budget for an AI request, starting now: the client's
+    ``X-Request-Timeout`` header (seconds) if sent, else
+    AI_REQUEST_TIMEOUT_SECONDS, never more than AI_REQUEST_MAX_TIMEOUT_SECONDS
+    """
+    budget = settings.AI_REQUEST_TIMEOUT_SECONDS
+    header = http_request.headers.get("X-Request-Timeout")
+    if header:
+        try:
+            budget = float(header)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="X-Request-Timeout must be a number of seconds"
             )
-            db.add(session)
-            await db.flush()
+    return Deadline(min(max(budget, 0.0), settings.AI_REQUEST_MAX_TIMEOUT_SECONDS))
 
-        # Save user message
-        user_message = Message(
-            session_id=session.id,
+
+async def _history_tail(db: AsyncSession, session: AISession, summarized_until: int) -> List[Dict[str, Any]]:
+    """
+    The session's most recent user/assistant turns after the summary (at most
+    AI_HISTORY_TAIL_MESSAGES, oldest first) as ``{"id", "role", "content"}``,
+    from the history cache or, on a miss, a bounded query for just those columns
+    """
+    cached = await history_cache.get(session.id, session.total_messages or 0)
+    if cached is not None:
+        return [entry for entry in cached if entry["id"] > summarized_until]
+    
+    # The counter is read by the same statement as the rows, so the cache
+    # version matches them even if a turn was committed since ``session`` loaded
+    version = select(AISession.total_messages).where(AISession.id == session.id).scalar_subquery()
+    result = await db.execute(
+        select(Message.id, Message.role, Message.content, version.label("version")).where(
+            Message.session_id == session.id,
+            Message.id > summarized_until,
+            Message.role.in_(HISTORY_ROLES)
+        ).order_by(Message.created_at.desc(), Message.id.desc()).limit(settings.AI_HISTORY_TAIL_MESSAGES)
+    )
+    rows = result.all()
+    tail = [
+        {"id": row.id, "role": row.role.value, "content": row.content}
+        for row in reversed(rows)
+    ]
+    if rows:
+        await history_cache.set(session.id, rows[0].version or 0, tail)
+    return tail
+
+
+async def _prepare_conversation(
+    request: AICompletionRequest,
+    current_user: User,
+    db: AsyncSession
+) -> Tuple[AISession, Message, List[Dict[str, str]], int]:
+    """
+    Get or create the session, save the user message and build the AI prompt.
+
+    The prompt is the system prompt, the session's rolling summary (if any)
+    and the turns after it, packed newest-first into the token budget of the
+    model the request will be routed to. Only the newest
+    AI_HISTORY_TAIL_MESSAGES turns are considered. Returns the session, the
+    user message (added to ``db`` but not flushed), the prompt messages and
+    the number of considered history messages that did not fit.
+
+    The session row is not written here, so callers can hold the transaction
+    open across the provider call without locking it; its counters are
+    updated with ``add_session_usage`` when the messages are committed.
+    """
+    # Get or create session
+    session = None
+    if request.session_id:
+        session = await db.get(AISession, request.session_id)
+        if not session or session.user_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+    else:
+        # Create new session
+        session = AISession(
             user_id=current_user.id,
-            content=request.message,
-            role=MessageRole.USER,
-            type=MessageType.TEXT
+            title=request.message[:50] + "..." if len(request.message) > 50 else request.message,
+            ai_model=request.model or current_user.preferred_ai_model,
+            temperature=int((request.temperature or 0.7) * 10),
+            max_tokens=request.max_tokens or 2000
         )
-        db.add(user_message)
+        db.add(session)
         await db.flush()
-        # Get conversation history
-        history_query = select(Message).where(
-            Message.session_id == session.id
-        ).order_by(Message.created_at)
-        
-        history_result = await db.execute(history_query)
-        messages = history_result.scalars().all()
-        
-        # Prepare messages for AI
-        ai_messages = []
-        
-        # Add system message if provided
-        if request.system_prompt:
-            ai_messages.append({
-                "role": "system",
-                "content": request.system_prompt
-            })
-        
-        # Add conversation history
-        for msg in messages[-10:]:  # Last 10 messages for context
-            if msg.role in [MessageRole.USER, MessageRole.ASSISTANT]:
-                ai_messages.append({
-                    "role": msg.role.value,
-                    "content": msg.content
-                })
-        
-        # Generate AI response
-        ai_response = await ai_service.generate_completion(
-            messages=ai_messages,
-            model=AIModel(request.model) if request.model else None,
-            temperature=request.temperature or 0.7,
-            max_tokens=request.max_tokens,
-            task_type=request.task_type or "general"
-        )
-        
-        # Calculate cost
-        cost = ai_service.calculate_cost(
-            AIModel(ai_response["model"]),
-            ai_response["usage"]
+
+    # Get conversation history not yet folded into the session summary
+    context = session.context or {}
+    tail = await _history_tail(db, session, context.get("summary_until_message_id", 0)) if request.session_id else []
+
+    # Save user message
+    user_message = Message(
+        session_id=session.id,
+        user_id=current_user.id,
+        content=request.message,
+        role=MessageRole.USER,
+        type=MessageType.TEXT
+    )
+    db.add(user_message)
+    
+    # Add system message if provided
+    system_messages = []
+    if request.system_prompt:
+        system_messages.append({
+            "role": "system",
+            "content": request.system_prompt
+        })
+    
+    # Older turns are represented by the rolling summary
+    summary = summary_message(context)
+    if summary:
+        system_messages.append(summary)
+    
+    # Conversation history, ending with the new user turn
+    history = [{"role": entry["role"], "content": entry["content"]} for entry in tail]
+    history.append({"role": MessageRole.USER.value, "content": user_message.content})
+    
+    # Pack as much recent history as the target model's window allows
+    model = ai_service.resolve_model(request.model, request.task_type or "general")
+    ai_messages, dropped_turns = pack_history(
+        system_messages,
+        history,
+        ai_service.get_history_budget(model, request.max_tokens),
+        ai_service.count_message_tokens
+    )
+    
+    return session, user_message, ai_messages, dropped_turns
+
+
+async def _record_assistant_message(
+    db: AsyncSession,
+    session: AISession,
+    current_user: User,
+    ai_response: Dict[str, Any],
+    processing_time: Optional[int] = None
+) -> Message:
+    """
+    Add the assistant message and update session stats.
+    Returns the message (cost is in cents).
+    """
+    # Calculate cost
+    cost = ai_service.calculate_response_cost(ai_response)
+    
+    # Save assistant message
+    assistant_message = Message(
+        session_id=session.id,
+        user_id=current_user.id,
+        content=ai_response["content"],
+        role=MessageRole.ASSISTANT,
+        type=MessageType.TEXT,
+        ai_model=ai_response["model"],
+        tokens_used=ai_response["usage"]["total_tokens"],
+        cost=cost,
+        processing_time=processing_time,
+        message_metadata=ai_service.completion_metadata(ai_response)
+    )
+    db.add(assistant_message)
+    
+    await add_session_usage(
+        db,
+        session,
+        messages=1,
+        tokens=ai_response["usage"]["total_tokens"],
+        cost=cost
+    )
+    
+    return assistant_message
+
+
+async def _save_error_message(
+    db: AsyncSession,
+    session_id: Optional[int],
+    user_id: int,
+    error: Exception
+) -> None:
+    """
+    Try to save an error message in a separate transaction.
+
+    Takes plain ids because a rollback expires the loaded session and user.
+    Nothing is saved without a committed session to attach the message to,
+    or when the connection pool is exhausted (the save would wait again).
+    """
+    if session_id is None or isinstance(error, PoolTimeoutError):
+        return
+    try:
+        error_message = Message(
+            session_id=session_id,
+            user_id=user_id,
+            content=f"Error: {str(error)}",
+            role=MessageRole.ERROR,
+            type=MessageType.TEXT
         )
+        db.add(error_message)
+        await db.commit()
+    except Exception as save_error:
+        logger.error(f"Failed to save error message: {save_error}")
+
+
+@router.post("/process", response_model=AICompletionResponse)
+@limiter.shared_limit("10/minute", scope="ai_completion")  # 10 AI requests per minute per client, shared with /process/stream
+async def process_message(
+    request: Request,
+    payload: AICompletionRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    deadline: Deadline = Depends(request_deadline)
+) -> Any:
+    """Process a message using AI router with proper transaction management"""
+    _shed_if_overloaded(priority_for_task(payload.task_type))
+    session = None
+    committed = False
+    try:
+        session, user_message, ai_messages, dropped_turns = await _prepare_conversation(payload, current_user, db)
+        # Commit the user turn so the connection goes back to the pool while
+        # this request waits for its slot and the provider
+        await add_session_usage(db, session, messages=1)
+        await db.commit()
+        committed = True
+        await history_cache.record(session, [user_message])
         
-        # Save assistant message
-        assistant_message = Message(
-            session_id=session.id,
-            user_id=current_user.id,
-            content=ai_response["content"],
-            role=MessageRole.ASSISTANT,
-            type=MessageType.TEXT,
-            ai_model=ai_response["model"],
-            tokens_used=ai_response["usage"]["total_tokens"],
-            cost=cost
-        )
-        db.add(assistant_message)
+        # Generate AI response once this user's fair share of capacity allows
+        async with fair_scheduler.slot(
+            current_user.id,
+            weight=weight_for_user(current_user),
+            cost=ai_service.count_context_tokens(ai_messages, payload.max_tokens),
+            max_wait=deadline.cap(settings.AI_FAIR_MAX_QUEUE_WAIT_SECONDS)
+        ):
+            started = time.perf_counter()
+            ai_response = await ai_service.generate_completion(
+                messages=ai_messages,
+                model=AIModel(payload.model) if payload.model else None,
+                temperature=payload.temperature or 0.7,
+                max_tokens=payload.max_tokens,
+                task_type=payload.task_type or "general",
+                use_cache=not payload.bypass_cache,
+                slo=payload.routing_slo(),
+                cascade=payload.cascade,
+                deadline=deadline
+            )
+            processing_time = int((time.perf_counter() - started) * 1000)
         
-        # Update session stats
-        session.total_messages += 2
-        session.total_tokens_used += ai_response["usage"]["total_tokens"]
-        session.total_cost += cost
+        assistant_message = await _record_assistant_message(db, session, current_user, ai_response, processing_time)
+        cost = assistant_message.cost
         
         await db.commit()
+        await history_cache.record(session, [assistant_message])
+        conversation_summarizer.maybe_schedule(session)
         
         return AICompletionResponse(
             content=ai_response["content"],
@@ -198,7 +414,10 @@ async def process_message(
             provider=ai_response["provider"],
             usage=ai_response["usage"],
             cost=cost / 100,  # Convert back to dollars
-            session_id=session.id
+            session_id=session.id,
+            cached=ai_response.get("cached", False),
+            dropped_turns=dropped_turns,
+            cascade=ai_response.get("cascade")
         )
 
     except HTTPException:
@@ -207,28 +426,24 @@ async def process_message(
         raise
 
     except Exception as e:
+        # Read ids first: the rollback expires every loaded object
+        user_id = current_user.id
+        session_id = session.id if session else None
+
         # Rollback the transaction on error
         await db.rollback()
 
         logger.error(f"AI processing error: {str(e)}", extra={
-            "user_id": current_user.id,
-            "session_id": session.id if session else None,
+            "user_id": user_id,
+            "session_id": session_id,
             "error": str(e)
         })
 
-        # Try to save error message in a separate transaction
-        try:
-            error_message = Message(
-                session_id=session.id,
-                user_id=current_user.id,
-                content=f"Error: {str(e)}",
-                role=MessageRole.ERROR,
-                type=MessageType.TEXT
-            )
-            db.add(error_message)
-            await db.commit()
-        except Exception as save_error:
-            logger.error(f"Failed to save error message: {save_error}")
+        await _save_error_message(db, session_id if committed else None, user_id, e)
+
+        capacity_error = _capacity_error(e)
+        if capacity_error:
+            raise capacity_error
 
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -236,15 +451,459 @@ async def process_message(
         )
 
 
+def _shed_if_overloaded(priority: Priority) -> None:
+    """Reject new AI work with 503 right away, before touching the database, while completions are backed up"""
+    try:
+        load_shedder.check(priority)
+    except OverloadedError as e:
+        raise _capacity_error(e)
+
+
+def _capacity_error(error: Exception) -> Optional[HTTPException]:
+    """HTTP error for provider or database capacity failures (with a Retry-After hint) and exhausted deadlines"""
+    if isinstance(error, OverloadedError):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI service is overloaded, please retry shortly",
+            headers={"Retry-After": str(math.ceil(error.retry_after))}
+        )
+    if isinstance(error, AdmissionTimeoutError):
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="AI provider capacity exhausted, please retry shortly",
+            headers={"Retry-After": str(math.ceil(error.retry_after))}
+        )
+    if isinstance(error, CircuitOpenError):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI provider temporarily unavailable, please retry shortly",
+            headers={"Retry-After": str(math.ceil(error.retry_after))}
+        )
+    if isinstance(error, PoolTimeoutError):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database is busy, please retry shortly",
+            headers={"Retry-After": str(math.ceil(settings.DB_POOL_TIMEOUT))}
+        )
+    if isinstance(error, DeadlineExceeded):
+        return HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"AI request did not complete within {error.budget:.0f}s"
+        )
+    return None
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/process/stream")
+@limiter.shared_limit("10/minute", scope="ai_completion")  # Shares the budget of /process
+async def process_message_stream(
+    request: Request,
+    payload: AICompletionRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    deadline: Deadline = Depends(request_deadline)
+) -> Any:
+    """
+    Process a message and stream the AI response as server-sent events.
+
+    Emits ``delta`` events with content chunks as the provider produces them,
+    then a ``done`` event with usage and cost once the assistant message has
+    been persisted, or an ``error`` event if generation fails.
+    """
+    _shed_if_overloaded(priority_for_task(payload.task_type))
+    try:
+        session, user_message, ai_messages, dropped_turns = await _prepare_conversation(payload, current_user, db)
+        # Persist the user turn before streaming so it is not lost if the
+        # client disconnects mid-response
+        await add_session_usage(db, session, messages=1)
+        await db.commit()
+        await history_cache.record(session, [user_message])
+    except HTTPException:
+        await db.rollback()
+        raise
+    
+    # Kept outside the ORM objects, which a rollback in the error path expires
+    user_id = current_user.id
+    session_id = session.id
+    
+    async def event_stream():
+        started = time.perf_counter()
+        first_token_ms = None
+        try:
+            final = None
+            async with fair_scheduler.slot(
+                current_user.id,
+                weight=weight_for_user(current_user),
+                cost=ai_service.count_context_tokens(ai_messages, payload.max_tokens),
+                max_wait=deadline.cap(settings.AI_FAIR_MAX_QUEUE_WAIT_SECONDS)
+            ):
+                async for event in ai_service.stream_completion(
+                    messages=ai_messages,
+                    model=AIModel(payload.model) if payload.model else None,
+                    temperature=payload.temperature or 0.7,
+                    max_tokens=payload.max_tokens,
+                    task_type=payload.task_type or "general",
+                    slo=payload.routing_slo(),
+                    deadline=deadline
+                ):
+                    if event["type"] == "delta":
+                        if first_token_ms is None:
+                            first_token_ms = int((time.perf_counter() - started) * 1000)
+                        yield _sse_event("delta", {"content": event["content"]})
+                    elif event["type"] == "done":
+                        final = event
+            
+            if final is None:
+                raise RuntimeError("Stream ended without a final event")
+            
+            processing_time = int((time.perf_counter() - started) * 1000)
+            assistant_message = await _record_assistant_message(db, session, current_user, final, processing_time)
+            cost = assistant_message.cost
+            await db.commit()
+            await history_cache.record(session, [assistant_message])
+            conversation_summarizer.maybe_schedule(session)
+            
+            logger.info("AI stream completed", extra={
+                "user_id": current_user.id,
+                "session_id": session.id,
+                "model": final["model"],
+                "ttft_ms": first_token_ms,
+                "total_ms": processing_time
+            })
+            
+            yield _sse_event("done", {
+                "model": final["model"],
+                "provider": final["provider"],
+                "usage": final["usage"],
+                "cost": cost / 100,  # Convert back to dollars
+                "session_id": session.id,
+                "ttft_ms": first_token_ms,
+                "dropped_turns": dropped_turns
+            })
+        
+        except Exception as e:
+            await db.rollback()
+            
+            logger.error(f"AI streaming error: {str(e)}", extra={
+                "user_id": user_id,
+                "session_id": session_id,
+                "error": str(e)
+            })
+            
+            await _save_error_message(db, session_id, user_id, e)
+            
+            yield _sse_event("error", {
+                "detail": f"AI processing failed: {str(e)}",
+                "session_id": session_id
+            })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Disable proxy buffering so deltas flush immediately
+        }
+    )
+
+
+def _job_response(record: Dict[str, Any]) -> CompletionJobResponse:
+    return CompletionJobResponse(**{
+        key: value for key, value in record.items() if key != "owner_id"
+    })
+
+
+@router.post("/jobs", response_model=CompletionJobResponse, status_code=status.HTTP_202_ACCEPTED)
+@limiter.limit("10/minute")
+async def create_completion_job(
+    request: Request,
+    payload: CompletionJobRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Queue a message for background processing and return a job id.
+
+    The user message is saved and the prompt assembled right away; a worker
+    then generates the reply and stores it in the session. Poll
+    ``GET /jobs/{job_id}``, or pass ``client_id`` to be told over
+    ``/api/ws/connect/{client_id}`` when the job has finished.
+    """
+    try:
+        session, user_message, ai_messages, dropped_turns = await _prepare_conversation(payload, current_user, db)
+        await add_session_usage(db, session, messages=1)
+        await db.commit()
+        await history_cache.record(session, [user_message])
+    except HTTPException:
+        await db.rollback()
+        raise
+    
+    session_id = session.id
+    weight = weight_for_user(current_user)
+    
+    async def run_job() -> Dict[str, Any]:
+        # Tagged with the user so the stored reply starts their read-your-writes window
+        async with AsyncSessionLocal(info={"user_id": current_user.id}) as job_db:
+            job_session = await job_db.get(AISession, session_id)
+            try:
+                async with fair_scheduler.slot(
+                    current_user.id,
+                    weight=weight,
+                    cost=ai_service.count_context_tokens(ai_messages, payload.max_tokens)
+                ):
+                    started = time.perf_counter()
+                    ai_response = await ai_service.generate_completion(
+                        messages=ai_messages,
+                        model=AIModel(payload.model) if payload.model else None,
+                        temperature=payload.temperature or 0.7,
+                        max_tokens=payload.max_tokens,
+                        task_type=payload.task_type or "general",
+                        use_cache=not payload.bypass_cache,
+                        slo=payload.routing_slo(),
+                        cascade=payload.cascade
+                    )
+                    processing_time = int((time.perf_counter() - started) * 1000)
+                
+                assistant_message = await _record_assistant_message(
+                    job_db, job_session, current_user, ai_response, processing_time
+                )
+                cost = assistant_message.cost
+                await job_db.commit()
+                await history_cache.record(job_session, [assistant_message])
+            except Exception as e:
+                await job_db.rollback()
+                logger.error(f"AI job processing error: {str(e)}", extra={
+                    "user_id": current_user.id,
+                    "session_id": session_id,
+                    "error": str(e)
+                })
+                await _save_error_message(job_db, session_id, current_user.id, e)
+                raise
+        
+        conversation_summarizer.maybe_schedule(job_session)
+        return AICompletionResponse(
+            content=ai_response["content"],
+            model=ai_response["model"],
+            provider=ai_response["provider"],
+            usage=ai_response["usage"],
+            cost=cost / 100,  # Convert back to dollars
+            session_id=session_id,
+            cached=ai_response.get("cached", False),
+            dropped_turns=dropped_turns,
+            cascade=ai_response.get("cascade")
+        ).model_dump()
+    
+    async def notify(record: Dict[str, Any]) -> None:
+        # WebSocket client ids are not authenticated, so only announce that
+        # the job finished; the result is fetched from GET /jobs/{job_id}
+        await ws_manager.send_personal_message(
+            json.dumps({
+                "type": "ai_job",
+                "data": {"job_id": record["job_id"], "status": record["status"]}
+            }),
+            payload.client_id
+        )
+    
+    try:
+        record = await completion_jobs.submit(
+            current_user.id,
+            run_job,
+            notify=notify if payload.client_id else None,
+            session_id=session_id
+        )
+    except JobQueueFullError as e:
+        await _save_error_message(db, session_id, current_user.id, e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many queued AI jobs, please retry shortly",
+            headers={"Retry-After": "5"}
+        )
+    
+    return _job_response(record)
+
+
+@router.get("/jobs/{job_id}", response_model=CompletionJobResponse)
+async def get_completion_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """Get the status and, once finished, the result of a completion job"""
+    record = await completion_jobs.get(job_id)
+    if not record or record["owner_id"] != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    
+    return _job_response(record)
+
+
+@router.post("/batch", response_model=BatchCompletionResponse)
+@limiter.limit("5/minute")
+async def process_batch(
+    request: Request,
+    payload: BatchCompletionRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    deadline: Deadline = Depends(request_deadline)
+) -> Any:
+    """
+    Run a list of independent prompts with bounded fan-out.
+
+    Items are completed concurrently (at most ``concurrency``, capped by
+    AI_BATCH_MAX_CONCURRENCY and the user's fair-share slots). All resulting
+    messages are inserted into one session in a single transaction, and each
+    item reports its own result or error.
+    """
+    # The whole batch is shed as its lowest-priority item
+    _shed_if_overloaded(max(priority_for_task(item.task_type) for item in payload.items))
+    
+    if payload.session_id:
+        session = await db.get(AISession, payload.session_id)
+        if not session or session.user_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Session not found"
+            )
+    else:
+        first = payload.items[0].message
+        session = AISession(
+            user_id=current_user.id,
+            title=f"Batch: {first[:43]}..." if len(first) > 43 else f"Batch: {first}",
+            ai_model=current_user.preferred_ai_model,
+            temperature=7,  # 0.7 * 10
+            max_tokens=2000
+        )
+        db.add(session)
+        await db.flush()
+    
+    concurrency = min(payload.concurrency or settings.AI_BATCH_MAX_CONCURRENCY, settings.AI_BATCH_MAX_CONCURRENCY)
+    semaphore = asyncio.Semaphore(concurrency)
+    weight = weight_for_user(current_user)
+    
+    async def run_item(item: BatchCompletionItem) -> Dict[str, Any]:
+        ai_messages = []
+        if item.system_prompt:
+            ai_messages.append({"role": "system", "content": item.system_prompt})
+        ai_messages.append({"role": "user", "content": item.message})
+        
+        async with semaphore:
+            async with fair_scheduler.slot(
+                current_user.id,
+                weight=weight,
+                cost=ai_service.count_context_tokens(ai_messages, item.max_tokens),
+                max_wait=deadline.cap(settings.AI_FAIR_MAX_QUEUE_WAIT_SECONDS)
+            ):
+                started = time.perf_counter()
+                result = await ai_service.generate_completion(
+                    messages=ai_messages,
+                    model=AIModel(item.model) if item.model else None,
+                    temperature=item.temperature or 0.7,
+                    max_tokens=item.max_tokens,
+                    task_type=item.task_type or "general",
+                    use_cache=not payload.bypass_cache,
+                    deadline=deadline
+                )
+                return {**result, "processing_time": int((time.perf_counter() - started) * 1000)}
+    
+    outcomes = await asyncio.gather(
+        *(run_item(item) for item in payload.items),
+        return_exceptions=True
+    )
+    
+    results = []
+    rows = []
+    total_cost = 0
+    total_tokens = 0
+    for index, (item, outcome) in enumerate(zip(payload.items, outcomes)):
+        rows.append(Message(
+            session_id=session.id,
+            user_id=current_user.id,
+            content=item.message,
+            role=MessageRole.USER,
+            type=MessageType.TEXT
+        ))
+        
+        if isinstance(outcome, BaseException):
+            logger.error(f"Batch item {index} failed: {str(outcome)}", extra={
+                "user_id": current_user.id,
+                "session_id": session.id
+            })
+            rows.append(Message(
+                session_id=session.id,
+                user_id=current_user.id,
+                content=f"Error: {str(outcome)}",
+                role=MessageRole.ERROR,
+                type=MessageType.TEXT
+            ))
+            results.append(BatchItemResult(index=index, error=str(outcome)))
+            continue
+        
+        cost = ai_service.calculate_response_cost(outcome)
+        total_cost += cost
+        total_tokens += outcome["usage"]["total_tokens"]
+        rows.append(Message(
+            session_id=session.id,
+            user_id=current_user.id,
+            content=outcome["content"],
+            role=MessageRole.ASSISTANT,
+            type=MessageType.TEXT,
+            ai_model=outcome["model"],
+            tokens_used=outcome["usage"]["total_tokens"],
+            cost=cost,
+            processing_time=outcome["processing_time"],
+            message_metadata=ai_service.completion_metadata(outcome)
+        ))
+        results.append(BatchItemResult(
+            index=index,
+            content=outcome["content"],
+            model=outcome["model"],
+            provider=outcome["provider"],
+            usage=outcome["usage"],
+            cost=cost / 100,  # Convert back to dollars
+            cached=outcome.get("cached", False)
+        ))
+    
+    # One transaction for every message in the batch
+    db.add_all(rows)
+    await add_session_usage(db, session, messages=len(rows), tokens=total_tokens, cost=total_cost)
+    await db.commit()
+    await history_cache.record(session, rows)
+    
+    succeeded = sum(1 for result in results if result.error is None)
+    return BatchCompletionResponse(
+        session_id=session.id,
+        results=results,
+        succeeded=succeeded,
+        failed=len(results) - succeeded,
+        total_cost=total_cost / 100  # Convert back to dollars
+    )
+
+
 @router.get("/sessions/{session_id}/messages", response_model=List[MessageResponse])
 async def get_messages(
     session_id: int,
+    response: Response,
     skip: int = 0,
     limit: int = 50,
-    current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    latest: bool = False,
+    current_user: User = Depends(get_current_user_readonly),
+    db: AsyncSession = Depends(get_read_db)
 ) -> Any:
-    """Get messages for a session"""
+    """
+    Get messages for a session, oldest first.
+
+    ``latest=true`` returns the newest ``limit`` messages (the chat view).
+    From there, pass a page's ``X-Before-Cursor`` header as ``before`` to load
+    older messages, or its ``X-After-Cursor`` as ``after`` to fetch new ones.
+    Without a cursor or ``latest``, ``skip`` pages by offset.
+    """
     # Verify session ownership
     session = await db.get(AISession, session_id)
     if not session or session.user_id != current_user.id:
@@ -253,13 +912,20 @@ async def get_messages(
             detail="Session not found"
         )
     
-    query = select(Message).where(
-        Message.session_id == session_id
-    ).order_by(Message.created_at).offset(skip).limit(limit)
+    query = select(Message).where(Message.session_id == session_id)
+    
+    reverse = False
+    if before or after or latest:
+        query, reverse = _keyset_page(query, [Message.created_at, Message.id], limit, before, after, newest_first=False)
+    else:
+        query = query.order_by(Message.created_at, Message.id).offset(skip).limit(limit)
     
     result = await db.execute(query)
-    messages = result.scalars().all()
+    messages = list(result.scalars().all())
+    if reverse:
+        messages.reverse()
     
+    _set_page_cursors(response, messages, newest_first=False)
     return messages
 
 
@@ -281,4 +947,76 @@ async def delete_session(
     await db.delete(session)
     await db.commit()
     
-    return {"message": "Session deleted successfully"}
\ No newline at end of file
+    return {"message": "Session deleted successfully"}
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """Get completion cache hit/miss and request coalescing counters"""
+    return {
+        **completion_cache.stats(),
+        "coalescing": ai_service.singleflight.stats(),
+        "history": history_cache.stats()
+    }
+
+
+@router.get("/providers/health")
+async def get_provider_health(
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """Get circuit breaker state for each AI provider"""
+    return ai_service.get_provider_health()
+
+
+@router.get("/cascade/stats")
+async def get_cascade_stats(
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """Get cascade routing acceptance and escalation counts and estimated savings"""
+    return ai_service.get_cascade_stats()
+
+
+@router.get("/models/stats")
+async def get_model_stats(
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """Get live per-model latency (EWMA, percentiles), error rate and throughput used for SLO routing"""
+    return ai_service.get_model_stats()
+
+
+@router.get("/http/stats")
+async def get_http_pool_stats(
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """Get connection pool utilization of the shared provider HTTP client"""
+    return get_http_stats()
+
+
+@router.get("/db/stats")
+async def get_database_pool_stats(
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """Get database connection pool checkout wait, in-use and overflow counts"""
+    return get_db_pool_stats()
+
+
+@router.get("/providers/rate-limits")
+async def get_rate_limit_stats(
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """Get per-model RPM/TPM headroom and admission queue depth"""
+    return ai_service.rate_limiter.stats()
+
+
+@router.get("/scheduler/stats")
+async def get_scheduler_stats(
+    current_user: User = Depends(get_current_active_superuser)
+) -> Any:
+    """Get per-user completion queue depth and in-flight counts, plus load shedding and background job counters"""
+    return {
+        **fair_scheduler.stats(),
+        "load_shedding": load_shedder.stats(),
+        "jobs": completion_jobs.stats()
+    }
\ No newline at end of file
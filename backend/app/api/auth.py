@@ -18,6 +18,7 @@ from app.core.security import (
     create_refresh_token,
     get_password_hash,
     get_current_user,
+    get_current_user_readonly,
     verify_token
 )
 from app.models.user import User
@@ -37,7 +38,7 @@ limiter = Limiter(key_func=get_remote_address)
 @router.post("/register", response_model=UserResponse)
 @limiter.limit("5/hour")  # 5 registrations per hour per IP
 async def register(
-    http_request: Request,
+    request: Request,
     user_data: UserCreate,
     db: AsyncSession = Depends(get_db)
 ) -> Any:
@@ -71,7 +72,7 @@ async def register(
 @router.post("/login", response_model=Token)
 @limiter.limit("20/hour")  # 20 login attempts per hour per IP (brute force protection)
 async def login(
-    http_request: Request,
+    request: Request,
     response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db)
@@ -181,7 +182,7 @@ async def refresh_token(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_readonly)
 ) -> Any:
     """Get current user information"""
     return current_user
@@ -15,6 +15,12 @@ from app.models import User, Message, MessageRole, MessageType, AISession
 from app.schemas.voice import VoiceTranscriptionResponse, VoiceUploadResponse
 from app.services.whisper_service import whisper_service
 from app.services.ai_service import ai_router
+from app.api.ai_router import _capacity_error, _shed_if_overloaded, request_deadline
+from app.services.deadline import Deadline
+from app.services.fair_scheduler import fair_scheduler, weight_for_user
+from app.services.history_cache import history_cache
+from app.services.rate_limiter import priority_for_task
+from app.services.session_stats import add_session_usage
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -62,7 +68,7 @@ async def transcribe_audio(
                 role=MessageRole.USER,
                 type=MessageType.VOICE,
                 transcription=result['transcription'],
-                metadata={
+                message_metadata={
                     "duration": result['duration'],
                     "language": result['language'],
                     "model": result['model']
@@ -71,13 +77,10 @@ async def transcribe_audio(
                 cost=cost_cents
             )
             db.add(message)
-            
-            # Update session stats
-            session.total_messages += 1
-            session.total_cost += cost_cents
-            
+            await add_session_usage(db, session, messages=1, cost=cost_cents)
             await db.commit()
             await db.refresh(message)
+            await history_cache.record(session, [message])
         
         return VoiceTranscriptionResponse(
             transcription=result['transcription'],
@@ -107,11 +110,17 @@ async def process_voice_message(
     language: Optional[str] = Form(None),
     auto_respond: bool = Form(True),
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    deadline: Deadline = Depends(request_deadline)
 ) -> Any:
     """
-    Process voice message: transcribe and optionally get AI response
+    Process voice message: transcribe and optionally get AI response.
+    Transcription and the reply share one deadline from the start of the request.
     """
+    if auto_respond:
+        # Shed before paying for a transcription whose reply could not be served
+        _shed_if_overloaded(priority_for_task("voice_response"))
+    
     try:
         # First transcribe the audio
         transcription_result = await whisper_service.transcribe_audio(
@@ -154,7 +163,7 @@ async def process_voice_message(
             role=MessageRole.USER,
             type=MessageType.VOICE,
             transcription=transcribed_text,
-            metadata={
+            message_metadata={
                 "duration": transcription_result['duration'],
                 "language": transcription_result['language']
             },
@@ -170,17 +179,21 @@ async def process_voice_message(
                 "content": transcribed_text
             }]
             
-            ai_result = await ai_router.generate_completion(
-                messages=messages,
-                temperature=0.7,
-                task_type="voice_response"
-            )
+            async with fair_scheduler.slot(
+                current_user.id,
+                weight=weight_for_user(current_user),
+                cost=ai_router.count_context_tokens(messages),
+                max_wait=deadline.cap(settings.AI_FAIR_MAX_QUEUE_WAIT_SECONDS)
+            ):
+                ai_result = await ai_router.generate_completion(
+                    messages=messages,
+                    temperature=0.7,
+                    task_type="voice_response",
+                    deadline=deadline
+                )
             
             # Calculate AI cost
-            ai_cost = ai_router.calculate_cost(
-                model=ai_result["model"],
-                usage=ai_result["usage"]
-            )
+            ai_cost = ai_router.calculate_response_cost(ai_result)
             
             # Save AI response
             ai_message = Message(
@@ -191,7 +204,8 @@ async def process_voice_message(
                 type=MessageType.TEXT,
                 ai_model=ai_result["model"],
                 tokens_used=ai_result["usage"]["total_tokens"],
-                cost=ai_cost
+                cost=ai_cost,
+                message_metadata=ai_router.completion_metadata(ai_result)
             )
             db.add(ai_message)
             
@@ -200,16 +214,18 @@ async def process_voice_message(
                 "model": ai_result["model"],
                 "tokens": ai_result["usage"]["total_tokens"]
             }
-            
-            # Update session stats
-            session.total_messages += 2
-            session.total_tokens_used += ai_result["usage"]["total_tokens"]
-            session.total_cost += transcription_cost + ai_cost
+            await add_session_usage(
+                db,
+                session,
+                messages=2,
+                tokens=ai_result["usage"]["total_tokens"],
+                cost=transcription_cost + ai_cost
+            )
         else:
-            session.total_messages += 1
-            session.total_cost += transcription_cost
+            await add_session_usage(db, session, messages=1, cost=transcription_cost)
         
         await db.commit()
+        await history_cache.record(session, [voice_message, ai_message] if ai_response else [voice_message])
         
         return VoiceUploadResponse(
             session_id=session_id,
@@ -218,8 +234,16 @@ async def process_voice_message(
             total_cost=(transcription_cost + (ai_cost if ai_response else 0)) / 100
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
+        await db.rollback()
         logger.error(f"Voice processing error: {str(e)}")
+        
+        capacity_error = _capacity_error(e)
+        if capacity_error:
+            raise capacity_error
+        
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Voice processing failed: {str(e)}"
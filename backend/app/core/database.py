@@ -1,24 +1,195 @@
 """
 Database configuration and session management
 """
-from typing import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
-from sqlalchemy.orm import declarative_base
-from sqlalchemy.pool import NullPool
+import itertools
+import time
+from typing import Any, AsyncGenerator, Dict, Optional
+from uuid import uuid4
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, declarative_base
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
 from app.core.config import settings
+from app.services.latency import LatencyTracker
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Connection pool that records how long checkouts wait for a connection"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.checkout_waits = LatencyTracker()
+        self.checkouts_total = 0
+        self.checkout_timeouts = 0
+        self.max_checkout_wait = 0.0
+
+    def _do_get(self) -> Any:
+        # Includes opening a new connection when the pool has to grow
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.checkout_timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - started
+            self.checkouts_total += 1
+            self.checkout_waits.record(wait)
+            self.max_checkout_wait = max(self.max_checkout_wait, wait)
+
+    def stats(self) -> Dict[str, Any]:
+        in_use = self.checkedout()
+        capacity = self.size() + self._max_overflow
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "connections": self.checkedin() + in_use,
+            "idle_connections": self.checkedin(),
+            "in_use": in_use,
+            "overflow": max(self.overflow(), 0),
+            "utilization": round(in_use / capacity, 4) if capacity > 0 else 0.0,
+            "checkouts_total": self.checkouts_total,
+            "checkout_timeouts": self.checkout_timeouts,
+            "checkout_wait_ms": {
+                "samples": self.checkout_waits.count,
+                **{
+                    name: round(value * 1000, 3) if value is not None else None
+                    for name, value in self.checkout_waits.snapshot().items()
+                    if name != "samples"
+                },
+                "max": round(self.max_checkout_wait * 1000, 3)
+            }
+        }
+
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """Pooling and driver options for DB_POOL_MODE and DB_PGBOUNCER"""
+    options: Dict[str, Any] = {"echo": settings.DATABASE_ECHO}
+
+    if settings.DB_POOL_MODE == "null":
+        # A fresh connection per session (e.g. serverless or an external pooler only)
+        options["poolclass"] = NullPool
+    else:
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=settings.DB_POOL_PRE_PING
+        )
+
+    if settings.DB_PGBOUNCER and url.startswith("postgresql+asyncpg"):
+        # Transaction-mode pgbouncer hands each transaction to any server
+        # connection, so prepared statements must not outlive a statement
+        options["connect_args"] = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__"
+        }
+
+    return options
+
+
+def create_engine_for(url: str) -> AsyncEngine:
+    """Async engine for ``url`` with the configured pool"""
+    return create_async_engine(url, **_engine_options(url))
+
 
 # Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DATABASE_ECHO,
-    poolclass=NullPool,  # Disable connection pooling for async
-)
+engine = create_engine_for(settings.DATABASE_URL)
+
+# Read replicas, used round-robin by read-only sessions
+replica_engines = [create_engine_for(url) for url in settings.DATABASE_REPLICA_URLS]
+_replica_cycle = itertools.cycle(replica_engines)
+
+# User id -> monotonic time until which that user's reads stay on the primary.
+# Kept per process, so with several workers a read can still land on a worker
+# that has not seen the write; the window should cover typical replica lag.
+_recent_writes: Dict[int, float] = {}
+
+
+def _pool_stats(target: AsyncEngine) -> Dict[str, Any]:
+    pool = target.sync_engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        return {"mode": "queue", **pool.stats()}
+    return {"mode": "null"}
+
+
+def get_db_pool_stats() -> Dict[str, Any]:
+    """Checkout wait, in-use and overflow counters of the primary and replica connection pools"""
+    now = time.monotonic()
+    return {
+        "pgbouncer": settings.DB_PGBOUNCER,
+        **_pool_stats(engine),
+        "replicas": [_pool_stats(replica) for replica in replica_engines],
+        "sticky_users": sum(1 for until in _recent_writes.values() if until > now)
+    }
+
+
+def record_write(user_id: int) -> None:
+    """Keep ``user_id``'s reads on the primary for DB_READ_YOUR_WRITES_SECONDS"""
+    now = time.monotonic()
+    if len(_recent_writes) > 10000:
+        for stale in [uid for uid, until in _recent_writes.items() if until <= now]:
+            del _recent_writes[stale]
+    _recent_writes[user_id] = now + settings.DB_READ_YOUR_WRITES_SECONDS
+
+
+def route_reads_for_user(db: AsyncSession, user_id: int) -> None:
+    """
+    Tag a session with its user; a read-only session falls back to the
+    primary if that user wrote within the read-your-writes window.
+    """
+    db.info["user_id"] = user_id
+    if _recent_writes.get(user_id, 0.0) > time.monotonic():
+        db.info["replica"] = None
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the reads of read-only sessions (``info["replica"]``
+    set by ``get_read_db``) to a replica and everything else to the primary.
+    """
+
+    def get_bind(self, mapper: Optional[Any] = None, clause: Optional[Any] = None, **kw: Any) -> Any:
+        replica: Optional[AsyncEngine] = self.info.get("replica")
+        if replica is not None and not self._flushing and not isinstance(clause, UpdateBase):
+            return replica.sync_engine
+        return engine.sync_engine
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _note_flush(session: Session, flush_context: Any) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _note_bulk_write(orm_execute_state: Any) -> None:
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_write(session: Session) -> None:
+    user_id = session.info.get("user_id")
+    if session.info.pop("wrote", False) and user_id is not None:
+        record_write(user_id)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_write(session: Session) -> None:
+    session.info.pop("wrote", None)
+
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
     expire_on_commit=False,
     autocommit=False,
     autoflush=False,
@@ -39,6 +210,19 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency to get a session for read-only endpoints; its queries go to a
+    read replica when DATABASE_REPLICA_URLS is set
+    """
+    replica = next(_replica_cycle, None)
+    async with AsyncSessionLocal(info={"replica": replica}) as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
 async def init_db() -> None:
     """
     Initialize database tables
@@ -55,4 +239,6 @@ async def close_db() -> None:
     """
     Close database connections
     """
-    await engine.dispose()
\ No newline at end of file
+    await engine.dispose()
+    for replica in replica_engines:
+        await replica.dispose()
\ No newline at end of file
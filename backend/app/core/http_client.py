@@ -0,0 +1,95 @@
+"""
+Shared HTTP transport for outbound AI provider calls
+"""
+import logging
+from typing import Any, Dict
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_supported() -> bool:
+    """HTTP/2 needs the optional ``h2`` package (httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """Connection-pooling transport that keeps request and pool utilization counters"""
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.max_connections = kwargs["limits"].max_connections
+        self.requests_total = 0
+        self.errors_total = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests_total += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return await super().handle_async_request(request)
+        except Exception:
+            self.errors_total += 1
+            raise
+        finally:
+            # Counts until response headers arrive; streamed bodies hold the connection longer
+            self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        connections = list(getattr(self._pool, "connections", []))
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {
+            "connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+            "max_connections": self.max_connections,
+            "utilization": round((len(connections) - idle) / self.max_connections, 4) if self.max_connections else 0.0,
+            "requests_in_flight": self.in_flight,
+            "peak_requests_in_flight": self.peak_in_flight,
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total
+        }
+
+
+def _create_transport() -> InstrumentedTransport:
+    http2 = settings.HTTP_HTTP2 and _http2_supported()
+    if settings.HTTP_HTTP2 and not http2:
+        logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+    )
+    return InstrumentedTransport(limits=limits, http2=http2)
+
+
+http_timeout = httpx.Timeout(
+    connect=settings.HTTP_CONNECT_TIMEOUT,
+    read=settings.HTTP_READ_TIMEOUT,
+    write=settings.HTTP_WRITE_TIMEOUT,
+    pool=settings.HTTP_POOL_TIMEOUT
+)
+
+# Shared client: every provider SDK reuses its pooled, kept-alive connections
+http_transport = _create_transport()
+http_client = httpx.AsyncClient(transport=http_transport, timeout=http_timeout)
+
+
+def get_http_stats() -> Dict[str, Any]:
+    """Pool utilization of the shared provider HTTP client"""
+    return http_transport.stats()
+
+
+async def close_http_client() -> None:
+    """Close pooled provider connections"""
+    await http_client.aclose()
@@ -10,7 +10,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db, route_reads_for_user
 from app.models.user import User
 
 # Password hashing
@@ -61,29 +61,35 @@ def decode_token(token: str) -> dict:
         return None
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def _token_user_id(token: str) -> int:
+    """User id from a bearer token"""
     payload = decode_token(token)
     if payload is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     user_id: str = payload.get("sub")
     if user_id is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    
+    return int(user_id)
+
+
+async def _load_active_user(db: AsyncSession, user_id: int) -> User:
+    # Also tags the session, so a commit on it starts the user's read-your-writes window
+    route_reads_for_user(db, user_id)
     
     # Get user from database
-    user = await db.get(User, int(user_id))
+    user = await db.get(User, user_id)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     if not user.is_active:
         raise HTTPException(
@@ -94,6 +100,22 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Get current authenticated user"""
+    return await _load_active_user(db, _token_user_id(token))
+
+
+async def get_current_user_readonly(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_read_db)
+) -> User:
+    """Get current authenticated user through the read-only session (for endpoints that only read)"""
+    return await _load_active_user(db, _token_user_id(token))
+
+
 async def get_current_active_superuser(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -2,18 +2,24 @@
 FastAPI application entry point
 """
 from contextlib import asynccontextmanager
+import math
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 import logging
-from python_json_logger import jsonlogger
+from pythonjsonlogger import jsonlogger
 
 from app.core.config import settings
 from app.core.database import init_db, close_db
+from app.core.http_client import close_http_client
 from app.api import auth, ai_router, voice, websocket
+from app.services.completion_jobs import completion_jobs
+from app.services.summarizer import conversation_summarizer
 
 # Configure logging
 logHandler = logging.StreamHandler()
@@ -35,11 +41,15 @@ async def lifespan(app: FastAPI):
     logger.info("Starting AI-PC System API")
     await init_db()
     logger.info("Database initialized")
+    completion_jobs.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down AI-PC System API")
+    await completion_jobs.shutdown()
+    await conversation_summarizer.shutdown()
+    await close_http_client()
     await close_db()
     logger.info("Database connections closed")
 
@@ -57,6 +67,16 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+
+@app.exception_handler(PoolTimeoutError)
+async def database_busy_handler(request: Request, exc: PoolTimeoutError) -> JSONResponse:
+    """No database connection freed up within DB_POOL_TIMEOUT; ask the client to back off"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database is busy, please retry shortly"},
+        headers={"Retry-After": str(math.ceil(settings.DB_POOL_TIMEOUT))}
+    )
+
 # Add middleware
 app.add_middleware(
     CORSMiddleware,
@@ -64,6 +84,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],  # Specific methods only
     allow_headers=["*"],
+    expose_headers=["X-Before-Cursor", "X-After-Cursor"],  # Pagination cursors
 )
 
 # TrustedHost middleware - always specify allowed hosts, even in DEBUG
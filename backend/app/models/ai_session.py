@@ -1,7 +1,7 @@
 """
 AI Session model for tracking conversations
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, func
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, Index, func
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -9,6 +9,10 @@ from app.core.database import Base
 
 class AISession(Base):
     __tablename__ = "ai_sessions"
+    __table_args__ = (
+        # A user's (active) sessions, newest first
+        Index("ix_ai_sessions_user_id_is_active_started_at", "user_id", "is_active", "started_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -1,7 +1,7 @@
 """
 Message model for storing conversation history
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Enum, func
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Enum, Index, func
 from sqlalchemy.orm import relationship
 import enum
 
@@ -24,6 +24,11 @@ class MessageType(str, enum.Enum):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Session history in order (get_messages, prompt assembly, summaries);
+        # id breaks ties between messages created in the same transaction
+        Index("ix_messages_session_id_created_at", "session_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("ai_sessions.id"), nullable=False)
@@ -44,8 +49,8 @@ class Message(Base):
     cost = Column(Integer, default=0)  # In cents
     processing_time = Column(Integer, nullable=True)  # In milliseconds
     
-    # Metadata
-    metadata = Column(JSON, nullable=True)
+    # Metadata ("metadata" is reserved on declarative models, so the attribute is renamed)
+    message_metadata = Column("metadata", JSON, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -3,9 +3,10 @@ AI-related schemas
 """
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from pydantic import BaseModel, Field, ConfigDict, field_serializer, field_validator
+from pydantic import BaseModel, Field, ConfigDict, field_serializer, field_validator, model_validator
 import bleach
 from app.models.message import MessageRole, MessageType
+from app.services.routing_slo import RoutingSLO
 
 
 class SessionBase(BaseModel):
@@ -99,6 +100,14 @@ class AICompletionRequest(BaseModel):
     max_tokens: Optional[int] = Field(default=None, ge=100, le=8000)
     system_prompt: Optional[str] = Field(None, max_length=2000)
     task_type: Optional[str] = Field(default="general", description="Task type for model selection")
+    bypass_cache: bool = Field(default=False, description="Always call the provider, skipping the completion cache")
+    slo: Optional[str] = Field(
+        None,
+        max_length=200,
+        description='Routing objective when no model is given, e.g. "p95 < 3s" or "cheapest under budget"'
+    )
+    max_cost: Optional[float] = Field(None, gt=0, description="Per-request budget in dollars for \"under budget\" SLOs")
+    cascade: Optional[bool] = Field(None, description="Try a cheap model first and escalate on a weak answer (default: server setting)")
 
     @field_validator('message', 'system_prompt')
     @classmethod
@@ -112,6 +121,16 @@ class AICompletionRequest(BaseModel):
         sanitized = bleach.clean(v, tags=[], strip=True)
         return sanitized.strip()
 
+    @model_validator(mode='after')
+    def validate_slo(self) -> 'AICompletionRequest':
+        """Reject SLOs the router cannot interpret"""
+        if self.slo:
+            RoutingSLO.parse(self.slo, self.max_cost)
+        return self
+
+    def routing_slo(self) -> Optional[RoutingSLO]:
+        return RoutingSLO.parse(self.slo, self.max_cost) if self.slo else None
+
 
 class AICompletionResponse(BaseModel):
     content: str
@@ -120,6 +139,70 @@ class AICompletionResponse(BaseModel):
     usage: Dict[str, int]
     cost: float  # In dollars
     session_id: int
+    cached: bool = False
+    dropped_turns: int = Field(default=0, description="History messages left out to fit the context budget")
+    cascade: Optional[Dict[str, Any]] = Field(default=None, description="Cascade routing decision, if the request was cascaded")
+
+
+class CompletionJobRequest(AICompletionRequest):
+    client_id: Optional[str] = Field(None, description="WebSocket client id (/api/ws/connect/{client_id}) to send the job id and status to on completion")
+
+
+class CompletionJobResponse(BaseModel):
+    job_id: str
+    status: str
+    session_id: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[AICompletionResponse] = None
+    error: Optional[str] = None
+
+
+class BatchCompletionItem(BaseModel):
+    message: str = Field(..., max_length=10000)
+    model: Optional[str] = None
+    temperature: Optional[float] = Field(default=0.7, ge=0, le=1)
+    max_tokens: Optional[int] = Field(default=None, ge=100, le=8000)
+    system_prompt: Optional[str] = Field(None, max_length=2000)
+    task_type: Optional[str] = Field(default="general", description="Task type for model selection")
+
+    @field_validator('message', 'system_prompt')
+    @classmethod
+    def sanitize_text_fields(cls, v: Optional[str]) -> Optional[str]:
+        """Sanitize text inputs to prevent injection attacks"""
+        if v is None:
+            return None
+        if not v.strip():
+            raise ValueError("Text content cannot be empty")
+        sanitized = bleach.clean(v, tags=[], strip=True)
+        return sanitized.strip()
+
+
+class BatchCompletionRequest(BaseModel):
+    items: List[BatchCompletionItem] = Field(..., min_length=1, max_length=100)
+    session_id: Optional[int] = Field(None, description="Session to store results in; a new one is created if omitted")
+    concurrency: Optional[int] = Field(None, ge=1, description="Max prompts in flight, capped by the server limit")
+    bypass_cache: bool = False
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    content: Optional[str] = None
+    model: Optional[str] = None
+    provider: Optional[str] = None
+    usage: Optional[Dict[str, int]] = None
+    cost: float = 0  # In dollars
+    cached: bool = False
+    error: Optional[str] = None
+
+
+class BatchCompletionResponse(BaseModel):
+    session_id: int
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
+    total_cost: float  # In dollars
 
 
 class AIModelInfo(BaseModel):
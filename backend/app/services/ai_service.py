@@ -2,16 +2,32 @@
 AI Service for managing multiple AI providers
 """
 import asyncio
-from typing import Dict, List, Optional, Any
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional, Any
 from enum import Enum
-import httpx
 import json
 import logging
+import math
+import time
 from openai import AsyncOpenAI
 import google.generativeai as genai
+import httpx
 from anthropic import AsyncAnthropic
 
 from app.core.config import settings
+from app.core.http_client import http_client, http_timeout
+from app.services.completion_cache import completion_cache
+from app.services.singleflight import SingleFlight
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.latency import ModelStats
+from app.services.bounded_executor import BoundedExecutor
+from app.services.rate_limiter import AdmissionTimeoutError, Priority, RateLimitScheduler, priority_for_task
+from app.services.routing_slo import RoutingSLO
+from app.services.provider_registry import ClientProvider, ProviderRegistry, load_provider_plugin
+from app.services.fake_provider import create_fake_provider
+from app.services.deadline import Deadline, DeadlineExceeded
+from app.services.cascade import CONFIDENCE_INSTRUCTION, extract_confidence, run_acceptance_checks
+from app.services.token_counter import token_counter, TOKENS_PER_MESSAGE, TOKENS_PER_REPLY
 
 logger = logging.getLogger(__name__)
 
@@ -44,9 +60,26 @@ class AIRouter:
     """
     
     def __init__(self):
-        # Initialize AI clients
-        self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
-        self.anthropic_client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY) if settings.ANTHROPIC_API_KEY else None
+        # Response cache (opt-in via AI_CACHE_ENABLED)
+        self.cache = completion_cache
+        
+        # Tokenizer-backed counting with memoized per-message counts
+        self.token_counter = token_counter
+        
+        # Coalesces identical in-flight requests (AI_COALESCE_ENABLED)
+        self.singleflight = SingleFlight()
+        
+        # Initialize AI clients on the shared, pooled HTTP transport
+        self.openai_client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=http_client,
+            timeout=http_timeout
+        ) if settings.OPENAI_API_KEY else None
+        self.anthropic_client = AsyncAnthropic(
+            api_key=settings.ANTHROPIC_API_KEY,
+            http_client=http_client,
+            timeout=http_timeout
+        ) if settings.ANTHROPIC_API_KEY else None
         
         # Configure Google AI
         if settings.GOOGLE_AI_API_KEY:
@@ -55,46 +88,139 @@ class AIRouter:
         else:
             self.google_client = None
         
-        # Model capabilities mapping
+        # GenerativeModel instances are reused across calls
+        self._gemini_models: Dict[AIModel, Any] = {}
+        
+        # Blocking Gemini calls (sync-only SDKs) get their own bounded pool
+        self.google_executor = BoundedExecutor(
+            "gemini",
+            max_workers=settings.AI_GOOGLE_EXECUTOR_WORKERS,
+            max_queue=settings.AI_GOOGLE_EXECUTOR_MAX_QUEUE
+        )
+        
+        # Model capabilities mapping (rpm/tpm default to entry-level account
+        # tier limits; override per model with AI_RATE_LIMITS)
         self.model_capabilities = {
             AIModel.GPT_4_TURBO: {
                 "provider": AIProvider.OPENAI,
                 "strengths": ["coding", "analysis", "general"],
                 "context_window": 128000,
                 "cost_per_1k_input": 0.01,
-                "cost_per_1k_output": 0.03
+                "cost_per_1k_output": 0.03,
+                "rpm": 500,
+                "tpm": 30000
             },
             AIModel.CLAUDE_3_OPUS: {
                 "provider": AIProvider.ANTHROPIC,
                 "strengths": ["creative_writing", "analysis", "coding"],
                 "context_window": 200000,
                 "cost_per_1k_input": 0.015,
-                "cost_per_1k_output": 0.075
+                "cost_per_1k_output": 0.075,
+                "rpm": 50,
+                "tpm": 20000
             },
             AIModel.GEMINI_PRO: {
                 "provider": AIProvider.GOOGLE,
                 "strengths": ["general", "multilingual", "fast"],
                 "context_window": 32768,
                 "cost_per_1k_input": 0.0005,
-                "cost_per_1k_output": 0.0015
+                "cost_per_1k_output": 0.0015,
+                "rpm": 60,
+                "tpm": 120000
+            },
+            AIModel.GPT_35_TURBO: {
+                "provider": AIProvider.OPENAI,
+                "strengths": ["general", "fast"],
+                "context_window": 16385,
+                "cost_per_1k_input": 0.0005,
+                "cost_per_1k_output": 0.0015,
+                "rpm": 3500,
+                "tpm": 60000
+            },
+            AIModel.CLAUDE_3_HAIKU: {
+                "provider": AIProvider.ANTHROPIC,
+                "strengths": ["general", "fast"],
+                "context_window": 200000,
+                "cost_per_1k_input": 0.00025,
+                "cost_per_1k_output": 0.00125,
+                "rpm": 50,
+                "tpm": 50000
             }
         }
-    
-    def select_best_model(self, task_type: str, context_length: int = 0) -> AIModel:
-        """
-        Select the best model based on task type and context requirements
-        """
+        
         # Task type to model mapping
-        task_model_map = {
+        self.task_model_map = {
             "coding": [AIModel.GPT_4_TURBO, AIModel.CLAUDE_3_OPUS],
             "creative_writing": [AIModel.CLAUDE_3_OPUS, AIModel.GPT_4_TURBO],
             "analysis": [AIModel.CLAUDE_3_OPUS, AIModel.GPT_4_TURBO],
             "general": [AIModel.GEMINI_PRO, AIModel.GPT_35_TURBO],
             "translation": [AIModel.GEMINI_PRO, AIModel.GPT_4_TURBO],
-            "quick_response": [AIModel.GEMINI_PRO, AIModel.GPT_35_TURBO]
+            "quick_response": [AIModel.GEMINI_PRO, AIModel.GPT_35_TURBO],
+            "voice_response": [AIModel.GEMINI_PRO, AIModel.GPT_35_TURBO, AIModel.CLAUDE_3_HAIKU]
+        }
+        
+        # Models tried, in order, when the preferred ones for a task fail
+        self.fallback_models = [AIModel.GPT_35_TURBO, AIModel.GEMINI_PRO, AIModel.CLAUDE_3_HAIKU]
+        
+        # Completion backends by provider name
+        self.providers = self._build_provider_registry()
+        
+        # Per-provider circuit breakers
+        self.breakers = {
+            provider: CircuitBreaker(
+                name=provider.value,
+                window_seconds=settings.AI_BREAKER_WINDOW_SECONDS,
+                min_calls=settings.AI_BREAKER_MIN_CALLS,
+                failure_rate_threshold=settings.AI_BREAKER_FAILURE_RATE,
+                slow_call_seconds=settings.AI_BREAKER_SLOW_CALL_SECONDS,
+                slow_call_rate_threshold=settings.AI_BREAKER_SLOW_CALL_RATE,
+                open_seconds=settings.AI_BREAKER_OPEN_SECONDS,
+                half_open_max_calls=settings.AI_BREAKER_HALF_OPEN_MAX_CALLS
+            )
+            for provider in AIProvider
+        }
+        
+        # Requests/tokens-per-minute admission per model
+        self.rate_limiter = RateLimitScheduler({
+            model.value: {
+                "rpm": cap["rpm"],
+                "tpm": cap["tpm"],
+                **settings.AI_RATE_LIMITS.get(model.value, {})
+            }
+            for model, cap in self.model_capabilities.items()
+        })
+        
+        # Live latency, error rate and throughput per model
+        self.model_stats = {
+            model: ModelStats(
+                alpha=settings.AI_ROUTING_EWMA_ALPHA,
+                outcome_window_seconds=settings.AI_ROUTING_STATS_WINDOW_SECONDS
+            )
+            for model in self.model_capabilities
         }
         
-        preferred_models = task_model_map.get(task_type, [AIModel.GPT_4_TURBO])
+        # Cascade routing outcomes; savings in cents
+        self.cascade_stats = {"attempted": 0, "accepted": 0, "escalated": 0, "savings": 0.0}
+        
+        # Hedged request accounting (timestamps within the rate window)
+        self._hedge_eligible: Deque[float] = deque()
+        self._hedges_sent: Deque[float] = deque()
+    
+    def select_best_model(
+        self,
+        task_type: str,
+        context_length: int = 0,
+        slo: Optional[RoutingSLO] = None,
+        reply_tokens: Optional[int] = None
+    ) -> AIModel:
+        """
+        Select the best model based on task type and context requirements,
+        or on live measurements when an SLO is given
+        """
+        if slo is not None:
+            return self.select_model_for_slo(slo, task_type, context_length, reply_tokens)
+        
+        preferred_models = self.task_model_map.get(task_type, [AIModel.GPT_4_TURBO])
         
         # Filter by context window size
         suitable_models = []
@@ -102,22 +228,201 @@ class AIRouter:
             if model in self.model_capabilities:
                 cap = self.model_capabilities[model]
                 if context_length <= cap["context_window"]:
-                    # Check if the provider is available
+                    # Check if the provider is available (configured and circuit not open)
                     if self._is_provider_available(cap["provider"]):
                         suitable_models.append(model)
         
-        # Return the first suitable model or default
-        return suitable_models[0] if suitable_models else AIModel.GPT_4_TURBO
+        if suitable_models:
+            return self._prefer_headroom(suitable_models, context_length)
+        
+        # Preferred providers are all down; try the general fallbacks before the default
+        fallbacks = self.get_fallback_models(AIModel.GPT_4_TURBO, task_type, context_length)
+        return fallbacks[0] if fallbacks else AIModel.GPT_4_TURBO
+    
+    def select_model_for_slo(
+        self,
+        slo: RoutingSLO,
+        task_type: str,
+        context_length: int = 0,
+        reply_tokens: Optional[int] = None
+    ) -> AIModel:
+        """
+        Pick the model that satisfies ``slo`` according to current measurements.
+
+        Candidates are all available models whose window fits, in the task's
+        preference order. A model with fewer than AI_ROUTING_MIN_SAMPLES
+        recent calls is not ruled out by latency or error-rate bounds, so it
+        can collect data. Request cost is estimated with the full reply
+        budget. If nothing satisfies the SLO, the lowest-latency model (or
+        the cheapest, for cost-only SLOs) is used.
+        """
+        ordered = list(dict.fromkeys(
+            self.task_model_map.get(task_type, []) + self.fallback_models + list(self.model_capabilities)
+        ))
+        candidates = [
+            model for model in ordered
+            if context_length <= self.model_capabilities[model]["context_window"]
+            and self._is_provider_available(self.model_capabilities[model]["provider"])
+        ]
+        if not candidates:
+            return self.select_best_model(task_type, context_length)
+        
+        reply_tokens = reply_tokens or settings.AI_MAX_TOKENS
+        prompt_tokens = max(context_length - reply_tokens, 0)
+        costs = {
+            model: self.calculate_cost(model, {"prompt_tokens": prompt_tokens, "completion_tokens": reply_tokens})
+            for model in candidates
+        }
+        
+        satisfying = [model for model in candidates if self._meets_slo(model, slo, costs[model])]
+        if not satisfying:
+            logger.warning(f"No model currently meets SLO '{slo.describe()}', routing best effort")
+            if slo.latency_bounds:
+                return min(candidates, key=lambda m: self._latency_rank(m, slo))
+            return min(candidates, key=lambda m: costs[m])
+        
+        # min() keeps the preference order among ties
+        if slo.objective == "cheapest":
+            return min(satisfying, key=lambda m: costs[m])
+        if slo.objective == "fastest":
+            return min(satisfying, key=lambda m: self._latency_rank(m, slo))
+        return self._prefer_headroom(satisfying, context_length)
+    
+    def _measured_latency(self, model: AIModel, metric: str) -> Optional[float]:
+        """Latency metric ("ewma" or "pNN") in seconds, or None until enough samples exist"""
+        stats = self.model_stats[model]
+        if stats.count < settings.AI_ROUTING_MIN_SAMPLES:
+            return None
+        if metric == "ewma":
+            return stats.ewma
+        return stats.percentile(float(metric[1:]))
+    
+    def _latency_rank(self, model: AIModel, slo: RoutingSLO) -> float:
+        """Sort key for "fastest": the SLO's first latency metric (EWMA by default), unmeasured models last"""
+        metric = next(iter(slo.latency_bounds), "ewma")
+        latency = self._measured_latency(model, metric)
+        return latency if latency is not None else math.inf
+    
+    def _meets_slo(self, model: AIModel, slo: RoutingSLO, cost: float) -> bool:
+        if slo.max_cost is not None and cost > slo.max_cost:
+            return False
+        for metric, bound in slo.latency_bounds.items():
+            latency = self._measured_latency(model, metric)
+            if latency is not None and latency > bound:
+                return False
+        if slo.max_error_rate is not None:
+            stats = self.model_stats[model]
+            if stats.calls >= settings.AI_ROUTING_MIN_SAMPLES and stats.error_rate() > slo.max_error_rate:
+                return False
+        return True
+    
+    def _prefer_headroom(self, models: List[AIModel], tokens: int) -> AIModel:
+        """First model with rate-limit capacity right now, else the one that frees up soonest"""
+        waits = [
+            (self.rate_limiter.time_until_capacity(model.value, tokens), index, model)
+            for index, model in enumerate(models)
+        ]
+        for wait, _, model in waits:
+            if wait == 0:
+                return model
+        return min(waits)[2]
+    
+    def cheapest_available_model(self) -> AIModel:
+        """Cheapest model whose provider is currently available"""
+        available = [
+            model for model, cap in self.model_capabilities.items()
+            if self._is_provider_available(cap["provider"])
+        ]
+        if not available:
+            return AIModel.GPT_35_TURBO
+        return min(
+            available,
+            key=lambda m: self.model_capabilities[m]["cost_per_1k_input"] + self.model_capabilities[m]["cost_per_1k_output"]
+        )
+    
+    def get_fallback_models(
+        self,
+        model: AIModel,
+        task_type: str,
+        context_length: int = 0
+    ) -> List[AIModel]:
+        """Ordered alternatives to ``model`` whose providers are currently available"""
+        candidates = self.task_model_map.get(task_type, []) + self.fallback_models
+        fallbacks = []
+        for candidate in candidates:
+            if candidate == model or candidate in fallbacks or candidate not in self.model_capabilities:
+                continue
+            cap = self.model_capabilities[candidate]
+            if context_length <= cap["context_window"] and self._is_provider_available(cap["provider"]):
+                fallbacks.append(candidate)
+        return fallbacks
     
     def _is_provider_available(self, provider: AIProvider) -> bool:
-        """Check if a provider is configured and available"""
-        if provider == AIProvider.OPENAI:
-            return self.openai_client is not None
-        elif provider == AIProvider.ANTHROPIC:
-            return self.anthropic_client is not None
-        elif provider == AIProvider.GOOGLE:
-            return self.google_client is not None
-        return False
+        """Check if a provider is configured and its circuit breaker allows calls"""
+        return self._is_provider_configured(provider) and self.breakers[provider].is_available()
+    
+    def _is_provider_configured(self, provider: AIProvider) -> bool:
+        """Check if a provider has a registered, configured backend"""
+        backend = self.providers.get(provider.value)
+        return backend is not None and backend.is_configured()
+    
+    def _build_provider_registry(self) -> ProviderRegistry:
+        """
+        Register the SDK-backed providers, then apply overrides.
+
+        Providers listed in AI_FAKE_PROVIDERS are served by the deterministic
+        fake instead of their SDK, so load tests exercise the real routing,
+        rate limiting and accounting offline. AI_PROVIDER_PLUGINS entries
+        ("module:factory") replace the built-in backend of an AIProvider.
+        """
+        registry = ProviderRegistry()
+        registry.register(AIProvider.OPENAI.value, ClientProvider(
+            AIProvider.OPENAI.value,
+            self._openai_completion,
+            self._openai_stream,
+            lambda: self.openai_client is not None
+        ))
+        registry.register(AIProvider.ANTHROPIC.value, ClientProvider(
+            AIProvider.ANTHROPIC.value,
+            self._anthropic_completion,
+            self._anthropic_stream,
+            lambda: self.anthropic_client is not None
+        ))
+        registry.register(AIProvider.GOOGLE.value, ClientProvider(
+            AIProvider.GOOGLE.value,
+            self._google_completion,
+            self._google_stream,
+            lambda: self.google_client is not None
+        ))
+        
+        for name in settings.AI_FAKE_PROVIDERS:
+            logger.warning(f"AI provider '{name}' is served by the fake provider")
+            registry.register(name, create_fake_provider(name))
+        
+        for path in settings.AI_PROVIDER_PLUGINS:
+            plugin = load_provider_plugin(path, [provider.value for provider in AIProvider])
+            registry.register(plugin.name, plugin)
+        
+        return registry
+    
+    def get_provider_health(self) -> Dict[str, Any]:
+        """Circuit breaker state per provider for monitoring"""
+        health = {
+            provider.value: {
+                "configured": self._is_provider_configured(provider),
+                **breaker.snapshot()
+            }
+            for provider, breaker in self.breakers.items()
+        }
+        for name, backend in self.providers.describe().items():
+            if name in health:
+                health[name]["backend"] = backend
+        health[AIProvider.GOOGLE.value]["executor"] = self.google_executor.stats()
+        return health
+    
+    def get_model_stats(self) -> Dict[str, Any]:
+        """Live latency, error rate and throughput per model for monitoring"""
+        return {model.value: stats.snapshot() for model, stats in self.model_stats.items()}
     
     async def generate_completion(
         self,
@@ -125,42 +430,672 @@ class AIRouter:
         model: Optional[AIModel] = None,
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
-        task_type: str = "general"
+        task_type: str = "general",
+        use_cache: bool = True,
+        priority: Optional[Priority] = None,
+        slo: Optional[RoutingSLO] = None,
+        cascade: Optional[bool] = None,
+        deadline: Optional[Deadline] = None
     ) -> Dict[str, Any]:
         """
-        Generate completion using the selected or best AI model
+        Generate completion using the selected or best AI model.
+
+        When the completion cache is enabled, identical requests are served
+        from cache unless ``use_cache`` is False, and identical requests that
+        arrive while one is in flight share its provider call. Results that
+        did not trigger their own provider call carry ``"cached": True`` and
+        are billed at zero cost.
+
+        ``priority`` orders the call in the provider's rate-limit queue and
+        defaults to the priority configured for ``task_type``. When no model is
+        given, ``slo`` routes on live latency, error rate and cost instead of
+        the task's static preference list.
+
+        ``cascade`` (default: AI_CASCADE_ENABLED for AI_CASCADE_TASK_TYPES)
+        answers with a cheap model first and escalates only if the answer
+        fails the acceptance checks; it applies only when neither ``model``
+        nor ``slo`` is given.
+
+        ``deadline`` bounds the whole call: provider calls and rate-limit
+        waits get the remaining budget as their timeout, and fallbacks are
+        only tried while at least AI_DEADLINE_MIN_FALLBACK_SECONDS remain.
+        Running out of budget raises ``DeadlineExceeded``.
         """
-        # Calculate context length (rough estimate)
-        context_length = sum(len(msg.get("content", "")) for msg in messages)
+        if priority is None:
+            priority = priority_for_task(task_type)
+        
+        if model is None and slo is None and self._use_cascade(task_type, cascade):
+            return await self._generate_cascade(
+                messages, temperature, max_tokens, task_type, use_cache, priority, deadline
+            )
+        
+        # Tokens the request needs from the context window: prompt plus reply budget
+        context_length = self.count_context_tokens(messages, max_tokens)
         
         # Select model if not specified
         if not model:
-            model = self.select_best_model(task_type, context_length)
+            model = self.select_best_model(task_type, context_length, slo=slo, reply_tokens=max_tokens)
         
         # Get model capabilities
         capabilities = self.model_capabilities.get(model)
         if not capabilities:
             raise ValueError(f"Unknown model: {model}")
         
-        provider = capabilities["provider"]
+        cache_key = None
+        if use_cache and (settings.AI_CACHE_ENABLED or settings.AI_COALESCE_ENABLED):
+            cache_key = self.cache.make_key(messages, model.value, temperature, max_tokens)
+        
+        if cache_key is not None and settings.AI_CACHE_ENABLED:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return {**cached, "cached": True}
+        
+        if cache_key is not None and settings.AI_COALESCE_ENABLED:
+            # Identical concurrent requests share a single provider call
+            coalesced = self.singleflight.do(
+                cache_key,
+                lambda: self._complete(
+                    messages, model, temperature, max_tokens, task_type, context_length, priority, deadline
+                ),
+                # A follower outliving the leader's deadline restarts the call with its own
+                handoff=(DeadlineExceeded,)
+            )
+            # A follower may have a tighter deadline than the call it joined
+            if deadline is not None:
+                result, shared = await deadline.run(coalesced, "coalesced completion")
+            else:
+                result, shared = await coalesced
+        else:
+            result = await self._complete(
+                messages, model, temperature, max_tokens, task_type, context_length, priority, deadline
+            )
+            shared = False
+        
+        if shared:
+            # Only the leader is billed for the provider call
+            return {**result, "cached": True}
         
+        if cache_key is not None and settings.AI_CACHE_ENABLED:
+            await self.cache.set(cache_key, result)
+        
+        return {**result, "cached": False}
+    
+    def _use_cascade(self, task_type: str, cascade: Optional[bool]) -> bool:
+        if cascade is not None:
+            return cascade
+        return settings.AI_CASCADE_ENABLED and task_type in settings.AI_CASCADE_TASK_TYPES
+    
+    def _pick_cascade_model(self, strong_model: AIModel, context_length: int) -> Optional[AIModel]:
+        """First configured cascade model that is available, fits and is cheaper than ``strong_model``"""
+        strong = self.model_capabilities[strong_model]
+        for name in settings.AI_CASCADE_MODELS:
+            model = AIModel(name)
+            cap = self.model_capabilities.get(model)
+            if (
+                cap
+                and model != strong_model
+                and context_length <= cap["context_window"]
+                and self._is_provider_available(cap["provider"])
+                and cap["cost_per_1k_output"] < strong["cost_per_1k_output"]
+            ):
+                return model
+        return None
+    
+    async def _generate_cascade(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: Optional[int],
+        task_type: str,
+        use_cache: bool,
+        priority: Priority,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """
+        Try a cheap model, escalating to the task's usual model when the
+        answer fails the AI_CASCADE_CHECKS acceptance checks (or the call fails).
+
+        The result carries a ``cascade`` record: both models, whether it
+        escalated and why, the cheap model's self-reported confidence and the
+        estimated savings in cents (negative when the cheap call was wasted).
+        A rejected cheap call is billed through ``cascade_usage``. If the
+        deadline leaves no time to escalate, the cheap answer is returned.
+        """
+        context_length = self.count_context_tokens(messages, max_tokens)
+        strong_model = self.select_best_model(task_type, context_length)
+        cheap_model = self._pick_cascade_model(strong_model, context_length)
+        if cheap_model is None:
+            return await self.generate_completion(
+                messages, strong_model, temperature, max_tokens, task_type, use_cache, priority, deadline=deadline
+            )
+        
+        checks = settings.AI_CASCADE_CHECKS
+        cheap_messages = messages
+        if "confidence" in checks:
+            cheap_messages = [{"role": "system", "content": CONFIDENCE_INSTRUCTION}] + messages
+        
+        self.cascade_stats["attempted"] += 1
+        cheap = None
+        confidence = None
         try:
-            if provider == AIProvider.OPENAI:
-                return await self._openai_completion(messages, model, temperature, max_tokens)
-            elif provider == AIProvider.ANTHROPIC:
-                return await self._anthropic_completion(messages, model, temperature, max_tokens)
-            elif provider == AIProvider.GOOGLE:
-                return await self._google_completion(messages, model, temperature, max_tokens)
+            cheap = await self.generate_completion(
+                cheap_messages, cheap_model, temperature, max_tokens, task_type, use_cache, priority, deadline=deadline
+            )
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"Cascade model {cheap_model} failed, escalating: {str(e)}")
+            rejection = "error"
+        else:
+            confidence, content = extract_confidence(cheap["content"])
+            cheap = {**cheap, "content": content}
+            rejection = run_acceptance_checks(messages, {**cheap, "confidence": confidence}, checks)
+        
+        cheap_cost = self.calculate_response_cost(cheap) if cheap else 0
+        record = {
+            "cheap_model": cheap["model"] if cheap else cheap_model.value,
+            "strong_model": strong_model.value,
+            "confidence": confidence
+        }
+        
+        out_of_time = (
+            deadline is not None
+            and deadline.remaining() < settings.AI_DEADLINE_MIN_FALLBACK_SECONDS
+        )
+        if rejection is not None and cheap is not None and out_of_time:
+            logger.warning(f"Cascade answer rejected ({rejection}) but no time left to escalate")
+        
+        if rejection is None or (cheap is not None and out_of_time):
+            savings = round(self.calculate_cost(strong_model, cheap["usage"]) - cheap_cost, 2)
+            self.cascade_stats["accepted"] += 1
+            self.cascade_stats["savings"] += savings
+            return {**cheap, "cascade": {**record, "escalated": False, "reason": rejection, "savings": savings}}
+        
+        strong = await self.generate_completion(
+            messages, strong_model, temperature, max_tokens, task_type, use_cache, priority, deadline=deadline
+        )
+        self.cascade_stats["escalated"] += 1
+        self.cascade_stats["savings"] -= cheap_cost
+        result = {
+            **strong,
+            "cascade": {**record, "escalated": True, "reason": rejection, "savings": -cheap_cost}
+        }
+        if cheap is not None and not cheap.get("cached"):
+            result["cascade_usage"] = [
+                {"model": cheap["model"], "usage": cheap["usage"]}
+            ] + cheap.get("auxiliary_usage", [])
+        return result
+    
+    def get_cascade_stats(self) -> Dict[str, Any]:
+        attempted = self.cascade_stats["attempted"]
+        return {
+            **self.cascade_stats,
+            "savings": round(self.cascade_stats["savings"] / 100, 4),  # In dollars
+            "acceptance_rate": round(self.cascade_stats["accepted"] / attempted, 4) if attempted else 0.0
+        }
+    
+    async def _complete_with_fallback(
+        self,
+        messages: List[Dict[str, str]],
+        model: AIModel,
+        temperature: float,
+        max_tokens: Optional[int],
+        task_type: str = "general",
+        context_length: int = 0,
+        priority: Priority = Priority.NORMAL,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """
+        Call the model's provider, falling back to other models on error.
+
+        Fallbacks skip providers that already failed for this request and
+        providers whose circuit is open, so a brown-out costs at most one
+        timeout instead of one per attempt. With a deadline, a fallback is
+        only started while enough budget remains, and exhausting the budget
+        ends the request.
+        """
+        fallbacks = self.get_fallback_models(model, task_type, context_length)
+        attempts = [model] + fallbacks[:settings.AI_MAX_FALLBACK_ATTEMPTS]
+        failed_providers = set()
+        last_error: Optional[Exception] = None
+        
+        for candidate in attempts:
+            provider = self.model_capabilities[candidate]["provider"]
+            if provider in failed_providers:
+                continue
+            if candidate != model:
+                if deadline is not None and deadline.remaining() < settings.AI_DEADLINE_MIN_FALLBACK_SECONDS:
+                    logger.warning(f"Not falling back to {candidate}: {deadline.remaining():.1f}s of budget left")
+                    break
+                logger.info(f"Falling back to {candidate}")
+            try:
+                return await self._call_provider(messages, candidate, temperature, max_tokens, priority, deadline)
+            except DeadlineExceeded as e:
+                logger.warning(f"Timed out on {candidate}: {str(e)}")
+                raise
+            except (CircuitOpenError, AdmissionTimeoutError) as e:
+                logger.warning(str(e))
+                last_error = e
+            except Exception as e:
+                if self._is_timeout(e):
+                    logger.warning(f"Timeout from {provider}: {str(e)}")
+                else:
+                    logger.error(f"Error with {provider}: {str(e)}")
+                last_error = e
+            failed_providers.add(provider)
+        
+        raise last_error
+    
+    async def _call_provider(
+        self,
+        messages: List[Dict[str, str]],
+        model: AIModel,
+        temperature: float,
+        max_tokens: Optional[int],
+        priority: Priority = Priority.NORMAL,
+        deadline: Optional[Deadline] = None,
+        on_dispatch: Optional[Callable[[], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Call the provider for ``model`` once rate-limit capacity is admitted, through its circuit breaker.
+
+        With a deadline, the admission wait and the call itself are limited to
+        the remaining budget. Running out of budget is recorded as a timeout
+        for the model but not as a breaker failure, since it reflects the
+        caller's budget rather than provider health. ``on_dispatch`` is called
+        once the request is actually sent, after admission.
+        """
+        provider = self.model_capabilities[model]["provider"]
+        breaker = self.breakers[provider]
+        if not breaker.is_available():
+            raise CircuitOpenError(provider.value, breaker.retry_after())
+        
+        # Reserve the prompt plus the full reply budget; the unused part is returned after the call
+        reserved_tokens = self.count_context_tokens(messages, max_tokens)
+        max_wait = None
+        if deadline is not None:
+            deadline.check(f"{model.value} admission")
+            max_wait = deadline.cap(settings.AI_ADMISSION_MAX_WAIT_SECONDS)
+        await self.rate_limiter.acquire(model.value, reserved_tokens, priority, max_wait)
+        
+        if not breaker.try_acquire():
+            raise CircuitOpenError(provider.value, breaker.retry_after())
+        
+        if on_dispatch is not None:
+            on_dispatch()
+        started = time.perf_counter()
+        call = self._dispatch_completion(provider, messages, model, temperature, max_tokens)
+        try:
+            if deadline is not None:
+                result = await deadline.run(call, f"{model.value} completion")
             else:
-                raise ValueError(f"Unsupported provider: {provider}")
+                result = await call
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except DeadlineExceeded:
+            breaker.release()
+            self.model_stats[model].record_timeout()
+            raise
         except Exception as e:
-            logger.error(f"Error with {provider}: {str(e)}")
-            # Try fallback model
-            fallback_model = AIModel.GPT_35_TURBO if model != AIModel.GPT_35_TURBO else AIModel.GEMINI_PRO
-            if fallback_model != model and self._is_provider_available(self.model_capabilities[fallback_model]["provider"]):
-                logger.info(f"Falling back to {fallback_model}")
-                return await self.generate_completion(messages, fallback_model, temperature, max_tokens, task_type)
+            breaker.record_failure()
+            if self._is_timeout(e):
+                self.model_stats[model].record_timeout()
+            else:
+                self.model_stats[model].record_failure()
             raise
+        
+        latency = time.perf_counter() - started
+        breaker.record_success(latency)
+        self.model_stats[model].record_success(latency, result["usage"]["completion_tokens"])
+        self.rate_limiter.settle(model.value, reserved_tokens, result["usage"]["total_tokens"])
+        return result
+    
+    @staticmethod
+    def _is_timeout(error: Exception) -> bool:
+        """Whether a provider call failed by timing out rather than with an error response"""
+        return (
+            isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException))
+            or type(error).__name__ == "APITimeoutError"  # openai / anthropic SDKs
+        )
+    
+    async def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: AIModel,
+        temperature: float,
+        max_tokens: Optional[int],
+        task_type: str,
+        context_length: int,
+        priority: Priority = Priority.NORMAL,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """Complete with fallbacks, hedging latency-sensitive task types when enabled"""
+        hedge_model = None
+        if settings.AI_HEDGE_ENABLED and task_type in settings.AI_HEDGE_TASK_TYPES:
+            hedge_model = self._pick_hedge_model(model, task_type, context_length)
+        
+        if hedge_model is None:
+            return await self._complete_with_fallback(
+                messages, model, temperature, max_tokens, task_type, context_length, priority, deadline
+            )
+        
+        return await self._complete_hedged(
+            messages, model, hedge_model, temperature, max_tokens, task_type, context_length, priority, deadline
+        )
+    
+    def _pick_hedge_model(self, model: AIModel, task_type: str, context_length: int) -> Optional[AIModel]:
+        """First model in the task's list served by a different, available provider"""
+        primary_provider = self.model_capabilities[model]["provider"]
+        for candidate in self.task_model_map.get(task_type, []):
+            cap = self.model_capabilities.get(candidate)
+            if (
+                cap
+                and cap["provider"] != primary_provider
+                and context_length <= cap["context_window"]
+                and self._is_provider_available(cap["provider"])
+                and self.rate_limiter.time_until_capacity(candidate.value, context_length) == 0
+            ):
+                return candidate
+        return None
+    
+    def _hedge_delay(self, model: AIModel) -> float:
+        """Seconds to wait on the primary before hedging: its latency percentile, or a default until warmed up"""
+        tracker = self.model_stats[model]
+        delay = None
+        if tracker.count >= settings.AI_HEDGE_MIN_SAMPLES:
+            delay = tracker.percentile(settings.AI_HEDGE_PERCENTILE)
+        if delay is None:
+            delay = settings.AI_HEDGE_DEFAULT_DELAY_MS / 1000
+        return max(delay, settings.AI_HEDGE_MIN_DELAY_MS / 1000)
+    
+    def _reserve_hedge(self) -> Optional[float]:
+        """
+        Reserve a hedge under the AI_HEDGE_MAX_RATE cap of eligible requests
+        over a one-minute window. Returns the reservation, or None if the cap
+        is reached.
+        """
+        now = time.monotonic()
+        self._trim_hedge_window(now)
+        if len(self._hedges_sent) + 1 > settings.AI_HEDGE_MAX_RATE * len(self._hedge_eligible):
+            return None
+        self._hedges_sent.append(now)
+        return now
+    
+    def _trim_hedge_window(self, now: float) -> None:
+        """Drop hedge-cap events older than the one-minute window"""
+        for events in (self._hedge_eligible, self._hedges_sent):
+            while events and now - events[0] > 60:
+                events.popleft()
+    
+    def _release_hedge(self, reserved_at: float) -> None:
+        """Return a reservation for a hedge that was never sent"""
+        try:
+            self._hedges_sent.remove(reserved_at)
+        except ValueError:
+            pass  # Already aged out of the window
+    
+    async def _complete_hedged(
+        self,
+        messages: List[Dict[str, str]],
+        model: AIModel,
+        hedge_model: AIModel,
+        temperature: float,
+        max_tokens: Optional[int],
+        task_type: str,
+        context_length: int,
+        priority: Priority = Priority.NORMAL,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """
+        Race the primary against a delayed hedge on another provider.
+
+        The hedge is only sent if the primary is still running after the hedge
+        delay and the hedge rate cap allows it. The first successful response
+        wins and the other call is cancelled; the loser's prompt tokens are
+        reported under ``auxiliary_usage`` so both calls are billed. A hedge
+        cancelled while still waiting for admission was never sent, so it is
+        neither billed nor counted against the cap.
+        """
+        now = time.monotonic()
+        self._trim_hedge_window(now)
+        self._hedge_eligible.append(now)
+        primary = asyncio.create_task(
+            self._complete_with_fallback(
+                messages, model, temperature, max_tokens, task_type, context_length, priority, deadline
+            )
+        )
+        hedge = None
+        hedge_reserved_at = None
+        hedge_sent = False
+        
+        def mark_hedge_sent() -> None:
+            nonlocal hedge_sent
+            hedge_sent = True
+        
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self._hedge_delay(model))
+            if done:
+                return await primary
+            hedge_reserved_at = self._reserve_hedge()
+            if hedge_reserved_at is None:
+                return await primary
+            
+            logger.info(f"Hedging {model} with {hedge_model}")
+            hedge = asyncio.create_task(
+                self._call_provider(
+                    messages, hedge_model, temperature, max_tokens, priority, deadline, on_dispatch=mark_hedge_sent
+                )
+            )
+            pending = {primary, hedge}
+            winner = None
+            first_error: Optional[BaseException] = None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    if task.exception() is None:
+                        winner = task
+                        break
+                    first_error = first_error or task.exception()
+            
+            if winner is None:
+                raise first_error or asyncio.CancelledError()
+            
+            loser, loser_model = (hedge, hedge_model) if winner is primary else (primary, model)
+            result = winner.result()
+            if loser is hedge and not hedge_sent:
+                # Still waiting for admission; nothing was sent to the provider
+                return result
+            if not loser.done():
+                loser.cancel()
+                # The cancelled call has still been billed for its prompt
+                auxiliary_usage = [{
+                    "model": loser_model.value,
+                    "usage": self._estimate_usage(messages, "", loser_model),
+                    "reason": "hedge"
+                }]
+            elif loser.cancelled() or loser.exception() is not None:
+                auxiliary_usage = []
+            else:
+                auxiliary_usage = [{
+                    "model": loser.result()["model"],
+                    "usage": loser.result()["usage"],
+                    "reason": "hedge"
+                }]
+            
+            return {
+                **result,
+                "hedged": True,
+                "auxiliary_usage": result.get("auxiliary_usage", []) + auxiliary_usage
+            }
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+            if hedge_reserved_at is not None and not hedge_sent:
+                self._release_hedge(hedge_reserved_at)
+    
+    async def _dispatch_completion(
+        self,
+        provider: AIProvider,
+        messages: List[Dict[str, str]],
+        model: AIModel,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> Dict[str, Any]:
+        """Call the provider's registered backend"""
+        backend = self.providers.get(provider.value)
+        if backend is None:
+            raise ValueError(f"Unsupported provider: {provider}")
+        return await backend.complete(messages, model, temperature, max_tokens)
+    
+    async def stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[AIModel] = None,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        task_type: str = "general",
+        priority: Optional[Priority] = None,
+        slo: Optional[RoutingSLO] = None,
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a completion as it is generated.
+
+        Yields ``{"type": "delta", "content": ...}`` events as provider chunks
+        arrive, followed by a single ``{"type": "done", ...}`` event carrying the
+        assembled content, model, provider and usage (same shape as
+        ``generate_completion``). With a ``deadline``, every wait for the next
+        chunk is limited to the remaining budget and fallbacks follow the same
+        budget rules as ``generate_completion``.
+        """
+        if priority is None:
+            priority = priority_for_task(task_type)
+        
+        # Tokens the request needs from the context window: prompt plus reply budget
+        context_length = self.count_context_tokens(messages, max_tokens)
+        
+        # Select model if not specified
+        if not model:
+            model = self.select_best_model(task_type, context_length, slo=slo, reply_tokens=max_tokens)
+        
+        capabilities = self.model_capabilities.get(model)
+        if not capabilities:
+            raise ValueError(f"Unknown model: {model}")
+        
+        fallbacks = self.get_fallback_models(model, task_type, context_length)
+        attempts = [model] + fallbacks[:settings.AI_MAX_FALLBACK_ATTEMPTS]
+        failed_providers = set()
+        last_error: Optional[Exception] = None
+        
+        for candidate in attempts:
+            provider = self.model_capabilities[candidate]["provider"]
+            if provider in failed_providers:
+                continue
+            if candidate != model:
+                if deadline is not None and deadline.remaining() < settings.AI_DEADLINE_MIN_FALLBACK_SECONDS:
+                    logger.warning(f"Not falling back to {candidate} for stream: {deadline.remaining():.1f}s of budget left")
+                    break
+                logger.info(f"Falling back to {candidate} for stream")
+            
+            breaker = self.breakers[provider]
+            try:
+                if not breaker.is_available():
+                    raise CircuitOpenError(provider.value, breaker.retry_after())
+                max_wait = None
+                if deadline is not None:
+                    deadline.check(f"{candidate.value} admission")
+                    max_wait = deadline.cap(settings.AI_ADMISSION_MAX_WAIT_SECONDS)
+                await self.rate_limiter.acquire(candidate.value, context_length, priority, max_wait)
+                if not breaker.try_acquire():
+                    raise CircuitOpenError(provider.value, breaker.retry_after())
+            except (CircuitOpenError, AdmissionTimeoutError) as e:
+                logger.warning(str(e))
+                last_error = e
+                failed_providers.add(provider)
+                continue
+            
+            backend = self.providers.get(provider.value)
+            if backend is None:
+                breaker.release()
+                raise ValueError(f"Unsupported provider: {provider}")
+            stream = self._stream_within(
+                backend.stream(messages, candidate, temperature, max_tokens),
+                deadline,
+                f"{candidate.value} stream"
+            )
+            
+            started = time.perf_counter()
+            first_token_latency = None
+            event = None
+            try:
+                async for event in stream:
+                    if event["type"] == "delta" and first_token_latency is None:
+                        first_token_latency = time.perf_counter() - started
+                    yield event
+            except (asyncio.CancelledError, GeneratorExit):
+                breaker.release()
+                raise
+            except DeadlineExceeded as e:
+                breaker.release()
+                self.model_stats[candidate].record_timeout()
+                logger.warning(f"Timed out streaming from {candidate}: {str(e)}")
+                raise
+            except Exception as e:
+                breaker.record_failure()
+                if self._is_timeout(e):
+                    self.model_stats[candidate].record_timeout()
+                    logger.warning(f"Streaming timeout from {provider}: {str(e)}")
+                else:
+                    self.model_stats[candidate].record_failure()
+                    logger.error(f"Streaming error with {provider}: {str(e)}")
+                # Once tokens have reached the client we cannot switch models
+                # without producing a spliced answer, so only fall back before that.
+                if first_token_latency is not None:
+                    raise
+                last_error = e
+                failed_providers.add(provider)
+                continue
+            
+            # For streams the breaker's latency signal is time to first token
+            breaker.record_success(
+                first_token_latency if first_token_latency is not None else time.perf_counter() - started
+            )
+            if event is not None and event["type"] == "done":
+                # Model stats use the whole generation time, comparable with non-streamed calls
+                self.model_stats[candidate].record_success(
+                    time.perf_counter() - started,
+                    event["usage"]["completion_tokens"]
+                )
+                self.rate_limiter.settle(candidate.value, context_length, event["usage"]["total_tokens"])
+            return
+        
+        raise last_error
+    
+    @staticmethod
+    async def _stream_within(
+        stream: AsyncIterator[Dict[str, Any]],
+        deadline: Optional[Deadline],
+        stage: str
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Re-yield ``stream``, waiting for each event no longer than the deadline allows"""
+        if deadline is None:
+            async for event in stream:
+                yield event
+            return
+        
+        try:
+            while True:
+                try:
+                    event = await deadline.run(stream.__anext__(), stage)
+                except StopAsyncIteration:
+                    return
+                yield event
+        finally:
+            await stream.aclose()
     
     async def _openai_completion(
         self,
@@ -202,13 +1137,13 @@ class AIRouter:
         if not self.anthropic_client:
             raise ValueError("Anthropic client not configured")
         
-        # Convert messages format
-        system_message = None
+        # Convert messages format (Claude takes a single system prompt)
+        system_parts = []
         claude_messages = []
         
         for msg in messages:
             if msg["role"] == "system":
-                system_message = msg["content"]
+                system_parts.append(msg["content"])
             else:
                 claude_messages.append({
                     "role": msg["role"],
@@ -218,7 +1153,7 @@ class AIRouter:
         response = await self.anthropic_client.messages.create(
             model=model.value,
             messages=claude_messages,
-            system=system_message,
+            system="\n\n".join(system_parts) or None,
             temperature=temperature,
             max_tokens=max_tokens or settings.AI_MAX_TOKENS
         )
@@ -245,26 +1180,27 @@ class AIRouter:
         if not self.google_client:
             raise ValueError("Google client not configured")
         
-        # Convert messages to Gemini format
-        gemini_model = genai.GenerativeModel(model.value)
-        
-        # Combine messages into a single prompt
-        prompt_parts = []
-        for msg in messages:
-            role = "User" if msg["role"] == "user" else "Assistant"
-            prompt_parts.append(f"{role}: {msg['content']}")
+        gemini_model = self._get_gemini_model(model)
         
-        prompt = "\n\n".join(prompt_parts)
+        prompt = self._gemini_prompt(messages)
+        generation_config = genai.types.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens or settings.AI_MAX_TOKENS
+        )
         
         # Generate response
-        response = await asyncio.to_thread(
-            gemini_model.generate_content,
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=temperature,
-                max_output_tokens=max_tokens or settings.AI_MAX_TOKENS
+        if hasattr(gemini_model, "generate_content_async"):
+            response = await gemini_model.generate_content_async(
+                prompt,
+                generation_config=generation_config
+            )
+        else:
+            # Sync-only SDK: run on Gemini's own bounded pool, not the shared default executor
+            response = await self.google_executor.run(
+                gemini_model.generate_content,
+                prompt,
+                generation_config=generation_config
             )
-        )
         
         return {
             "content": response.text,
@@ -277,16 +1213,261 @@ class AIRouter:
             }
         }
     
-    def calculate_cost(self, model: AIModel, usage: Dict[str, int]) -> float:
-        """Calculate the cost of an AI request in cents"""
+    async def _openai_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: AIModel,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream completion deltas from OpenAI"""
+        if not self.openai_client:
+            raise ValueError("OpenAI client not configured")
+        
+        stream = await self.openai_client.chat.completions.create(
+            model=model.value,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens or settings.AI_MAX_TOKENS,
+            stream=True
+        )
+        
+        parts = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield {"type": "delta", "content": delta}
+        
+        content = "".join(parts)
+        # The streaming API does not report usage, so estimate it
+        yield {
+            "type": "done",
+            "content": content,
+            "model": model.value,
+            "provider": AIProvider.OPENAI,
+            "usage": self._estimate_usage(messages, content, model)
+        }
+    
+    async def _anthropic_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: AIModel,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream completion deltas from Anthropic"""
+        if not self.anthropic_client:
+            raise ValueError("Anthropic client not configured")
+        
+        # Convert messages format (Claude takes a single system prompt)
+        system_parts = []
+        claude_messages = []
+        
+        for msg in messages:
+            if msg["role"] == "system":
+                system_parts.append(msg["content"])
+            else:
+                claude_messages.append({
+                    "role": msg["role"],
+                    "content": msg["content"]
+                })
+        
+        parts = []
+        async with self.anthropic_client.messages.stream(
+            model=model.value,
+            messages=claude_messages,
+            system="\n\n".join(system_parts) or None,
+            temperature=temperature,
+            max_tokens=max_tokens or settings.AI_MAX_TOKENS
+        ) as stream:
+            async for text in stream.text_stream:
+                if text:
+                    parts.append(text)
+                    yield {"type": "delta", "content": text}
+            
+            final_message = await stream.get_final_message()
+        
+        yield {
+            "type": "done",
+            "content": "".join(parts),
+            "model": model.value,
+            "provider": AIProvider.ANTHROPIC,
+            "usage": {
+                "prompt_tokens": final_message.usage.input_tokens,
+                "completion_tokens": final_message.usage.output_tokens,
+                "total_tokens": final_message.usage.input_tokens + final_message.usage.output_tokens
+            }
+        }
+    
+    async def _google_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: AIModel,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream completion deltas from Google Gemini"""
+        if not self.google_client:
+            raise ValueError("Google client not configured")
+        
+        gemini_model = self._get_gemini_model(model)
+        
+        prompt = self._gemini_prompt(messages)
+        
+        response = await gemini_model.generate_content_async(
+            prompt,
+            generation_config=genai.types.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_tokens or settings.AI_MAX_TOKENS
+            ),
+            stream=True
+        )
+        
+        parts = []
+        async for chunk in response:
+            text = chunk.text
+            if text:
+                parts.append(text)
+                yield {"type": "delta", "content": text}
+        
+        content = "".join(parts)
+        usage_metadata = getattr(response, "usage_metadata", None)
+        if usage_metadata:
+            usage = {
+                "prompt_tokens": usage_metadata.prompt_token_count,
+                "completion_tokens": usage_metadata.candidates_token_count,
+                "total_tokens": usage_metadata.total_token_count
+            }
+        else:
+            usage = self._estimate_usage(messages, content, model)
+        
+        yield {
+            "type": "done",
+            "content": content,
+            "model": model.value,
+            "provider": AIProvider.GOOGLE,
+            "usage": usage
+        }
+    
+    def _estimate_usage(
+        self,
+        messages: List[Dict[str, str]],
+        content: str,
+        model: AIModel
+    ) -> Dict[str, int]:
+        """Token usage estimate for calls whose provider did not report usage"""
+        family = self.model_capabilities[model]["provider"].value
+        prompt_tokens = self.token_counter.count_messages(messages, family)
+        completion_tokens = self.token_counter.count(content, family)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    
+    def count_message_tokens(self, message: Dict[str, str]) -> int:
+        """
+        Tokens a single chat message occupies, including formatting overhead.
+
+        Uses the largest count across provider families so the result is safe
+        to compare against any model's ``context_window``.
+        """
+        content = message.get("content", "")
+        return max(
+            self.token_counter.count(content, provider.value)
+            for provider in AIProvider
+        ) + TOKENS_PER_MESSAGE
+    
+    def count_context_tokens(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: Optional[int] = None
+    ) -> int:
+        """Context window tokens a request needs: prompt tokens plus the reply budget"""
+        prompt_tokens = sum(self.count_message_tokens(msg) for msg in messages) + TOKENS_PER_REPLY
+        return prompt_tokens + (max_tokens or settings.AI_MAX_TOKENS)
+    
+    def resolve_model(self, model_name: Optional[str], task_type: str = "general") -> AIModel:
+        """The model a request will be routed to: the requested one or the best for the task"""
+        if model_name:
+            return AIModel(model_name)
+        return self.select_best_model(task_type)
+    
+    def get_history_budget(self, model: AIModel, max_tokens: Optional[int] = None) -> int:
+        """Prompt tokens available on ``model`` once the reply budget and safety margin are reserved"""
         capabilities = self.model_capabilities.get(model)
         if not capabilities:
+            raise ValueError(f"Unknown model: {model}")
+        
+        budget = (
+            capabilities["context_window"]
+            - (max_tokens or settings.AI_MAX_TOKENS)
+            - TOKENS_PER_REPLY
+            - settings.AI_CONTEXT_SAFETY_MARGIN_TOKENS
+        )
+        if settings.AI_CONTEXT_MAX_PROMPT_TOKENS:
+            budget = min(budget, settings.AI_CONTEXT_MAX_PROMPT_TOKENS)
+        return max(budget, 0)
+    
+    @staticmethod
+    def _gemini_prompt(messages: List[Dict[str, str]]) -> str:
+        """
+        Combine messages into a single Gemini prompt. System messages (cascade
+        confidence instruction, conversation summary) lead the prompt as
+        instructions rather than being rendered as assistant turns.
+        """
+        system_parts = [msg["content"] for msg in messages if msg["role"] == "system"]
+        turns = [
+            f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}"
+            for msg in messages
+            if msg["role"] != "system"
+        ]
+        return "\n\n".join(system_parts + turns)
+    
+    def _get_gemini_model(self, model: AIModel) -> "genai.GenerativeModel":
+        """Cached GenerativeModel instance for ``model``"""
+        gemini_model = self._gemini_models.get(model)
+        if gemini_model is None:
+            gemini_model = genai.GenerativeModel(model.value)
+            self._gemini_models[model] = gemini_model
+        return gemini_model
+    
+    def calculate_cost(self, model: AIModel, usage: Dict[str, int], cached: bool = False) -> float:
+        """Calculate the cost of an AI request in cents. Cache hits are free."""
+        capabilities = self.model_capabilities.get(model)
+        if not capabilities or cached:
             return 0
         
         input_cost = (usage["prompt_tokens"] / 1000) * capabilities["cost_per_1k_input"]
         output_cost = (usage["completion_tokens"] / 1000) * capabilities["cost_per_1k_output"]
         
         return round((input_cost + output_cost) * 100, 2)  # Convert to cents
+    
+    def calculate_response_cost(self, response: Dict[str, Any]) -> float:
+        """
+        Total cost in cents of a ``generate_completion`` result, including
+        auxiliary provider calls (e.g. a cancelled hedge or a rejected cascade
+        attempt) made to produce it
+        """
+        cost = 0
+        if not response.get("cached"):
+            cost += self.calculate_cost(AIModel(response["model"]), response["usage"])
+            for call in response.get("auxiliary_usage", []):
+                cost += self.calculate_cost(AIModel(call["model"]), call["usage"])
+        # A rejected cheap attempt was paid for even if the final answer came from cache
+        for call in response.get("cascade_usage", []):
+            cost += self.calculate_cost(AIModel(call["model"]), call["usage"])
+        return round(cost, 2)
+    
+    @staticmethod
+    def completion_metadata(response: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Per-message metadata worth persisting for a completion (currently the cascade record)"""
+        if response.get("cascade"):
+            return {"cascade": response["cascade"]}
+        return None
 
 
 # Singleton instance
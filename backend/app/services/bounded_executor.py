@@ -0,0 +1,82 @@
+"""
+Dedicated, bounded thread pool for blocking SDK calls
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorQueueFullError(Exception):
+    """Raised when a call would exceed the executor's queue bound"""
+
+
+class BoundedExecutor:
+    """
+    Runs blocking callables on a private thread pool.
+
+    Keeping a provider's blocking calls off the event loop's default executor
+    means a slow provider can only exhaust its own threads. At most
+    ``max_workers`` calls run at once and at most ``max_queue`` wait; further
+    calls fail fast with ``ExecutorQueueFullError``.
+    """
+
+    def __init__(self, name: str, max_workers: int = 8, max_queue: int = 64):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if self.active + self.queued >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise ExecutorQueueFullError(f"{self.name} executor queue is full")
+
+        loop = asyncio.get_running_loop()
+        self.queued += 1
+        started = False
+
+        def call() -> Any:
+            nonlocal started
+            started = True
+            self.queued -= 1
+            self.active += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.active -= 1
+
+        try:
+            result = await loop.run_in_executor(self._pool, call)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            if not started:
+                # Cancelled before a worker picked it up
+                self.queued -= 1
+
+        self.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
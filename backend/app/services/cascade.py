@@ -0,0 +1,97 @@
+"""
+Acceptance checks for cascade routing (cheap model first, escalate on failure)
+"""
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+# A check returns the reason to reject a cheap model's answer, or None to accept it
+AcceptanceCheck = Callable[[List[Dict[str, str]], Dict[str, Any]], Optional[str]]
+
+CONFIDENCE_INSTRUCTION = (
+    "After your answer, on a final line of its own, write 'Confidence: N' where N is "
+    "0-100 and reflects how likely your answer is complete and correct."
+)
+
+_CONFIDENCE_LINE = re.compile(r"\n?\s*confidence:\s*(\d{1,3})\s*%?\s*$", re.IGNORECASE)
+
+_REFUSAL_PATTERNS = re.compile(
+    r"\b(i can(?:no|')t (?:help|assist|answer|provide)|i(?: am|'m) (?:unable|not able) to|"
+    r"as an ai(?: language model)?|i do(?: not|n't) have (?:access|the ability))\b",
+    re.IGNORECASE
+)
+
+_UNCERTAINTY_PATTERNS = re.compile(
+    r"\b(i(?: am|'m) not (?:sure|certain)|i do(?: not|n't) know|it(?: is|'s) unclear|"
+    r"i cannot be certain|hard to say)\b",
+    re.IGNORECASE
+)
+
+
+def extract_confidence(content: str) -> Tuple[Optional[int], str]:
+    """Split a trailing ``Confidence: N`` line off an answer; returns (confidence or None, answer)"""
+    match = _CONFIDENCE_LINE.search(content)
+    if not match:
+        return None, content
+    return min(int(match.group(1)), 100), content[:match.start()].rstrip()
+
+
+def length_check(messages: List[Dict[str, str]], response: Dict[str, Any]) -> Optional[str]:
+    """Reject empty or very short answers"""
+    if len(response["content"].strip()) < settings.AI_CASCADE_MIN_ANSWER_CHARS:
+        return "too_short"
+    return None
+
+
+def refusal_check(messages: List[Dict[str, str]], response: Dict[str, Any]) -> Optional[str]:
+    """Reject answers that decline the request"""
+    if _REFUSAL_PATTERNS.search(response["content"][:500]):
+        return "refusal"
+    return None
+
+
+def uncertainty_check(messages: List[Dict[str, str]], response: Dict[str, Any]) -> Optional[str]:
+    """Reject answers that hedge about their own correctness"""
+    if _UNCERTAINTY_PATTERNS.search(response["content"]):
+        return "uncertain"
+    return None
+
+
+def confidence_check(messages: List[Dict[str, str]], response: Dict[str, Any]) -> Optional[str]:
+    """Reject answers whose self-reported confidence is missing or below AI_CASCADE_MIN_CONFIDENCE"""
+    confidence = response.get("confidence")
+    if confidence is None:
+        return "no_confidence"
+    if confidence < settings.AI_CASCADE_MIN_CONFIDENCE:
+        return "low_confidence"
+    return None
+
+
+acceptance_checks: Dict[str, AcceptanceCheck] = {
+    "length": length_check,
+    "refusal": refusal_check,
+    "uncertainty": uncertainty_check,
+    "confidence": confidence_check
+}
+
+
+def register_acceptance_check(name: str, check: AcceptanceCheck) -> None:
+    """Make a custom check available to AI_CASCADE_CHECKS"""
+    acceptance_checks[name] = check
+
+
+def run_acceptance_checks(
+    messages: List[Dict[str, str]],
+    response: Dict[str, Any],
+    names: List[str]
+) -> Optional[str]:
+    """First rejection reason from the named checks, or None if the answer is accepted"""
+    for name in names:
+        check = acceptance_checks.get(name)
+        if check is None:
+            raise ValueError(f"Unknown cascade acceptance check: {name}")
+        reason = check(messages, response)
+        if reason:
+            return f"{name}:{reason}"
+    return None
@@ -0,0 +1,166 @@
+"""
+Circuit breaker for AI provider calls
+"""
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the provider's circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit open for {name}, retry in {retry_after:.1f}s")
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker driven by error rate and slow-call rate.
+
+    Outcomes are kept in a rolling time window. Once at least ``min_calls``
+    outcomes are recorded, the circuit opens when either the failure rate or
+    the rate of calls slower than ``slow_call_seconds`` crosses its threshold.
+    After ``open_seconds`` the circuit lets ``half_open_max_calls`` probe
+    calls through; a clean probe closes it again, anything else re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = 60.0,
+        min_calls: int = 5,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 20.0,
+        slow_call_rate_threshold: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = CircuitState.CLOSED
+        self._opened_at: Optional[float] = None
+        self._half_open_in_flight = 0
+        # (timestamp, failed, slow)
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()
+        self.times_opened = 0
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state, moving from open to half-open once the cool-down has elapsed"""
+        if self._state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = CircuitState.HALF_OPEN
+            self._half_open_in_flight = 0
+            logger.info(f"Circuit for {self.name} is half-open")
+        return self._state
+
+    def is_available(self) -> bool:
+        """Whether a call would currently be allowed (does not reserve a probe slot)"""
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+        if state == CircuitState.HALF_OPEN:
+            return self._half_open_in_flight < self.half_open_max_calls
+        return False
+
+    def try_acquire(self) -> bool:
+        """Reserve permission for one call"""
+        if not self.is_available():
+            return False
+        if self._state == CircuitState.HALF_OPEN:
+            self._half_open_in_flight += 1
+        return True
+
+    def release(self) -> None:
+        """Give back a reservation without recording an outcome (e.g. on cancellation)"""
+        if self._state == CircuitState.HALF_OPEN and self._half_open_in_flight > 0:
+            self._half_open_in_flight -= 1
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit will accept probe calls again"""
+        if self._state != CircuitState.OPEN:
+            return 0.0
+        return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def record_success(self, latency_seconds: float) -> None:
+        slow = latency_seconds >= self.slow_call_seconds
+        self._record(failed=False, slow=slow)
+
+    def record_failure(self) -> None:
+        self._record(failed=True, slow=False)
+
+    def _record(self, failed: bool, slow: bool) -> None:
+        now = time.monotonic()
+
+        if self._state == CircuitState.HALF_OPEN:
+            self.release()
+            if failed or slow:
+                self._open(now)
+            else:
+                self._close()
+            return
+
+        self._outcomes.append((now, failed, slow))
+        self._trim(now)
+
+        if self._state == CircuitState.CLOSED and len(self._outcomes) >= self.min_calls:
+            failure_rate, slow_rate = self._rates()
+            if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+                self._open(now)
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _rates(self) -> Tuple[float, float]:
+        total = len(self._outcomes)
+        if not total:
+            return 0.0, 0.0
+        failures = sum(1 for _, failed, _ in self._outcomes if failed)
+        slow = sum(1 for _, _, is_slow in self._outcomes if is_slow)
+        return failures / total, slow / total
+
+    def _open(self, now: float) -> None:
+        if self._state != CircuitState.OPEN:
+            logger.warning(f"Circuit for {self.name} opened")
+            self.times_opened += 1
+        self._state = CircuitState.OPEN
+        self._opened_at = now
+        self._half_open_in_flight = 0
+
+    def _close(self) -> None:
+        logger.info(f"Circuit for {self.name} closed")
+        self._state = CircuitState.CLOSED
+        self._opened_at = None
+        self._outcomes.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Breaker state for monitoring"""
+        self._trim(time.monotonic())
+        failure_rate, slow_rate = self._rates()
+        return {
+            "state": self.state.value,
+            "calls_in_window": len(self._outcomes),
+            "failure_rate": round(failure_rate, 4),
+            "slow_call_rate": round(slow_rate, 4),
+            "retry_after": round(self.retry_after(), 1),
+            "times_opened": self.times_opened
+        }
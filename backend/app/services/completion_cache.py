@@ -0,0 +1,143 @@
+"""
+Two-tier completion cache: bounded in-process LRU in front of Redis
+"""
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CompletionCache:
+    """
+    Cache of AI completions keyed on the normalized request.
+
+    Lookups hit the in-process LRU first and fall through to Redis. Redis
+    errors are logged and treated as misses so the cache can never take the
+    completion path down.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: int = 3600,
+        redis_url: Optional[str] = None,
+        key_prefix: str = "ai:completion:"
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._redis = aioredis.from_url(redis_url, decode_responses=True) if redis_url else None
+
+        # Counters
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.redis_errors = 0
+
+    @staticmethod
+    def make_key(
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> str:
+        """Build a cache key from normalized messages and generation parameters"""
+        normalized = [
+            {
+                "role": msg.get("role", ""),
+                # Collapse whitespace so trivially different prompts share an entry
+                "content": " ".join(msg.get("content", "").split())
+            }
+            for msg in messages
+        ]
+        payload = json.dumps(
+            {
+                "messages": normalized,
+                "model": model,
+                "temperature": round(temperature, 3),
+                "max_tokens": max_tokens
+            },
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached completion or None"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(self.key_prefix + key)
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Completion cache Redis read failed: {e}")
+                raw = None
+            if raw:
+                value = json.loads(raw)
+                self._store_local(key, value)
+                self.hits += 1
+                self.redis_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a completion in both tiers"""
+        self._store_local(key, value)
+
+        if self._redis is not None:
+            try:
+                await self._redis.set(
+                    self.key_prefix + key,
+                    json.dumps(value),
+                    ex=self.ttl_seconds
+                )
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Completion cache Redis write failed: {e}")
+
+    def _store_local(self, key: str, value: Dict[str, Any]) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "local_entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "redis_enabled": self._redis is not None,
+            "redis_errors": self.redis_errors
+        }
+
+
+# Singleton instance
+completion_cache = CompletionCache(
+    max_entries=settings.AI_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AI_CACHE_TTL_SECONDS,
+    redis_url=settings.REDIS_URL if settings.AI_CACHE_REDIS_ENABLED else None
+)
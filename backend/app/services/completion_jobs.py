@@ -0,0 +1,227 @@
+"""
+Asynchronous completion jobs run by a local worker pool
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobQueueFullError(Exception):
+    """Raised when the job queue is at capacity"""
+
+
+JobHandler = Callable[[], Awaitable[Dict[str, Any]]]
+JobNotifier = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class CompletionJobManager:
+    """
+    Runs submitted completion handlers on a fixed pool of worker tasks.
+
+    Submitting only enqueues the handler and returns a job id, so the API
+    request, its DB session and its server slot are released right away.
+    Job records live in a bounded in-process store and are mirrored to Redis
+    (when enabled) so any API process can answer a poll. Redis errors are
+    logged and never fail a job.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queue: int = 1000,
+        ttl_seconds: int = 3600,
+        max_records: int = 10000,
+        redis_url: Optional[str] = None,
+        key_prefix: str = "ai:job:"
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl_seconds = ttl_seconds
+        self.max_records = max_records
+        self.key_prefix = key_prefix
+        self._redis = aioredis.from_url(redis_url, decode_responses=True) if redis_url else None
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._records: "OrderedDict[str, tuple]" = OrderedDict()
+
+        # Counters
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+        self.redis_errors = 0
+
+    def start(self) -> None:
+        """Start the worker tasks (called from the application lifespan)"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"completion-job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} completion job workers")
+
+    async def submit(
+        self,
+        owner_id: int,
+        handler: JobHandler,
+        notify: Optional[JobNotifier] = None,
+        **fields: Any
+    ) -> Dict[str, Any]:
+        """Queue a handler and return its job record. Extra fields are stored on the record."""
+        if self._queue is None:
+            raise RuntimeError("Completion job workers are not running")
+        if self._queue.full():
+            self.rejected += 1
+            raise JobQueueFullError("Completion job queue is full")
+
+        record = {
+            "job_id": uuid.uuid4().hex,
+            "owner_id": owner_id,
+            "status": JobStatus.QUEUED.value,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            **fields
+        }
+        await self._save(record)
+        self._queue.put_nowait((record, handler, notify))
+        self.submitted += 1
+        return record
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current record of a job, or None if unknown or expired"""
+        entry = self._records.get(job_id)
+        if entry is not None:
+            expires_at, record = entry
+            if expires_at > time.monotonic():
+                return record
+            del self._records[job_id]
+
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(self.key_prefix + job_id)
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Completion job Redis read failed: {e}")
+                raw = None
+            if raw:
+                return json.loads(raw)
+        return None
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            record, handler, notify = await self._queue.get()
+            try:
+                await self._run(record, handler, notify)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Completion job worker {index} error: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(
+        self,
+        record: Dict[str, Any],
+        handler: JobHandler,
+        notify: Optional[JobNotifier]
+    ) -> None:
+        record = {
+            **record,
+            "status": JobStatus.RUNNING.value,
+            "started_at": datetime.now(timezone.utc).isoformat()
+        }
+        await self._save(record)
+
+        try:
+            result = await handler()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            record = {**record, "status": JobStatus.FAILED.value, "error": str(e)}
+        else:
+            self.succeeded += 1
+            record = {**record, "status": JobStatus.SUCCEEDED.value, "result": result}
+
+        record["finished_at"] = datetime.now(timezone.utc).isoformat()
+        await self._save(record)
+
+        if notify is not None:
+            try:
+                await notify(record)
+            except Exception as e:
+                logger.warning(f"Completion job notification failed for {record['job_id']}: {e}")
+
+    async def _save(self, record: Dict[str, Any]) -> None:
+        job_id = record["job_id"]
+        self._records[job_id] = (time.monotonic() + self.ttl_seconds, record)
+        self._records.move_to_end(job_id)
+        while len(self._records) > self.max_records:
+            self._records.popitem(last=False)
+
+        if self._redis is not None:
+            try:
+                await self._redis.set(
+                    self.key_prefix + job_id,
+                    json.dumps(record),
+                    ex=self.ttl_seconds
+                )
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"Completion job Redis write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._tasks),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "records": len(self._records),
+            "redis_enabled": self._redis is not None,
+            "redis_errors": self.redis_errors
+        }
+
+    async def shutdown(self) -> None:
+        """Cancel the workers; queued and running jobs are abandoned"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+
+# Singleton instance
+completion_jobs = CompletionJobManager(
+    workers=settings.AI_JOB_WORKERS,
+    max_queue=settings.AI_JOB_MAX_QUEUE,
+    ttl_seconds=settings.AI_JOB_RESULT_TTL_SECONDS,
+    redis_url=settings.REDIS_URL if settings.AI_JOB_REDIS_ENABLED else None
+)
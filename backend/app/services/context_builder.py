@@ -0,0 +1,34 @@
+"""
+Prompt context assembly under a token budget
+"""
+from typing import Callable, Dict, List, Tuple
+
+
+def pack_history(
+    system_messages: List[Dict[str, str]],
+    history: List[Dict[str, str]],
+    budget_tokens: int,
+    count_tokens: Callable[[Dict[str, str]], int]
+) -> Tuple[List[Dict[str, str]], int]:
+    """
+    Fit the most recent history into a token budget.
+
+    System messages are always kept and charged against the budget first.
+    History (oldest first) is then taken from the newest end until the next
+    message would not fit; the newest message is always included so the
+    current turn is never dropped.
+
+    Returns the packed message list and the number of history messages dropped.
+    """
+    remaining = budget_tokens - sum(count_tokens(msg) for msg in system_messages)
+
+    kept: List[Dict[str, str]] = []
+    for msg in reversed(history):
+        tokens = count_tokens(msg)
+        if kept and tokens > remaining:
+            break
+        kept.append(msg)
+        remaining -= tokens
+
+    kept.reverse()
+    return system_messages + kept, len(history) - len(kept)
@@ -0,0 +1,65 @@
+"""
+Request deadlines propagated through AI completion calls
+"""
+import asyncio
+import time
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's time budget runs out"""
+
+    def __init__(self, stage: str, budget: float):
+        self.stage = stage
+        self.budget = budget
+        super().__init__(f"Deadline of {budget:.1f}s exceeded during {stage}")
+
+
+class Deadline:
+    """
+    Absolute point in (monotonic) time by which a request must finish.
+
+    Each step of the request takes its timeout from ``remaining()`` instead
+    of using its own fixed timeout, so retries and fallbacks can never push
+    the total past the budget.
+    """
+
+    def __init__(self, budget_seconds: float):
+        self.budget = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    def remaining(self) -> float:
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, stage: str) -> None:
+        """Raise DeadlineExceeded if the budget is already spent"""
+        if self.expired:
+            raise DeadlineExceeded(stage, self.budget)
+
+    def cap(self, timeout: Optional[float]) -> float:
+        """``timeout`` limited to the remaining budget"""
+        remaining = self.remaining()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    async def run(self, awaitable: Awaitable[T], stage: str) -> T:
+        """Await ``awaitable`` with the remaining budget as its timeout"""
+        if self.expired:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded(stage, self.budget)
+        # Runs in the current task (unlike wait_for), so async generators and
+        # SDK streams are never resumed from a different task
+        timeout = asyncio.timeout(self.remaining())
+        try:
+            async with timeout:
+                return await awaitable
+        except TimeoutError:
+            if timeout.expired():
+                raise DeadlineExceeded(stage, self.budget) from None
+            raise
@@ -0,0 +1,180 @@
+"""
+Weighted fair scheduling of AI completions across users
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from app.core.config import settings
+from app.services.rate_limiter import AdmissionTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+def weight_for_user(user: Any) -> float:
+    """
+    Scheduling weight for a user.
+
+    Users have no billing plan yet, so superusers map to the "staff" plan and
+    everyone else to "standard" (weights in AI_FAIR_PLAN_WEIGHTS).
+    """
+    plan = "staff" if getattr(user, "is_superuser", False) else "standard"
+    return settings.AI_FAIR_PLAN_WEIGHTS.get(plan, 1.0)
+
+
+class _Job:
+    def __init__(self, user_id: int, weight: float, cost: float):
+        self.user_id = user_id
+        self.weight = weight
+        self.cost = cost
+        self.enqueued_at = time.monotonic()
+        self.granted = asyncio.get_running_loop().create_future()
+
+
+class FairScheduler:
+    """
+    Deficit round robin over per-user queues of completion jobs.
+
+    At most ``max_concurrent`` completions run at once and each user holds
+    at most ``per_user_limit`` of those slots. When a slot frees up, users
+    with queued jobs are visited in turn; each visit credits the user
+    ``quantum * weight`` and starts their next job once its cost (estimated
+    tokens) is covered, so heavy prompts and heavy users cannot crowd out
+    everyone else.
+    """
+
+    def __init__(self, max_concurrent: int, per_user_limit: int, quantum: float):
+        self.max_concurrent = max_concurrent
+        self.per_user_limit = per_user_limit
+        self.quantum = quantum
+
+        self._queues: Dict[int, Deque[_Job]] = {}
+        self._ring: Deque[int] = deque()
+        self._deficit: Dict[int, float] = {}
+        self._in_flight: Dict[int, int] = {}
+        self._in_flight_total = 0
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        user_id: int,
+        weight: float = 1.0,
+        cost: float = 1.0,
+        max_wait: Optional[float] = None
+    ) -> AsyncIterator[None]:
+        """Wait for this user's fair turn, hold a completion slot for the block, then release it"""
+        job = _Job(user_id, weight, cost)
+        if user_id not in self._queues:
+            self._queues[user_id] = deque()
+            self._ring.append(user_id)
+            self._deficit[user_id] = 0.0
+        self._queues[user_id].append(job)
+        self._dispatch()
+
+        if max_wait is None:
+            max_wait = settings.AI_FAIR_MAX_QUEUE_WAIT_SECONDS
+        try:
+            await asyncio.wait_for(asyncio.shield(job.granted), timeout=max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if job.granted.done():
+                # Granted just as we gave up; hand the slot back
+                self._release(user_id)
+            else:
+                job.granted.cancel()
+                self._remove(job)
+            if isinstance(e, asyncio.TimeoutError):
+                raise AdmissionTimeoutError(f"user:{user_id}", max_wait)
+            raise
+
+        try:
+            yield
+        finally:
+            self._release(user_id)
+
+    def _remove(self, job: _Job) -> None:
+        queue = self._queues.get(job.user_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(job)
+        except ValueError:
+            pass
+        if not queue:
+            self._drop_user(job.user_id)
+
+    def _drop_user(self, user_id: int) -> None:
+        del self._queues[user_id]
+        self._ring.remove(user_id)
+        self._deficit.pop(user_id, None)
+
+    def _release(self, user_id: int) -> None:
+        self._in_flight[user_id] -= 1
+        if not self._in_flight[user_id]:
+            del self._in_flight[user_id]
+        self._in_flight_total -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self._in_flight_total < self.max_concurrent and self._ring:
+            if all(self._in_flight.get(u, 0) >= self.per_user_limit for u in self._ring):
+                return
+
+            user_id = self._ring[0]
+            self._ring.rotate(-1)
+            if self._in_flight.get(user_id, 0) >= self.per_user_limit:
+                continue
+
+            queue = self._queues[user_id]
+            job = queue[0]
+            self._deficit[user_id] += self.quantum * job.weight
+            if job.cost > self._deficit[user_id]:
+                continue
+
+            queue.popleft()
+            self._deficit[user_id] -= job.cost
+            self._in_flight[user_id] = self._in_flight.get(user_id, 0) + 1
+            self._in_flight_total += 1
+            job.granted.set_result(None)
+
+            if not queue:
+                # DRR resets the credit of users that go idle
+                self._drop_user(user_id)
+
+    def pending(self) -> int:
+        """Completions running or waiting for a slot"""
+        return self._in_flight_total + sum(len(queue) for queue in self._queues.values())
+
+    def oldest_wait(self) -> float:
+        """Seconds the longest-waiting queued job has been waiting (0 when nothing is queued)"""
+        if not self._queues:
+            return 0.0
+        return time.monotonic() - min(queue[0].enqueued_at for queue in self._queues.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and in-flight completions per user"""
+        users = set(self._queues) | set(self._in_flight)
+        return {
+            "in_flight": self._in_flight_total,
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "oldest_wait_seconds": round(self.oldest_wait(), 3),
+            "max_concurrent": self.max_concurrent,
+            "per_user_limit": self.per_user_limit,
+            "users": {
+                user_id: {
+                    "queued": len(self._queues.get(user_id, ())),
+                    "in_flight": self._in_flight.get(user_id, 0)
+                }
+                for user_id in users
+            }
+        }
+
+
+# Singleton instance
+fair_scheduler = FairScheduler(
+    max_concurrent=settings.AI_MAX_CONCURRENT_COMPLETIONS,
+    per_user_limit=settings.AI_MAX_INFLIGHT_PER_USER,
+    quantum=settings.AI_FAIR_QUANTUM_TOKENS
+)
@@ -0,0 +1,142 @@
+"""
+Deterministic fake completion provider for offline load and capacity tests
+"""
+import asyncio
+import hashlib
+import math
+import random
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.provider_registry import CompletionProvider
+from app.services.token_counter import token_counter
+
+_WORDS = (
+    "the quick answer depends on context data model system request user value "
+    "result process time cache token stream provider latency budget session "
+    "message router query index memory network review change test deploy"
+).split()
+
+
+class FakeProviderError(Exception):
+    """Injected provider failure"""
+
+
+class FakeProvider(CompletionProvider):
+    """
+    Serves completions without calling any API.
+
+    Reply text is derived from a hash of the prompt, so identical prompts get
+    identical replies. Latency is drawn from a log-normal distribution with
+    the configured median and shape, and calls fail with probability
+    ``error_rate``; both come from one RNG seeded with ``seed``, so a run
+    with the same request order is reproducible. Usage is counted with the
+    real token counter, so cost accounting matches production.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        seed: int = 0,
+        latency_median_ms: float = 800.0,
+        latency_sigma: float = 0.5,
+        completion_tokens: int = 200,
+        error_rate: float = 0.0,
+        stream_chunk_tokens: int = 8,
+        first_token_fraction: float = 0.3
+    ):
+        self.name = name
+        self.seed = seed
+        self.latency_median_ms = latency_median_ms
+        self.latency_sigma = latency_sigma
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.stream_chunk_tokens = stream_chunk_tokens
+        self.first_token_fraction = first_token_fraction
+        self._rng = random.Random(seed)
+
+        self.calls = 0
+        self.errors = 0
+
+    def _draw(self) -> float:
+        """Latency in seconds for the next call; raises for an injected failure"""
+        self.calls += 1
+        latency = self._rng.lognormvariate(math.log(self.latency_median_ms / 1000), self.latency_sigma)
+        if self._rng.random() < self.error_rate:
+            self.errors += 1
+            raise FakeProviderError(f"Injected {self.name} failure")
+        return latency
+
+    def _words(self, messages: List[Dict[str, str]], model: Any, max_tokens: Optional[int]) -> List[str]:
+        count = min(self.completion_tokens, max_tokens or settings.AI_MAX_TOKENS)
+        digest = hashlib.sha256(
+            "\n".join(f"{msg.get('role')}:{msg.get('content')}" for msg in messages).encode("utf-8")
+        ).digest()
+        rng = random.Random(int.from_bytes(digest[:8], "big") ^ self.seed)
+        return [rng.choice(_WORDS) for _ in range(count)]
+
+    def _result(self, messages: List[Dict[str, str]], model: Any, content: str) -> Dict[str, Any]:
+        prompt_tokens = token_counter.count_messages(messages, self.name)
+        completion_tokens = token_counter.count(content, self.name)
+        return {
+            "content": content,
+            "model": getattr(model, "value", model),
+            "provider": self.name,
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    async def complete(self, messages, model, temperature, max_tokens):
+        # Failures surface after a delay, like a real timeout or 5xx would
+        try:
+            latency = self._draw()
+        except FakeProviderError:
+            await asyncio.sleep(self.latency_median_ms / 1000)
+            raise
+        await asyncio.sleep(latency)
+        content = " ".join(self._words(messages, model, max_tokens))
+        return self._result(messages, model, content)
+
+    async def stream(self, messages, model, temperature, max_tokens) -> AsyncIterator[Dict[str, Any]]:
+        try:
+            latency = self._draw()
+        except FakeProviderError:
+            await asyncio.sleep(self.latency_median_ms / 1000 * self.first_token_fraction)
+            raise
+
+        words = self._words(messages, model, max_tokens)
+        chunks = [
+            words[i:i + self.stream_chunk_tokens]
+            for i in range(0, len(words), self.stream_chunk_tokens)
+        ] or [[]]
+        await asyncio.sleep(latency * self.first_token_fraction)
+        per_chunk = latency * (1 - self.first_token_fraction) / len(chunks)
+
+        parts = []
+        for index, chunk in enumerate(chunks):
+            if index:
+                await asyncio.sleep(per_chunk)
+            text = (" " if index else "") + " ".join(chunk)
+            parts.append(text)
+            yield {"type": "delta", "content": text}
+
+        yield {"type": "done", **self._result(messages, model, "".join(parts))}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "injected_errors": self.errors}
+
+
+def create_fake_provider(name: str) -> FakeProvider:
+    """Fake provider configured from the AI_FAKE_* settings"""
+    return FakeProvider(
+        name,
+        seed=settings.AI_FAKE_SEED,
+        latency_median_ms=settings.AI_FAKE_LATENCY_MEDIAN_MS,
+        latency_sigma=settings.AI_FAKE_LATENCY_SIGMA,
+        completion_tokens=settings.AI_FAKE_COMPLETION_TOKENS,
+        error_rate=settings.AI_FAKE_ERROR_RATE,
+        stream_chunk_tokens=settings.AI_FAKE_STREAM_CHUNK_TOKENS
+    )
@@ -0,0 +1,197 @@
+"""
+Write-through cache of each session's recent conversation turns
+"""
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+from app.models import AISession, Message, MessageRole
+
+logger = logging.getLogger(__name__)
+
+HISTORY_ROLES = (MessageRole.USER, MessageRole.ASSISTANT)
+
+
+def _history_entries(messages: Iterable[Message]) -> List[Dict[str, Any]]:
+    """Cache entries (id, role, content) for the persisted messages that belong in prompt history"""
+    return [
+        {"id": msg.id, "role": msg.role.value, "content": msg.content}
+        for msg in messages
+        if msg.role in HISTORY_ROLES
+    ]
+
+
+class SessionHistoryCache:
+    """
+    The last ``max_messages`` user/assistant turns of each session, oldest first.
+
+    Entries are versioned with the session's ``total_messages`` counter.
+    Every code path that persists messages bumps that counter in the database
+    (``add_session_usage``) and appends the new turns here after committing,
+    so a cached tail is only served while its version matches the session
+    row. Concurrent writers get distinct counter values from the increment,
+    so one writer can never append to a version another writer produced. Anything else (a write from another
+    process with a local cache, a failed append) changes the counter without
+    updating the entry, and the next read falls back to the database.
+
+    The cache is a bounded in-process LRU, or Redis when ``redis_url`` is set
+    so that all workers share one copy. Redis errors are logged and treated
+    as misses.
+    """
+
+    def __init__(
+        self,
+        max_messages: int = 200,
+        max_sessions: int = 1000,
+        ttl_seconds: int = 1800,
+        redis_url: Optional[str] = None,
+        key_prefix: str = "ai:history:"
+    ):
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._redis = aioredis.from_url(redis_url, decode_responses=True) if redis_url else None
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.appends = 0
+        self.redis_errors = 0
+
+    async def get(self, session_id: int, version: int) -> Optional[List[Dict[str, Any]]]:
+        """Cached tail of a session if it is current for ``version``, else None"""
+        if not settings.AI_HISTORY_CACHE_ENABLED:
+            return None
+
+        entry = await self._load(session_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry["version"] != version:
+            self.stale += 1
+            return None
+
+        self.hits += 1
+        return entry["messages"]
+
+    async def set(self, session_id: int, version: int, messages: List[Dict[str, Any]]) -> None:
+        """Replace a session's cached tail (after loading it from the database)"""
+        if not settings.AI_HISTORY_CACHE_ENABLED:
+            return
+        await self._store(session_id, {"version": version, "messages": messages[-self.max_messages:]})
+
+    async def append(
+        self,
+        session_id: int,
+        previous_version: int,
+        version: int,
+        messages: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Add committed turns to a session's tail. The entry is dropped instead
+        if it was not at ``previous_version`` (it missed some other write).
+        """
+        if not settings.AI_HISTORY_CACHE_ENABLED:
+            return
+
+        entry = await self._load(session_id)
+        if entry is None:
+            return
+        if entry["version"] != previous_version:
+            await self.invalidate(session_id)
+            return
+
+        self.appends += 1
+        await self._store(session_id, {
+            "version": version,
+            "messages": (entry["messages"] + messages)[-self.max_messages:]
+        })
+
+    async def record(self, session: AISession, messages: List[Message]) -> None:
+        """
+        Write messages through after they were committed together with a
+        ``total_messages`` increment of ``len(messages)``; ``session`` must
+        hold the counter value that increment returned
+        """
+        await self.append(
+            session.id,
+            session.total_messages - len(messages),
+            session.total_messages,
+            _history_entries(messages)
+        )
+
+    async def invalidate(self, session_id: int) -> None:
+        self._entries.pop(session_id, None)
+        if self._redis is not None:
+            try:
+                await self._redis.delete(self.key_prefix + str(session_id))
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"History cache Redis delete failed: {e}")
+
+    async def _load(self, session_id: int) -> Optional[Dict[str, Any]]:
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(self.key_prefix + str(session_id))
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"History cache Redis read failed: {e}")
+                return None
+            return json.loads(raw) if raw else None
+
+        cached = self._entries.get(session_id)
+        if cached is None:
+            return None
+        expires_at, entry = cached
+        if expires_at <= time.monotonic():
+            del self._entries[session_id]
+            return None
+        self._entries.move_to_end(session_id)
+        return entry
+
+    async def _store(self, session_id: int, entry: Dict[str, Any]) -> None:
+        if self._redis is not None:
+            try:
+                await self._redis.set(self.key_prefix + str(session_id), json.dumps(entry), ex=self.ttl_seconds)
+            except Exception as e:
+                self.redis_errors += 1
+                logger.warning(f"History cache Redis write failed: {e}")
+            return
+
+        self._entries[session_id] = (time.monotonic() + self.ttl_seconds, entry)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_sessions:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses + self.stale
+        return {
+            "enabled": settings.AI_HISTORY_CACHE_ENABLED,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "appends": self.appends,
+            "local_sessions": len(self._entries),
+            "max_messages": self.max_messages,
+            "redis_enabled": self._redis is not None,
+            "redis_errors": self.redis_errors
+        }
+
+
+# Singleton instance
+history_cache = SessionHistoryCache(
+    max_messages=settings.AI_HISTORY_TAIL_MESSAGES,
+    max_sessions=settings.AI_HISTORY_CACHE_MAX_SESSIONS,
+    ttl_seconds=settings.AI_HISTORY_CACHE_TTL_SECONDS,
+    redis_url=settings.REDIS_URL if settings.AI_HISTORY_CACHE_REDIS_ENABLED else None
+)
@@ -0,0 +1,115 @@
+"""
+Rolling latency and outcome tracking for AI models
+"""
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+class LatencyTracker:
+    """Keeps the most recent call latencies (seconds) and answers percentile queries"""
+
+    def __init__(self, window_size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window_size)
+
+    def record(self, latency_seconds: float) -> None:
+        self._samples.append(latency_seconds)
+
+    @property
+    def count(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of the window, or None if empty"""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(1, math.ceil(pct / 100 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        return {
+            "samples": self.count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99)
+        }
+
+
+class ModelStats(LatencyTracker):
+    """
+    Live call statistics for one model.
+
+    On top of the latency window it keeps an exponentially weighted moving
+    average of latency and of output throughput (completion tokens per
+    second), and the error and timeout rates over the last
+    ``outcome_window_seconds``. Timeouts (deadline or transport) are kept
+    apart from provider errors but both count against the error rate.
+    """
+
+    def __init__(self, window_size: int = 200, alpha: float = 0.2, outcome_window_seconds: float = 300.0):
+        super().__init__(window_size)
+        self.alpha = alpha
+        self.outcome_window_seconds = outcome_window_seconds
+        self.ewma: Optional[float] = None
+        self.throughput: Optional[float] = None
+        self._outcomes: Deque[Tuple[float, str]] = deque()
+
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        return value if current is None else self.alpha * value + (1 - self.alpha) * current
+
+    def record_success(self, latency_seconds: float, output_tokens: int = 0) -> None:
+        self.record(latency_seconds)
+        self.ewma = self._ewma(self.ewma, latency_seconds)
+        if output_tokens and latency_seconds > 0:
+            self.throughput = self._ewma(self.throughput, output_tokens / latency_seconds)
+        self._add_outcome("ok")
+
+    def record_failure(self) -> None:
+        self._add_outcome("error")
+
+    def record_timeout(self) -> None:
+        self._add_outcome("timeout")
+
+    def _add_outcome(self, outcome: str) -> None:
+        now = time.monotonic()
+        self._outcomes.append((now, outcome))
+        self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.outcome_window_seconds:
+            self._outcomes.popleft()
+
+    @property
+    def calls(self) -> int:
+        """Calls (successful or not) within the outcome window"""
+        self._prune(time.monotonic())
+        return len(self._outcomes)
+
+    def error_rate(self) -> Optional[float]:
+        """Fraction of failed (errored or timed out) calls within the outcome window, or None without calls"""
+        calls = self.calls
+        if not calls:
+            return None
+        return sum(1 for _, outcome in self._outcomes if outcome != "ok") / calls
+
+    def timeout_rate(self) -> Optional[float]:
+        """Fraction of timed out calls within the outcome window, or None without calls"""
+        calls = self.calls
+        if not calls:
+            return None
+        return sum(1 for _, outcome in self._outcomes if outcome == "timeout") / calls
+
+    def snapshot(self) -> Dict[str, Any]:
+        error_rate = self.error_rate()
+        timeout_rate = self.timeout_rate()
+        return {
+            **super().snapshot(),
+            "ewma": self.ewma,
+            "error_rate": round(error_rate, 4) if error_rate is not None else None,
+            "timeout_rate": round(timeout_rate, 4) if timeout_rate is not None else None,
+            "calls_in_window": self.calls,
+            "calls_per_minute": round(self.calls * 60 / self.outcome_window_seconds, 2),
+            "output_tokens_per_second": round(self.throughput, 1) if self.throughput is not None else None
+        }
@@ -0,0 +1,79 @@
+"""
+Load shedding of new AI work when completions back up
+"""
+import logging
+from typing import Any, Dict
+
+from app.core.config import settings
+from app.services.fair_scheduler import FairScheduler, fair_scheduler
+from app.services.rate_limiter import Priority
+
+logger = logging.getLogger(__name__)
+
+
+class OverloadedError(Exception):
+    """Raised when new work is rejected to protect the service"""
+
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"Service overloaded ({reason}), retry in {retry_after:.0f}s")
+
+
+class LoadShedder:
+    """
+    Rejects new completions up front while the fair scheduler is backed up.
+
+    The signals are the number of pending completions (running plus queued)
+    and how long the oldest queued one has been waiting. Each priority class
+    is shed at its own fraction of the limits (AI_SHED_PRIORITY_FRACTIONS),
+    so low-priority task types are turned away first and high-priority ones
+    only when the service is at its limit.
+    """
+
+    def __init__(self, scheduler: FairScheduler, max_pending: int, max_queue_wait: float):
+        self.scheduler = scheduler
+        self.max_pending = max_pending
+        self.max_queue_wait = max_queue_wait
+        self.admitted = 0
+        self.shed: Dict[str, int] = {priority.name.lower(): 0 for priority in Priority}
+
+    def check(self, priority: Priority) -> None:
+        """Raise OverloadedError if work of this priority should be shed right now"""
+        if not settings.AI_SHED_ENABLED:
+            return
+
+        name = priority.name.lower()
+        fraction = settings.AI_SHED_PRIORITY_FRACTIONS.get(name, 1.0)
+        pending = self.scheduler.pending()
+        wait = self.scheduler.oldest_wait()
+
+        if pending >= self.max_pending * fraction:
+            reason = "too many pending completions"
+        elif wait >= self.max_queue_wait * fraction:
+            reason = "queue wait too long"
+        else:
+            self.admitted += 1
+            return
+
+        self.shed[name] += 1
+        logger.warning(f"Shedding {name} priority request: {reason} (pending={pending}, oldest_wait={wait:.1f}s)")
+        # Roughly how long the current backlog needs to drain
+        raise OverloadedError(reason, max(1.0, wait, self.max_queue_wait * fraction))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.AI_SHED_ENABLED,
+            "max_pending": self.max_pending,
+            "max_queue_wait_seconds": self.max_queue_wait,
+            "admitted": self.admitted,
+            "shed": dict(self.shed)
+        }
+
+
+# Singleton instance
+load_shedder = LoadShedder(
+    fair_scheduler,
+    max_pending=settings.AI_SHED_MAX_PENDING,
+    max_queue_wait=settings.AI_SHED_MAX_QUEUE_WAIT_SECONDS
+)
@@ -0,0 +1,72 @@
+"""
+Keyset (cursor) pagination for time-ordered listings
+"""
+import base64
+import json
+from typing import Any, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, literal, select, tuple_
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a cursor that was not produced by ``encode_cursor``"""
+
+
+def encode_cursor(row_id: int) -> str:
+    """Opaque cursor for the row with id ``row_id``"""
+    raw = json.dumps([row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Row id of a cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        (row_id,) = json.loads(raw)
+        if not isinstance(row_id, int) or isinstance(row_id, bool):
+            raise TypeError(f"Cursor id must be an integer, not {row_id!r}")
+        return row_id
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+
+
+def keyset_page(
+    query: Select,
+    columns: Sequence[Any],
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    newest_first: bool = False
+) -> Tuple[Select, bool]:
+    """
+    Limit ``query`` to one page keyed on ``columns`` (a timestamp and an id).
+
+    ``after`` returns the rows just newer than that cursor, ``before`` the
+    rows just older, and without a cursor the newest rows. Returns the
+    statement and whether its rows must be reversed to come out in the
+    listing's order (``newest_first`` or oldest first).
+
+    Cursors only carry the id. The cursor row's timestamp is read back in the
+    same statement, so the comparison uses the stored value exactly (a
+    timestamp that went through Python and back can differ in precision or
+    time zone, e.g. on SQLite where it is stored as text). A cursor whose row
+    was deleted yields an empty page.
+    """
+    if before and after:
+        raise InvalidCursorError("Pass either 'before' or 'after', not both")
+
+    key = tuple_(*columns)
+    *time_columns, id_column = columns
+    cursor = after or before
+    if cursor:
+        row_id = decode_cursor(cursor)
+        cursor_key = tuple_(
+            *(select(column).where(id_column == row_id).scalar_subquery() for column in time_columns),
+            literal(row_id)
+        )
+        query = query.where(key > cursor_key if after else key < cursor_key)
+
+    # Walk away from the cursor so LIMIT keeps the rows nearest to it
+    ascending = bool(after)
+    query = query.order_by(*(column.asc() if ascending else column.desc() for column in columns)).limit(limit)
+    return query, ascending == newest_first
@@ -0,0 +1,124 @@
+"""
+Pluggable completion providers
+"""
+import importlib
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CompletionProvider(ABC):
+    """
+    Interface for a completion backend.
+
+    ``complete`` returns ``{"content", "model", "provider", "usage"}`` and
+    ``stream`` yields ``{"type": "delta", "content"}`` events followed by a
+    ``{"type": "done", ...}`` event of the same shape, exactly like the
+    built-in SDK helpers of ``AIRouter``.
+    """
+
+    name: str = ""
+
+    def is_configured(self) -> bool:
+        return True
+
+    @abstractmethod
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        model: Any,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: Any,
+        temperature: float,
+        max_tokens: Optional[int]
+    ) -> AsyncIterator[Dict[str, Any]]:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class ClientProvider(CompletionProvider):
+    """Adapts a pair of completion/stream callables (e.g. an SDK client's helpers) to the provider interface"""
+
+    def __init__(
+        self,
+        name: str,
+        complete: Callable[..., Awaitable[Dict[str, Any]]],
+        stream: Callable[..., AsyncIterator[Dict[str, Any]]],
+        is_configured: Callable[[], bool]
+    ):
+        self.name = name
+        self._complete = complete
+        self._stream = stream
+        self._is_configured = is_configured
+
+    def is_configured(self) -> bool:
+        return self._is_configured()
+
+    async def complete(self, messages, model, temperature, max_tokens):
+        return await self._complete(messages, model, temperature, max_tokens)
+
+    def stream(self, messages, model, temperature, max_tokens):
+        return self._stream(messages, model, temperature, max_tokens)
+
+
+class ProviderRegistry:
+    """Providers by name; registering a name again replaces the previous provider"""
+
+    def __init__(self):
+        self._providers: Dict[str, CompletionProvider] = {}
+
+    def register(self, name: str, provider: CompletionProvider) -> None:
+        if name in self._providers:
+            logger.info(f"Replacing completion provider '{name}' with {type(provider).__name__}")
+        self._providers[name] = provider
+
+    def get(self, name: str) -> Optional[CompletionProvider]:
+        return self._providers.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._providers)
+
+    def describe(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "implementation": type(provider).__name__,
+                "configured": provider.is_configured(),
+                **provider.stats()
+            }
+            for name, provider in self._providers.items()
+        }
+
+
+def load_provider_plugin(path: str, known_names: Iterable[str]) -> CompletionProvider:
+    """
+    Build a provider from a ``"package.module:factory"`` path.
+
+    The factory is called without arguments and must return a
+    ``CompletionProvider`` whose ``name`` is the provider it serves, one of
+    ``known_names`` (routing only ever asks for those).
+    """
+    module_name, _, attr = path.partition(":")
+    if not attr:
+        raise ValueError(f"Provider plugin path must look like 'module:factory', got '{path}'")
+    factory = getattr(importlib.import_module(module_name), attr)
+    provider = factory()
+    if not isinstance(provider, CompletionProvider) or not provider.name:
+        raise TypeError(f"Provider plugin '{path}' did not return a named CompletionProvider")
+    known_names = list(known_names)
+    if provider.name not in known_names:
+        raise ValueError(
+            f"Provider plugin '{path}' serves unknown provider '{provider.name}'; expected one of {known_names}"
+        )
+    return provider
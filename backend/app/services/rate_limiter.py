@@ -0,0 +1,165 @@
+"""
+Per-model RPM/TPM admission scheduling for AI provider calls
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Admission priority; lower values are served first"""
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+def priority_for_task(task_type: Optional[str]) -> Priority:
+    """Priority class configured for a task type (AI_TASK_PRIORITIES)"""
+    name = settings.AI_TASK_PRIORITIES.get(task_type or "general", "normal")
+    return Priority[name.upper()]
+
+
+class AdmissionTimeoutError(Exception):
+    """Raised when provider capacity does not free up within the allowed wait"""
+
+    def __init__(self, key: str, retry_after: float):
+        self.key = key
+        self.retry_after = retry_after
+        super().__init__(f"Rate limit capacity for {key} unavailable, retry in {retry_after:.1f}s")
+
+
+class TokenBucket:
+    """Continuously refilling token bucket"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until ``amount`` tokens are available (requests larger than capacity wait for a full bucket)"""
+        self._refill()
+        needed = min(amount, self.capacity) - self.tokens
+        if needed <= 0:
+            return 0.0
+        return needed / self.refill_per_second
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimitScheduler:
+    """
+    Admits provider calls against per-model requests-per-minute and
+    tokens-per-minute buckets.
+
+    Callers waiting on the same model are served in priority order (FIFO
+    within a class) and give up after a bounded wait. ``time_until_capacity``
+    lets routing prefer models that have headroom right now.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, int]]):
+        self.limits = limits
+        self._buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+        self._waiters: Dict[str, List[Tuple[int, int]]] = {}
+        self._sequence = itertools.count()
+        self.admitted = 0
+        self.timed_out = 0
+
+    def _get_buckets(self, key: str) -> Optional[Tuple[TokenBucket, TokenBucket]]:
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            limit = self.limits.get(key)
+            if not limit:
+                return None
+            rpm, tpm = limit["rpm"], limit["tpm"]
+            buckets = (TokenBucket(rpm, rpm / 60), TokenBucket(tpm, tpm / 60))
+            self._buckets[key] = buckets
+        return buckets
+
+    def time_until_capacity(self, key: str, tokens: int) -> float:
+        """Seconds until a call needing ``tokens`` could be admitted (ignoring queued waiters)"""
+        buckets = self._get_buckets(key)
+        if buckets is None:
+            return 0.0
+        requests, token_bucket = buckets
+        return max(requests.time_until(1), token_bucket.time_until(tokens))
+
+    async def acquire(
+        self,
+        key: str,
+        tokens: int,
+        priority: Priority = Priority.NORMAL,
+        max_wait: Optional[float] = None
+    ) -> None:
+        """Wait for capacity for one call of ``tokens`` and reserve it"""
+        buckets = self._get_buckets(key)
+        if buckets is None:
+            return
+        requests, token_bucket = buckets
+
+        if max_wait is None:
+            max_wait = settings.AI_ADMISSION_MAX_WAIT_SECONDS
+        deadline = time.monotonic() + max_wait
+        entry = (int(priority), next(self._sequence))
+        waiters = self._waiters.setdefault(key, [])
+        heapq.heappush(waiters, entry)
+
+        try:
+            while True:
+                wait = max(requests.time_until(1), token_bucket.time_until(tokens))
+                if waiters[0] == entry and wait == 0:
+                    requests.consume(1)
+                    token_bucket.consume(tokens)
+                    self.admitted += 1
+                    return
+
+                remaining = deadline - time.monotonic()
+                if wait > remaining or remaining <= 0:
+                    self.timed_out += 1
+                    raise AdmissionTimeoutError(key, max(wait, 0.1))
+
+                # Wake when our capacity should be back, or shortly to re-check our place in line
+                await asyncio.sleep(min(max(wait, 0.01), 0.25, remaining))
+        finally:
+            waiters.remove(entry)
+            heapq.heapify(waiters)
+
+    def settle(self, key: str, reserved_tokens: int, used_tokens: int) -> None:
+        """Return the unused part of a token reservation once actual usage is known"""
+        buckets = self._get_buckets(key)
+        if buckets is not None and reserved_tokens > used_tokens:
+            buckets[1].refund(reserved_tokens - used_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "admitted": self.admitted,
+            "timed_out": self.timed_out,
+            "models": {
+                key: {
+                    "requests_available": round(requests.tokens, 1),
+                    "tokens_available": round(token_bucket.tokens),
+                    "waiting": len(self._waiters.get(key, []))
+                }
+                for key, (requests, token_bucket) in self._buckets.items()
+            }
+        }
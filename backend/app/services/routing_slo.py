@@ -0,0 +1,98 @@
+"""
+Routing objectives ("SLOs") evaluated against live model statistics
+"""
+import re
+from typing import Dict, Optional
+
+_LATENCY_CLAUSE = re.compile(r"^(p\d{1,2}(?:\.\d+)?|ewma|latency)\s*<=?\s*(\d+(?:\.\d+)?)\s*(ms|s)?$")
+_ERROR_RATE_CLAUSE = re.compile(r"^error[ _]rate\s*<=?\s*(\d+(?:\.\d+)?)\s*(%)?$")
+_COST_CLAUSE = re.compile(r"^cost\s*<=?\s*\$?(\d+(?:\.\d+)?)$")
+_OBJECTIVE_CLAUSE = re.compile(r"^(cheapest|fastest)(?:\s+under\s+(budget|\$?\d+(?:\.\d+)?))?$")
+
+
+class RoutingSLO:
+    """
+    Constraints and an objective for picking a model.
+
+    ``latency_bounds`` maps a metric ("p95", "p50", "ewma", ...) to a maximum
+    in seconds, ``max_error_rate`` is a fraction and ``max_cost`` is the
+    estimated cost of one request in cents. ``objective`` is "cheapest",
+    "fastest" or None (keep the task's preference order).
+    """
+
+    def __init__(
+        self,
+        latency_bounds: Optional[Dict[str, float]] = None,
+        max_error_rate: Optional[float] = None,
+        max_cost: Optional[float] = None,
+        objective: Optional[str] = None
+    ):
+        self.latency_bounds = latency_bounds or {}
+        self.max_error_rate = max_error_rate
+        self.max_cost = max_cost
+        self.objective = objective
+
+    @classmethod
+    def parse(cls, text: str, budget: Optional[float] = None) -> "RoutingSLO":
+        """
+        Parse an SLO such as ``"p95 < 3s"``, ``"cheapest under budget"`` or
+        ``"p95 < 2s, error_rate < 5%, cheapest"``.
+
+        Clauses are separated by commas or "and". ``budget`` is the caller's
+        per-request budget in dollars, used by "under budget". Raises
+        ValueError for clauses it does not understand.
+        """
+        slo = cls()
+        for clause in re.split(r",|;|\band\b", text.lower()):
+            clause = clause.strip()
+            if not clause:
+                continue
+
+            match = _LATENCY_CLAUSE.match(clause)
+            if match:
+                metric, value, unit = match.groups()
+                if metric == "latency":
+                    metric = "ewma"
+                seconds = float(value) / 1000 if unit == "ms" else float(value)
+                slo.latency_bounds[metric] = seconds
+                continue
+
+            match = _ERROR_RATE_CLAUSE.match(clause)
+            if match:
+                value, percent = match.groups()
+                slo.max_error_rate = float(value) / 100 if percent else float(value)
+                continue
+
+            match = _COST_CLAUSE.match(clause)
+            if match:
+                slo._set_max_cost(float(match.group(1)))
+                continue
+
+            match = _OBJECTIVE_CLAUSE.match(clause)
+            if match:
+                slo.objective, limit = match.groups()
+                if limit == "budget":
+                    if budget is None:
+                        raise ValueError("'under budget' requires a budget (max_cost)")
+                    slo._set_max_cost(budget)
+                elif limit:
+                    slo._set_max_cost(float(limit.lstrip("$")))
+                continue
+
+            raise ValueError(f"Unrecognized SLO clause: '{clause}'")
+
+        return slo
+
+    def _set_max_cost(self, dollars: float) -> None:
+        cents = dollars * 100
+        self.max_cost = cents if self.max_cost is None else min(self.max_cost, cents)
+
+    def describe(self) -> str:
+        clauses = [f"{metric} < {seconds:g}s" for metric, seconds in self.latency_bounds.items()]
+        if self.max_error_rate is not None:
+            clauses.append(f"error_rate < {self.max_error_rate:.1%}")
+        if self.max_cost is not None:
+            clauses.append(f"cost < ${self.max_cost / 100:g}")
+        if self.objective:
+            clauses.append(self.objective)
+        return ", ".join(clauses)
@@ -0,0 +1,44 @@
+"""
+Atomic updates of a session's usage counters
+"""
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models import AISession
+
+COUNTERS = ("total_messages", "total_tokens_used", "total_cost")
+
+
+async def add_session_usage(
+    db: AsyncSession,
+    session: AISession,
+    messages: int = 0,
+    tokens: int = 0,
+    cost: float = 0
+) -> int:
+    """
+    Add to a session's message, token and cost counters.
+
+    The increments run in the database (``SET total_messages = total_messages + n``)
+    so that concurrent requests on one session cannot overwrite each other's
+    updates with values read before a slow provider call. The row is only
+    locked from this statement until the caller commits, so call it right
+    before committing. The loaded ``session`` is refreshed with the new
+    totals, and the new ``total_messages`` is returned.
+    """
+    result = await db.execute(
+        update(AISession)
+        .where(AISession.id == session.id)
+        .values(
+            total_messages=func.coalesce(AISession.total_messages, 0) + messages,
+            total_tokens_used=func.coalesce(AISession.total_tokens_used, 0) + tokens,
+            total_cost=func.coalesce(AISession.total_cost, 0) + cost
+        )
+        .returning(*(getattr(AISession, name) for name in COUNTERS))
+        .execution_options(synchronize_session=False)
+    )
+    row = result.one()
+    for name, value in zip(COUNTERS, row):
+        set_committed_value(session, name, value)
+    return row[0]
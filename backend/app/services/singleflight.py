@@ -0,0 +1,93 @@
+"""
+Single-flight coalescing of identical concurrent calls
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """An in-flight call shared by one or more waiters"""
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time and share its outcome.
+
+    Every waiter receives the leader's result or exception, except the
+    ``handoff`` exceptions: those mean the leader's own limits (such as its
+    deadline) ended the call, so the waiters still interested take over and
+    one of them starts the call again under its own limits. A waiter that is
+    cancelled only detaches itself; the shared call is cancelled once its
+    last waiter has gone. If the shared call is cancelled while others still
+    wait, it is restarted the same way.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.leaders = 0
+        self.followers = 0
+        self.handoffs = 0
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        handoff: Tuple[Type[BaseException], ...] = ()
+    ) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` or join the in-flight call for ``key``.
+
+        Returns a ``(result, shared)`` tuple where ``shared`` is True when the
+        result came from a call started by another waiter.
+        """
+        while True:
+            call = self._calls.get(key)
+            shared = call is not None
+            if call is None:
+                call = _Call(asyncio.create_task(fn()))
+                self._calls[key] = call
+                call.task.add_done_callback(lambda _, call=call: self._forget(key, call))
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+            call.waiters += 1
+            try:
+                # Shield so one waiter's cancellation does not cancel the others
+                return await asyncio.shield(call.task), shared
+            except asyncio.CancelledError:
+                if not shared or asyncio.current_task().cancelling():
+                    if not call.task.done() and call.waiters == 1:
+                        # Last interested waiter is gone; stop the shared call
+                        call.task.cancel()
+                    raise
+                # The shared call was cancelled under us; run it ourselves
+            except handoff:
+                if not shared:
+                    raise
+                # The leader's limits ended the call, not ours
+            finally:
+                call.waiters -= 1
+
+            self._forget(key, call)
+            self.handoffs += 1
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Coalescing counters for monitoring"""
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "handoffs": self.handoffs
+        }
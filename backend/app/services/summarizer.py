@@ -0,0 +1,153 @@
+"""
+Background compaction of long conversations into a rolling summary
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import AISession, Message, MessageRole
+from app.services.ai_service import ai_router
+from app.services.session_stats import add_session_usage
+
+logger = logging.getLogger(__name__)
+
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an AI assistant. "
+    "Merge the new turns into the existing summary. Keep facts, decisions, open questions, "
+    "user preferences and anything later turns may refer back to. Be concise and write in "
+    "the third person. Reply with the updated summary only."
+)
+
+
+def summary_message(context: Optional[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+    """System message carrying a session's rolling summary, if it has one"""
+    if not context or not context.get("summary"):
+        return None
+    return {
+        "role": "system",
+        "content": f"Summary of the earlier conversation:\n{context['summary']}"
+    }
+
+
+class ConversationSummarizer:
+    """
+    Folds older turns of a session into ``AISession.context["summary"]``.
+
+    Compaction runs as a background task at most once per session at a time.
+    It summarizes every unsummarized user/assistant message except the most
+    recent ``AI_SUMMARY_KEEP_RECENT`` ones, using the cheapest available
+    model, and records the last summarized message id so prompt assembly
+    only loads newer turns.
+    """
+
+    def __init__(self):
+        self._running: Dict[int, asyncio.Task] = {}
+
+    def maybe_schedule(self, session: AISession) -> None:
+        """Start compaction if the session has accumulated enough unsummarized messages"""
+        if not settings.AI_SUMMARY_ENABLED or session.id in self._running:
+            return
+
+        summarized = (session.context or {}).get("summarized_messages", 0)
+        if (session.total_messages or 0) - summarized <= settings.AI_SUMMARY_TRIGGER_MESSAGES:
+            return
+
+        session_id = session.id
+        task = asyncio.create_task(self._compact(session_id))
+        self._running[session_id] = task
+        task.add_done_callback(lambda _: self._running.pop(session_id, None))
+
+    async def _compact(self, session_id: int) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                session = await db.get(AISession, session_id)
+                if not session:
+                    return
+
+                context = dict(session.context or {})
+                summarized_until = context.get("summary_until_message_id", 0)
+
+                result = await db.execute(
+                    select(Message.id, Message.role, Message.content).where(
+                        Message.session_id == session_id,
+                        Message.id > summarized_until,
+                        Message.role.in_([MessageRole.USER, MessageRole.ASSISTANT])
+                    ).order_by(Message.created_at, Message.id)
+                )
+                rows = result.all()
+                if len(rows) <= settings.AI_SUMMARY_KEEP_RECENT:
+                    return
+
+                model = ai_router.cheapest_available_model()
+                budget = ai_router.get_history_budget(model, settings.AI_SUMMARY_MAX_TOKENS)
+                budget -= ai_router.count_message_tokens({"content": SUMMARY_SYSTEM_PROMPT})
+                budget -= ai_router.count_message_tokens({"content": context.get("summary", "")})
+
+                # Oldest unsummarized turns first, as many as fit in one call
+                lines = []
+                last_id = None
+                for row in rows[:-settings.AI_SUMMARY_KEEP_RECENT]:
+                    line = f"{row.role.value.capitalize()}: {row.content}"
+                    tokens = ai_router.count_message_tokens({"content": line})
+                    if lines and tokens > budget:
+                        break
+                    lines.append(line)
+                    last_id = row.id
+                    budget -= tokens
+
+                previous = context.get("summary") or "(none yet)"
+                completion = await ai_router.generate_completion(
+                    messages=[
+                        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                        {
+                            "role": "user",
+                            "content": f"Current summary:\n{previous}\n\nNew turns:\n" + "\n\n".join(lines)
+                        }
+                    ],
+                    model=model,
+                    temperature=0.2,
+                    max_tokens=settings.AI_SUMMARY_MAX_TOKENS,
+                    task_type="summarization",
+                    use_cache=False
+                )
+
+                context.update({
+                    "summary": completion["content"].strip(),
+                    "summary_until_message_id": last_id,
+                    "summarized_messages": context.get("summarized_messages", 0) + len(lines),
+                    "summary_model": completion["model"],
+                    "summary_updated_at": datetime.now(timezone.utc).isoformat()
+                })
+                # Reassign so SQLAlchemy detects the JSON change
+                session.context = context
+
+                await add_session_usage(
+                    db,
+                    session,
+                    tokens=completion["usage"]["total_tokens"],
+                    cost=ai_router.calculate_response_cost(completion)
+                )
+                await db.commit()
+                logger.info(f"Compacted {len(lines)} messages of session {session_id} with {model}")
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Conversation summarization failed for session {session_id}: {str(e)}")
+
+    async def shutdown(self) -> None:
+        """Cancel running compactions"""
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Singleton instance
+conversation_summarizer = ConversationSummarizer()
@@ -0,0 +1,136 @@
+"""
+Token counting for AI provider families
+"""
+import hashlib
+import logging
+import math
+import os
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+
+# Average characters per token for ASCII text, calibrated per provider family.
+# Non-ASCII text (accents, CJK, emoji) tokenizes far less efficiently.
+CHARS_PER_TOKEN = {
+    "openai": 4.0,
+    "anthropic": 3.5,
+    "google": 4.0,
+}
+NON_ASCII_CHARS_PER_TOKEN = 1.5
+
+# Chat formatting overhead (role markers, separators) per message and per reply
+TOKENS_PER_MESSAGE = 4
+TOKENS_PER_REPLY = 3
+
+# tiktoken caches each encoding file under the SHA-1 of its download URL
+CL100K_BASE_URL = "https://openaipublic.blob.core.windows.net/encodings/cl100k_base.tiktoken"
+
+
+class TokenCounter:
+    """
+    Counts tokens per provider family.
+
+    OpenAI text uses tiktoken's ``cl100k_base`` when the encoding file is
+    already in ``AI_TOKENIZER_CACHE_DIR`` (or ``TIKTOKEN_CACHE_DIR``); it is
+    never downloaded, since that would block the event loop. Everything else
+    uses a calibrated character-based approximation. Per-text counts are
+    memoized in a bounded LRU so conversation history is not re-tokenized on
+    every turn.
+    """
+
+    def __init__(self, max_entries: int = 10000, cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._encoding = None
+        self._encoding_loaded = False
+        self._memo: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _cached_encoding_dir(self) -> Optional[str]:
+        """Directory holding the cl100k_base encoding file, if any"""
+        cache_dir = self.cache_dir or os.environ.get("TIKTOKEN_CACHE_DIR")
+        if not cache_dir:
+            return None
+        cache_key = hashlib.sha1(CL100K_BASE_URL.encode()).hexdigest()
+        return cache_dir if os.path.isfile(os.path.join(cache_dir, cache_key)) else None
+
+    def _get_encoding(self):
+        """Load the tiktoken encoding once from the local cache; None if unavailable"""
+        if not self._encoding_loaded:
+            self._encoding_loaded = True
+            if tiktoken is None:
+                return None
+            cache_dir = self._cached_encoding_dir()
+            if cache_dir is None:
+                logger.info("No cached cl100k_base encoding, using token approximation")
+                return None
+            # tiktoken reads the file from here instead of fetching it
+            os.environ["TIKTOKEN_CACHE_DIR"] = cache_dir
+            try:
+                self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                logger.warning(f"tiktoken encoding unavailable, using approximation: {e}")
+        return self._encoding
+
+    def count(self, text: str, family: str = "openai") -> int:
+        """Number of tokens in ``text`` for a provider family"""
+        if not text:
+            return 0
+
+        key = (family, text)
+        cached = self._memo.get(key)
+        if cached is not None:
+            self._memo.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        encoding = self._get_encoding() if family == "openai" else None
+        if encoding is not None:
+            tokens = len(encoding.encode(text, disallowed_special=()))
+        else:
+            tokens = self._approximate(text, family)
+
+        self._memo[key] = tokens
+        if len(self._memo) > self.max_entries:
+            self._memo.popitem(last=False)
+        return tokens
+
+    @staticmethod
+    def _approximate(text: str, family: str) -> int:
+        non_ascii = sum(1 for ch in text if ord(ch) > 127)
+        ascii_chars = len(text) - non_ascii
+        chars_per_token = CHARS_PER_TOKEN.get(family, 4.0)
+        return max(1, math.ceil(ascii_chars / chars_per_token + non_ascii / NON_ASCII_CHARS_PER_TOKEN))
+
+    def count_messages(self, messages: List[Dict[str, str]], family: str = "openai") -> int:
+        """Prompt tokens for a chat message list, including formatting overhead"""
+        if not messages:
+            return 0
+        total = sum(self.count(msg.get("content", ""), family) + TOKENS_PER_MESSAGE for msg in messages)
+        return total + TOKENS_PER_REPLY
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "backend": "tiktoken" if self._encoding is not None else "approximation",
+            "memo_entries": len(self._memo),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Singleton instance
+token_counter = TokenCounter(
+    max_entries=settings.AI_TOKEN_COUNT_CACHE_SIZE,
+    cache_dir=settings.AI_TOKENIZER_CACHE_DIR
+)
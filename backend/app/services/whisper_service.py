@@ -11,6 +11,7 @@ import soundfile as sf
 import numpy as np
 
 from app.core.config import settings
+from app.core.http_client import http_client, http_timeout
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +26,11 @@ class WhisperService:
 
         if settings.OPENAI_API_KEY:
             try:
-                self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+                self.client = AsyncOpenAI(
+                    api_key=settings.OPENAI_API_KEY,
+                    http_client=http_client,
+                    timeout=http_timeout
+                )
                 self.available = True
                 logger.info("Whisper service initialized successfully")
             except Exception as e:
@@ -0,0 +1,364 @@
+"""
+Benchmark of the chat request path: POST /api/ai/process, GET /api/ai/sessions
+and GET /api/ai/sessions/{id}/messages.
+
+Requests go through the real ASGI app (auth, routing, persistence and cost
+accounting) in-process, against a throwaway database, with every AI provider
+served by the deterministic fake provider. For each scenario it reports
+throughput, p50/p95/p99 latency, DB round-trips per request and peak Python
+memory, and can save the results as a baseline or compare against one.
+
+Usage (from backend/):
+    python benchmarks/bench_chat.py --requests 500 --concurrency 20
+    python benchmarks/bench_chat.py --save-baseline
+    python benchmarks/bench_chat.py --baseline benchmarks/baselines/chat.json
+
+The database is dropped and recreated, so never point --database-url at a
+real database.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Add the parent directory to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "chat.json"
+SCENARIOS = ("process_message", "get_messages", "get_sessions")
+
+# Metrics compared against the baseline and whether higher values are worse
+METRICS = {
+    "throughput_rps": False,
+    "p50_ms": True,
+    "p95_ms": True,
+    "p99_ms": True,
+    "db_round_trips_per_request": True,
+    "peak_memory_kb": True
+}
+
+# Round-trips only vary with how concurrent requests interleave (e.g. whether
+# a session's history was still cached), so they get a much tighter tolerance
+ROUND_TRIP_TOLERANCE = 0.02
+
+# The slowest 1% of a few hundred requests is a handful of samples; reported
+# but too noisy to fail a run on
+UNGATED_METRICS = ("p99_ms",)
+
+# SQLite serializes writers, so the slowest 5% is dominated by how long the
+# unluckiest requests queued for the write lock and swings well past any
+# useful tolerance between identical runs
+SQLITE_UNGATED_METRICS = ("p95_ms",)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///./bench.db")
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append", help="Run only these scenarios")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--sessions-per-user", type=int, default=5)
+    parser.add_argument("--history", type=int, default=40, help="Seeded messages per session")
+    parser.add_argument("--fake-latency-ms", type=float, default=50.0, help="Median fake provider latency")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests before each scenario")
+    parser.add_argument("--baseline", type=Path, help="Compare against this baseline and fail on regressions")
+    parser.add_argument("--save-baseline", nargs="?", type=Path, const=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown vs. the baseline")
+    parser.add_argument("--output", type=Path, help="Also write the results as JSON here")
+    return parser.parse_args()
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Settings must be in the environment before the app is imported"""
+    os.environ.update({
+        "DATABASE_URL": args.database_url,
+        "DEBUG": "true",  # Lets TrustedHostMiddleware accept localhost
+        "AI_FAKE_PROVIDERS": json.dumps(["openai", "anthropic", "google"]),
+        "AI_FAKE_LATENCY_MEDIAN_MS": str(args.fake_latency_ms),
+        "AI_FAKE_ERROR_RATE": "0",
+        "AI_CACHE_ENABLED": "false",
+        "AI_CACHE_REDIS_ENABLED": "false",
+        "AI_JOB_REDIS_ENABLED": "false",
+        # Background compaction would add provider calls and writes at random points
+        "AI_SUMMARY_ENABLED": "false",
+        "LOG_LEVEL": "WARNING"
+    })
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def configure_sqlite(engine: Any) -> None:
+    """
+    Let concurrent requests share the SQLite file: WAL lets readers run
+    alongside the writer, and the busy timeout makes writers queue for the
+    lock instead of failing with "database is locked"
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA busy_timeout=30000")
+        cursor.close()
+
+
+class RoundTripCounter:
+    """Counts statements, commits and rollbacks sent to the database"""
+
+    def __init__(self, engine: Any):
+        from sqlalchemy import event
+
+        self.count = 0
+        for name in ("before_cursor_execute", "commit", "rollback"):
+            event.listen(engine.sync_engine, name, self._increment)
+
+    def _increment(self, *args: Any, **kwargs: Any) -> None:
+        self.count += 1
+
+
+async def seed(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Recreate the schema and create users with sessions and history; returns auth headers and session ids"""
+    from app.core.database import AsyncSessionLocal, Base, engine
+    from app.core.security import create_access_token
+    from app.models import AISession, Message, MessageRole, MessageType, User
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    fixtures = []
+    async with AsyncSessionLocal() as db:
+        for u in range(args.users):
+            user = User(
+                email=f"bench{u}@example.com",
+                username=f"bench{u}",
+                hashed_password="not-a-real-hash",
+                is_active=True
+            )
+            db.add(user)
+            await db.flush()
+
+            session_ids = []
+            for s in range(args.sessions_per_user):
+                session = AISession(
+                    user_id=user.id,
+                    title=f"Benchmark session {s}",
+                    ai_model="gemini-pro",
+                    total_messages=args.history
+                )
+                db.add(session)
+                await db.flush()
+                db.add_all([
+                    Message(
+                        session_id=session.id,
+                        user_id=user.id,
+                        content=f"Seeded message {m} " + "lorem ipsum dolor sit amet " * 8,
+                        role=MessageRole.USER if m % 2 == 0 else MessageRole.ASSISTANT,
+                        type=MessageType.TEXT
+                    )
+                    for m in range(args.history)
+                ])
+                session_ids.append(session.id)
+
+            fixtures.append({
+                "headers": {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"},
+                "session_ids": session_ids
+            })
+        await db.commit()
+    return fixtures
+
+
+def make_request(scenario: str, fixtures: List[Dict[str, Any]]) -> Callable[[Any, int], Any]:
+    """Request function ``(client, i) -> response`` for a scenario"""
+
+    def pick(i: int) -> Dict[str, Any]:
+        return fixtures[i % len(fixtures)]
+
+    if scenario == "process_message":
+        def request(client: Any, i: int) -> Any:
+            fixture = pick(i)
+            session_ids = fixture["session_ids"]
+            return client.post(
+                "/api/ai/process",
+                headers=fixture["headers"],
+                # Unique text so coalescing never merges requests
+                json={
+                    "message": f"Benchmark question {i}: summarize the conversation so far.",
+                    "session_id": session_ids[(i // len(fixtures)) % len(session_ids)],
+                    "task_type": "general"
+                }
+            )
+    elif scenario == "get_messages":
+        def request(client: Any, i: int) -> Any:
+            fixture = pick(i)
+            session_ids = fixture["session_ids"]
+            session_id = session_ids[(i // len(fixtures)) % len(session_ids)]
+            return client.get(f"/api/ai/sessions/{session_id}/messages", headers=fixture["headers"])
+    else:
+        def request(client: Any, i: int) -> Any:
+            return client.get("/api/ai/sessions", headers=pick(i)["headers"])
+
+    return request
+
+
+async def run_scenario(
+    scenario: str,
+    client: Any,
+    fixtures: List[Dict[str, Any]],
+    counter: RoundTripCounter,
+    args: argparse.Namespace
+) -> Dict[str, Any]:
+    request = make_request(scenario, fixtures)
+
+    for i in range(args.warmup):
+        await request(client, i)
+
+    latencies: List[float] = []
+    errors = 0
+    next_index = args.warmup
+
+    async def worker() -> None:
+        nonlocal next_index, errors
+        while next_index < args.warmup + args.requests:
+            i = next_index
+            next_index += 1
+            started = time.perf_counter()
+            response = await request(client, i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    round_trips_before = counter.count
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "db_round_trips_per_request": round((counter.count - round_trips_before) / len(latencies), 2),
+        "peak_memory_kb": round(peak / 1024)
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of ``results`` against ``baseline``, as messages"""
+    regressions = []
+    ungated = UNGATED_METRICS
+    if results.get("config", {}).get("database", "").startswith("sqlite"):
+        ungated += SQLITE_UNGATED_METRICS
+    for scenario, metrics in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if not previous:
+            continue
+        for metric, higher_is_worse in METRICS.items():
+            if metric in ungated:
+                continue
+            old, new = previous.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            allowed = ROUND_TRIP_TOLERANCE if metric == "db_round_trips_per_request" else tolerance
+            change = (new - old) / old if higher_is_worse else (old - new) / old
+            if change > allowed:
+                regressions.append(f"{scenario}.{metric}: {old} -> {new} ({change:+.0%} worse)")
+    return regressions
+
+
+def print_table(results: Dict[str, Any]) -> None:
+    columns = ["requests", "errors", *METRICS]
+    print(f"{'scenario':<18}" + "".join(f"{column:>28}" for column in columns))
+    for scenario, metrics in results["scenarios"].items():
+        print(f"{scenario:<18}" + "".join(f"{metrics[column]:>28}" for column in columns))
+
+
+async def main() -> int:
+    args = parse_args()
+    configure_environment(args)
+
+    import httpx
+
+    from app.api import ai_router as ai_api
+    from app.core.database import close_db, engine
+    from app.main import app, limiter as app_limiter
+    from app.services.rate_limiter import RateLimitScheduler
+
+    # Measure our own overhead, not per-IP API limits or provider RPM/TPM admission
+    app_limiter.enabled = False
+    ai_api.limiter.enabled = False
+    ai_api.ai_service.rate_limiter = RateLimitScheduler({})
+
+    if engine.dialect.name == "sqlite":
+        configure_sqlite(engine)
+    fixtures = await seed(args)
+    counter = RoundTripCounter(engine)
+
+    results = {
+        "config": {
+            "database": args.database_url.split("://", 1)[0],
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "sessions_per_user": args.sessions_per_user,
+            "history": args.history,
+            "fake_latency_ms": args.fake_latency_ms,
+            "python": platform.python_version()
+        },
+        "scenarios": {}
+    }
+
+    tracemalloc.start()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost", timeout=None) as client:
+        for scenario in args.scenario or SCENARIOS:
+            results["scenarios"][scenario] = await run_scenario(scenario, client, fixtures, counter, args)
+    tracemalloc.stop()
+    await close_db()
+
+    print_table(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.save_baseline.write_text(json.dumps(results, indent=2))
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if args.baseline and not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; record one with --save-baseline")
+    elif args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("config") != results["config"]:
+            print("\nWarning: baseline was recorded with a different configuration")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("\nNo regressions against baseline")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,106 @@
+"""
+Shared fixtures. The app is configured for offline runs (SQLite, fake AI
+providers, no Redis) before anything under ``app`` is imported.
+"""
+import os
+import tempfile
+
+_test_dir = tempfile.mkdtemp(prefix="ai-pc-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite+aiosqlite:///{_test_dir}/test.db",
+    # Every test runs in its own event loop, so connections must not be pooled across tests
+    "DB_POOL_MODE": "null",
+    "DEBUG": "true",  # Lets TrustedHostMiddleware accept the test client's host
+    "AI_FAKE_PROVIDERS": '["openai", "anthropic", "google"]',
+    "AI_FAKE_LATENCY_MEDIAN_MS": "5",
+    "AI_FAKE_LATENCY_SIGMA": "0",
+    "AI_FAKE_COMPLETION_TOKENS": "20",
+    "AI_CACHE_REDIS_ENABLED": "false",
+    "AI_JOB_REDIS_ENABLED": "false",
+    "AI_HISTORY_CACHE_REDIS_ENABLED": "false",
+    "AI_SUMMARY_ENABLED": "false",
+    "LOG_LEVEL": "WARNING"
+})
+
+from typing import Any, AsyncIterator, Dict  # noqa: E402
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+from app.core.database import AsyncSessionLocal, Base, engine  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.models import AISession, User  # noqa: E402
+from app.services.ai_service import AIRouter  # noqa: E402
+from app.services.history_cache import history_cache  # noqa: E402
+
+
+@pytest.fixture
+async def database() -> AsyncIterator[None]:
+    """A freshly created, empty schema"""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    # Session ids start over, so cached tails of earlier tests would look current
+    history_cache._entries.clear()
+    yield
+
+
+@pytest.fixture
+async def db(database: None) -> AsyncIterator[Any]:
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+async def user(db: Any) -> User:
+    user = User(email="alice@example.com", username="alice", hashed_password="not-a-real-hash", is_active=True)
+    db.add(user)
+    await db.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user: User) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+
+@pytest.fixture
+async def admin_headers(db: Any) -> Dict[str, str]:
+    admin = User(
+        email="admin@example.com",
+        username="admin",
+        hashed_password="not-a-real-hash",
+        is_active=True,
+        is_superuser=True
+    )
+    db.add(admin)
+    await db.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(admin.id)})}"}
+
+
+@pytest.fixture
+async def chat_session(db: Any, user: User) -> AISession:
+    session = AISession(user_id=user.id, title="Test session", ai_model="gemini-pro")
+    db.add(session)
+    await db.commit()
+    return session
+
+
+@pytest.fixture
+async def client(database: None) -> AsyncIterator[httpx.AsyncClient]:
+    """Client for the ASGI app with fresh per-IP rate limits"""
+    from app.api import ai_router, auth
+    from app.main import app, limiter
+
+    for rate_limiter in (limiter, ai_router.limiter, auth.limiter):
+        rate_limiter.reset()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        yield client
+
+
+@pytest.fixture
+def router() -> AIRouter:
+    """A fresh AIRouter (own breakers, stats and rate limits) on the fake providers"""
+    return AIRouter()
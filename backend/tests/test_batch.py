@@ -0,0 +1,87 @@
+"""
+Batch completions (POST /api/ai/batch)
+"""
+import asyncio
+
+from sqlalchemy import select
+
+from app.models import AISession, Message, MessageRole, User
+from app.services.ai_service import ai_router
+
+
+async def test_batch_reports_each_item_and_stores_one_session(client, auth_headers, db):
+    response = await client.post("/api/ai/batch", headers=auth_headers, json={
+        "items": [
+            {"message": "First prompt"},
+            {"message": "Second prompt", "model": "not-a-model"},
+            {"message": "Third prompt", "system_prompt": "Be brief"}
+        ]
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [result["index"] for result in body["results"]] == [0, 1, 2]
+    assert body["succeeded"] == 2
+    assert body["failed"] == 1
+    assert body["results"][1]["error"]
+    assert body["results"][0]["content"] and body["results"][2]["content"]
+    assert body["total_cost"] > 0
+
+    messages = (await db.execute(
+        select(Message).where(Message.session_id == body["session_id"]).order_by(Message.id)
+    )).scalars().all()
+    assert [msg.role for msg in messages] == [
+        MessageRole.USER, MessageRole.ASSISTANT,
+        MessageRole.USER, MessageRole.ERROR,
+        MessageRole.USER, MessageRole.ASSISTANT
+    ]
+    session = await db.get(AISession, body["session_id"])
+    assert session.title == "Batch: First prompt"
+    assert session.total_messages == 6
+    assert session.total_tokens_used == sum(
+        result["usage"]["total_tokens"] for result in body["results"] if result["usage"]
+    )
+
+
+async def test_batch_fan_out_is_bounded(client, auth_headers, monkeypatch):
+    generate = ai_router.generate_completion
+    running = 0
+    peak = 0
+
+    async def tracked(*args, **kwargs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            await asyncio.sleep(0.01)
+            return await generate(*args, **kwargs)
+        finally:
+            running -= 1
+
+    monkeypatch.setattr(ai_router, "generate_completion", tracked)
+
+    response = await client.post("/api/ai/batch", headers=auth_headers, json={
+        "items": [{"message": f"Prompt {i}"} for i in range(6)],
+        "concurrency": 2,
+        "bypass_cache": True
+    })
+
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 6
+    assert peak == 2
+
+
+async def test_batch_into_another_users_session_is_rejected(client, auth_headers, db):
+    bob = User(email="bob@example.com", username="bob", hashed_password="not-a-real-hash", is_active=True)
+    db.add(bob)
+    await db.flush()
+    other = AISession(user_id=bob.id, title="Not yours", ai_model="gemini-pro")
+    db.add(other)
+    await db.commit()
+
+    response = await client.post("/api/ai/batch", headers=auth_headers, json={
+        "items": [{"message": "Hello"}],
+        "session_id": other.id
+    })
+
+    assert response.status_code == 404
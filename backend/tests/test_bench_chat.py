@@ -0,0 +1,85 @@
+"""
+Baseline comparison of the chat benchmark (benchmarks/bench_chat.py)
+"""
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+BENCHMARKS = Path(__file__).parent.parent / "benchmarks"
+
+
+@pytest.fixture(scope="module")
+def bench():
+    spec = importlib.util.spec_from_file_location("bench_chat", BENCHMARKS / "bench_chat.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run(database="postgresql+asyncpg", **metrics):
+    defaults = {
+        "throughput_rps": 100.0,
+        "p50_ms": 50.0,
+        "p95_ms": 80.0,
+        "p99_ms": 120.0,
+        "db_round_trips_per_request": 4.0,
+        "peak_memory_kb": 5000
+    }
+    return {"config": {"database": database}, "scenarios": {"process_message": {**defaults, **metrics}}}
+
+
+def test_identical_runs_do_not_regress(bench):
+    assert bench.compare(run(), run(), tolerance=0.2) == []
+
+
+def test_slower_latency_beyond_tolerance_regresses(bench):
+    regressions = bench.compare(run(p95_ms=100.0), run(), tolerance=0.2)
+
+    assert regressions == ["process_message.p95_ms: 80.0 -> 100.0 (+25% worse)"]
+
+
+def test_lower_throughput_regresses_and_higher_does_not(bench):
+    assert bench.compare(run(throughput_rps=150.0), run(), tolerance=0.2) == []
+    assert len(bench.compare(run(throughput_rps=70.0), run(), tolerance=0.2)) == 1
+
+
+def test_round_trips_use_their_own_tolerance(bench):
+    assert bench.compare(run(db_round_trips_per_request=4.05), run(), tolerance=0.2) == []
+    assert len(bench.compare(run(db_round_trips_per_request=4.2), run(), tolerance=0.2)) == 1
+
+
+def test_p99_is_not_gated(bench):
+    assert bench.compare(run(p99_ms=1000.0), run(), tolerance=0.2) == []
+
+
+def test_p95_is_not_gated_on_sqlite(bench):
+    results = run(database="sqlite+aiosqlite", p95_ms=200.0, p50_ms=100.0)
+
+    assert bench.compare(results, run(database="sqlite+aiosqlite"), tolerance=0.2) == [
+        "process_message.p50_ms: 50.0 -> 100.0 (+100% worse)"
+    ]
+
+
+def test_scenarios_missing_from_the_baseline_are_skipped(bench):
+    results = {"scenarios": {"get_sessions": run()["scenarios"]["process_message"]}}
+
+    assert bench.compare(results, run(), tolerance=0.0) == []
+
+
+def test_committed_baseline_covers_every_scenario(bench):
+    baseline = json.loads(bench.DEFAULT_BASELINE.read_text())
+
+    assert set(baseline["scenarios"]) == set(bench.SCENARIOS)
+    for metrics in baseline["scenarios"].values():
+        assert metrics["errors"] == 0
+        assert set(bench.METRICS) <= set(metrics)
+
+
+def test_percentile_is_nearest_rank(bench):
+    samples = [float(i) for i in range(1, 101)]
+
+    assert bench.percentile(samples, 50) == 50.0
+    assert bench.percentile(samples, 99) == 99.0
+    assert bench.percentile([3.0], 95) == 3.0
@@ -0,0 +1,80 @@
+"""
+Bounded thread pool for blocking SDK calls
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.services.bounded_executor import BoundedExecutor, ExecutorQueueFullError
+
+
+@pytest.fixture
+def executor():
+    executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+    yield executor
+    executor.shutdown()
+
+
+async def wait_until(predicate):
+    for _ in range(200):
+        if predicate():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("condition not reached")
+
+
+async def test_runs_blocking_calls_off_the_loop(executor):
+    result = await executor.run(lambda a, b=0: (threading.current_thread().name, a + b), 1, b=2)
+
+    name, total = result
+    assert name.startswith("test")
+    assert total == 3
+    assert executor.stats()["completed"] == 1
+
+
+async def test_failures_are_counted_and_raised(executor):
+    def fail():
+        raise RuntimeError("sdk error")
+
+    with pytest.raises(RuntimeError):
+        await executor.run(fail)
+
+    assert executor.stats()["failed"] == 1
+    assert executor.stats()["active"] == 0
+
+
+async def test_calls_beyond_the_queue_bound_are_rejected(executor):
+    release = threading.Event()
+    running = asyncio.create_task(executor.run(release.wait))
+    await wait_until(lambda: executor.active == 1)
+    waiting = asyncio.create_task(executor.run(lambda: "queued"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ExecutorQueueFullError):
+        await executor.run(lambda: "rejected")
+
+    release.set()
+    assert await waiting == "queued"
+    await running
+    stats = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["active"] == stats["queued"] == 0
+
+
+async def test_cancelled_queued_calls_free_their_slot(executor):
+    release = threading.Event()
+    running = asyncio.create_task(executor.run(release.wait))
+    await wait_until(lambda: executor.active == 1)
+    waiting = asyncio.create_task(executor.run(lambda: "never"))
+    await asyncio.sleep(0)
+    assert executor.queued == 1
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    assert executor.queued == 0
+    release.set()
+    await running
@@ -0,0 +1,204 @@
+"""
+Cascade routing: cheap model first, escalation when its answer is rejected
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services import cascade
+from app.services.ai_service import AIModel
+from app.services.cascade import CONFIDENCE_INSTRUCTION, extract_confidence, run_acceptance_checks
+from app.services.provider_registry import ClientProvider, CompletionProvider
+from app.services.rate_limiter import Priority
+
+MESSAGES = [{"role": "user", "content": "Write a function that reverses a list"}]
+
+
+class ScriptedProvider(CompletionProvider):
+    """Answers every prompt with ``content`` (or raises ``error``) and remembers the prompts"""
+
+    def __init__(self, name, content="", error=None):
+        self.name = name
+        self.content = content
+        self.error = error
+        self.prompts = []
+
+    async def complete(self, messages, model, temperature, max_tokens):
+        self.prompts.append(messages)
+        if self.error:
+            raise self.error
+        return {
+            "content": self.content,
+            "model": model.value,
+            "provider": self.name,
+            "usage": {"prompt_tokens": 50, "completion_tokens": 100, "total_tokens": 150}
+        }
+
+    async def stream(self, messages, model, temperature, max_tokens):
+        result = await self.complete(messages, model, temperature, max_tokens)
+        yield {"type": "delta", "content": result["content"]}
+        yield {"type": "done", **result}
+
+
+@pytest.fixture
+def cheap_answers(router):
+    """Coding tasks escalate from gemini-pro (scripted) to gpt-4-turbo (fake)"""
+    def script(content="", error=None):
+        provider = ScriptedProvider("google", content, error)
+        router.providers.register("google", provider)
+        return provider
+    return script
+
+
+class RecordingGemini:
+    """Stands in for a GenerativeModel and remembers the prompts it is sent"""
+
+    def __init__(self, text):
+        self.text = text
+        self.prompts = []
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.prompts.append(prompt)
+        return SimpleNamespace(
+            text=self.text,
+            usage_metadata=SimpleNamespace(prompt_token_count=50, candidates_token_count=100, total_token_count=150)
+        )
+
+
+@pytest.fixture
+def gemini(router):
+    """gemini-pro served through the real Gemini adapter, with a recording model behind it"""
+    model = RecordingGemini("def reverse(items):\n    return items[::-1]\nConfidence: 95")
+    router.google_client = object()
+    router._gemini_models[AIModel.GEMINI_PRO] = model
+    router.providers.register("google", ClientProvider(
+        "google", router._google_completion, router._google_stream, lambda: True
+    ))
+    return model
+
+
+def test_extract_confidence():
+    assert extract_confidence("Reverse it with [::-1].\nConfidence: 85") == (85, "Reverse it with [::-1].")
+    assert extract_confidence("Done\n  confidence: 250%") == (100, "Done")
+    assert extract_confidence("No score here") == (None, "No score here")
+
+
+@pytest.mark.parametrize("content, reason", [
+    ("ok", "length:too_short"),
+    ("I'm unable to write code for that request, sorry.", "refusal:refusal"),
+    ("Use reversed(), but I'm not sure it works for tuples.", "uncertainty:uncertain"),
+    ("Use list.reverse() to reverse a list in place.", None)
+])
+def test_default_checks(content, reason):
+    checks = ["length", "refusal", "uncertainty"]
+
+    assert run_acceptance_checks(MESSAGES, {"content": content}, checks) == reason
+
+
+def test_custom_and_unknown_checks(monkeypatch):
+    monkeypatch.setattr(cascade, "acceptance_checks", dict(cascade.acceptance_checks))
+    cascade.register_acceptance_check(
+        "needs_code",
+        lambda messages, response: None if "def " in response["content"] else "no_code"
+    )
+
+    assert run_acceptance_checks(MESSAGES, {"content": "Just use slicing"}, ["needs_code"]) == "needs_code:no_code"
+    with pytest.raises(ValueError):
+        run_acceptance_checks(MESSAGES, {"content": "x"}, ["missing"])
+
+
+async def test_accepted_cheap_answer_is_returned(router, cheap_answers):
+    cheap_answers("def reverse(items):\n    return items[::-1]")
+
+    result = await router.generate_completion(MESSAGES, task_type="coding", use_cache=False, cascade=True)
+
+    assert result["model"] == AIModel.GEMINI_PRO.value
+    assert result["cascade"]["escalated"] is False
+    assert result["cascade"]["strong_model"] == AIModel.GPT_4_TURBO.value
+    assert result["cascade"]["savings"] > 0
+    assert "cascade_usage" not in result
+    assert router.get_cascade_stats()["acceptance_rate"] == 1.0
+
+
+async def test_rejected_cheap_answer_escalates_and_is_billed(router, cheap_answers):
+    cheap_answers("I can't help with writing code.")
+
+    result = await router.generate_completion(MESSAGES, task_type="coding", use_cache=False, cascade=True)
+
+    assert result["model"] == AIModel.GPT_4_TURBO.value
+    assert result["cascade"]["escalated"] is True
+    assert result["cascade"]["reason"] == "refusal:refusal"
+    assert result["cascade"]["savings"] < 0
+    assert result["cascade_usage"] == [
+        {"model": "gemini-pro", "usage": {"prompt_tokens": 50, "completion_tokens": 100, "total_tokens": 150}}
+    ]
+    strong_cost = router.calculate_cost(AIModel.GPT_4_TURBO, result["usage"])
+    assert router.calculate_response_cost(result) > strong_cost
+    assert router.get_cascade_stats()["escalated"] == 1
+
+
+async def test_failed_cheap_call_escalates(router, monkeypatch):
+    generate = router.generate_completion
+
+    async def cheap_model_fails(messages, model=None, *args, **kwargs):
+        # The cheap call, fallbacks included, ran out of providers
+        if model == AIModel.GEMINI_PRO:
+            raise RuntimeError("no provider available")
+        return await generate(messages, model, *args, **kwargs)
+
+    monkeypatch.setattr(router, "generate_completion", cheap_model_fails)
+
+    result = await router._generate_cascade(MESSAGES, 0.7, None, "coding", False, Priority.NORMAL)
+
+    assert result["model"] == AIModel.GPT_4_TURBO.value
+    assert result["cascade"]["reason"] == "error"
+    assert result["cascade"]["savings"] == 0
+    assert "cascade_usage" not in result
+
+
+async def test_confidence_check_asks_for_and_strips_a_score(router, cheap_answers, monkeypatch):
+    monkeypatch.setattr(settings, "AI_CASCADE_CHECKS", ["confidence"])
+    provider = cheap_answers("def reverse(items):\n    return items[::-1]\nConfidence: 95")
+
+    result = await router.generate_completion(MESSAGES, task_type="coding", use_cache=False, cascade=True)
+
+    assert provider.prompts[0][0] == {"role": "system", "content": CONFIDENCE_INSTRUCTION}
+    assert result["content"] == "def reverse(items):\n    return items[::-1]"
+    assert result["cascade"]["confidence"] == 95
+    assert result["cascade"]["escalated"] is False
+
+    provider.content = "Maybe reversed()\nConfidence: 30"
+    result = await router.generate_completion(MESSAGES, task_type="coding", use_cache=False, cascade=True)
+
+    assert result["cascade"]["reason"] == "confidence:low_confidence"
+    assert result["model"] == AIModel.GPT_4_TURBO.value
+
+
+async def test_cascade_is_off_unless_enabled_for_the_task(router, cheap_answers, monkeypatch):
+    provider = cheap_answers("def reverse(items):\n    return items[::-1]")
+    monkeypatch.setattr(settings, "AI_CASCADE_ENABLED", True)
+    monkeypatch.setattr(settings, "AI_CASCADE_TASK_TYPES", ["general"])
+
+    result = await router.generate_completion(MESSAGES, task_type="coding", use_cache=False)
+
+    assert "cascade" not in result
+    assert provider.prompts == []
+
+
+async def test_gemini_receives_the_confidence_instruction_as_an_instruction(router, gemini, monkeypatch):
+    monkeypatch.setattr(settings, "AI_CASCADE_CHECKS", ["confidence"])
+    messages = [
+        {"role": "system", "content": "Summary of the earlier conversation:\nThe user writes Python."},
+        *MESSAGES
+    ]
+
+    result = await router.generate_completion(messages, task_type="coding", use_cache=False, cascade=True)
+
+    assert gemini.prompts == [
+        f"{CONFIDENCE_INSTRUCTION}\n\n"
+        "Summary of the earlier conversation:\nThe user writes Python.\n\n"
+        "User: Write a function that reverses a list"
+    ]
+    assert "Assistant:" not in gemini.prompts[0]
+    assert result["cascade"]["confidence"] == 95
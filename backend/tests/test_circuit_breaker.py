@@ -0,0 +1,88 @@
+"""
+Per-provider circuit breakers and health-aware model selection
+"""
+from app.services.circuit_breaker import CircuitBreaker, CircuitState
+
+
+def breaker(**options) -> CircuitBreaker:
+    return CircuitBreaker("test", **{"min_calls": 4, "failure_rate_threshold": 0.5, **options})
+
+
+def test_stays_closed_below_min_calls():
+    cb = breaker()
+    for _ in range(3):
+        cb.record_failure()
+
+    assert cb.state == CircuitState.CLOSED
+    assert cb.is_available()
+
+
+def test_opens_at_the_failure_rate_threshold():
+    cb = breaker()
+    cb.record_success(0.1)
+    cb.record_success(0.1)
+    cb.record_failure()
+    cb.record_failure()
+
+    assert cb.state == CircuitState.OPEN
+    assert not cb.try_acquire()
+    assert cb.retry_after() > 0
+    assert cb.snapshot()["times_opened"] == 1
+
+
+def test_opens_on_slow_calls():
+    cb = breaker(slow_call_seconds=1.0, slow_call_rate_threshold=0.75)
+    for _ in range(3):
+        cb.record_success(2.0)
+    cb.record_success(0.1)
+
+    assert cb.state == CircuitState.OPEN
+
+
+def test_half_open_probe_success_closes():
+    cb = breaker(open_seconds=0)
+    for _ in range(4):
+        cb.record_failure()
+
+    assert cb.state == CircuitState.HALF_OPEN
+    assert cb.try_acquire()
+    # Only one probe at a time
+    assert not cb.try_acquire()
+    cb.record_success(0.1)
+
+    assert cb.state == CircuitState.CLOSED
+    assert cb.snapshot()["calls_in_window"] == 0
+
+
+def test_half_open_probe_failure_reopens():
+    cb = breaker(open_seconds=0)
+    for _ in range(4):
+        cb.record_failure()
+    assert cb.try_acquire()
+
+    cb.record_failure()
+
+    assert cb._state == CircuitState.OPEN
+    assert cb.times_opened == 2
+
+
+def test_released_probe_frees_the_slot():
+    cb = breaker(open_seconds=0)
+    for _ in range(4):
+        cb.record_failure()
+    assert cb.try_acquire()
+
+    cb.release()
+
+    assert cb.try_acquire()
+
+
+async def test_open_provider_is_skipped(router):
+    google = router.breakers[router.model_capabilities[router.task_model_map["general"][0]]["provider"]]
+    for _ in range(google.min_calls):
+        google.record_failure()
+
+    result = await router.generate_completion([{"role": "user", "content": "hi"}], task_type="general")
+
+    assert result["provider"] != "google"
+    assert router.get_provider_health()["google"]["state"] == "open"
@@ -0,0 +1,108 @@
+"""
+Two-tier completion cache and its use by AIRouter.generate_completion
+"""
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.services.completion_cache import CompletionCache
+
+
+class FakeRedis:
+    def __init__(self, fail: bool = False):
+        self.data = {}
+        self.fail = fail
+
+    async def get(self, key):
+        if self.fail:
+            raise ConnectionError("redis down")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.data[key] = value
+
+
+def test_key_ignores_whitespace_differences():
+    key = CompletionCache.make_key([{"role": "user", "content": "hello   world\n"}], "gpt-4", 0.7, 100)
+
+    assert key == CompletionCache.make_key([{"role": "user", "content": " hello world"}], "gpt-4", 0.7, 100)
+    assert key != CompletionCache.make_key([{"role": "user", "content": "hello world"}], "gpt-4", 0.2, 100)
+    assert key != CompletionCache.make_key([{"role": "user", "content": "hello world"}], "gpt-3.5-turbo", 0.7, 100)
+
+
+async def test_local_tier_evicts_least_recently_used():
+    cache = CompletionCache(max_entries=2)
+    await cache.set("a", {"content": "A"})
+    await cache.set("b", {"content": "B"})
+    await cache.get("a")
+    await cache.set("c", {"content": "C"})
+
+    assert await cache.get("a") == {"content": "A"}
+    assert await cache.get("b") is None
+    assert cache.stats()["local_entries"] == 2
+
+
+async def test_expired_entries_are_misses():
+    cache = CompletionCache(ttl_seconds=0)
+    await cache.set("a", {"content": "A"})
+
+    assert await cache.get("a") is None
+    assert cache.misses == 1
+
+
+async def test_redis_tier_backfills_the_local_tier():
+    cache = CompletionCache()
+    cache._redis = FakeRedis()
+    cache._redis.data[cache.key_prefix + "a"] = json.dumps({"content": "A"})
+
+    assert await cache.get("a") == {"content": "A"}
+    assert cache.redis_hits == 1
+    assert await cache.get("a") == {"content": "A"}
+    assert cache.redis_hits == 1  # Second hit served locally
+
+
+async def test_redis_errors_are_misses():
+    cache = CompletionCache()
+    cache._redis = FakeRedis(fail=True)
+
+    await cache.set("a", {"content": "A"})
+    cache._entries.clear()
+
+    assert await cache.get("a") is None
+    assert cache.redis_errors == 2
+
+
+@pytest.fixture
+def cache_enabled(monkeypatch, router):
+    monkeypatch.setattr(settings, "AI_CACHE_ENABLED", True)
+    router.cache = CompletionCache()
+    return router
+
+
+async def test_repeated_request_is_served_from_cache(cache_enabled):
+    router = cache_enabled
+    messages = [{"role": "user", "content": "What is a cache?"}]
+
+    first = await router.generate_completion(messages)
+    second = await router.generate_completion(messages)
+
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["content"] == first["content"]
+    assert router.providers.get(first["provider"]).calls == 1
+    # Cache hits are not billed
+    assert router.calculate_response_cost(second) == 0
+
+
+async def test_use_cache_false_bypasses_the_cache(cache_enabled):
+    router = cache_enabled
+    messages = [{"role": "user", "content": "What is a cache?"}]
+
+    first = await router.generate_completion(messages)
+    second = await router.generate_completion(messages, use_cache=False)
+
+    assert second["cached"] is False
+    assert router.providers.get(first["provider"]).calls == 2
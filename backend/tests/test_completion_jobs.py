@@ -0,0 +1,158 @@
+"""
+Background completion jobs (POST /api/ai/jobs)
+"""
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+
+from app.api.websocket import manager as ws_manager
+from app.core.security import create_access_token
+from app.models import AISession, Message, MessageRole, User
+from app.services.completion_jobs import CompletionJobManager, JobQueueFullError, JobStatus, completion_jobs
+
+
+@pytest.fixture
+async def jobs():
+    manager = CompletionJobManager(workers=1, max_queue=1)
+    manager.start()
+    yield manager
+    await manager.shutdown()
+
+
+@pytest.fixture
+async def job_workers():
+    """The app's job workers (ASGITransport does not run the lifespan)"""
+    completion_jobs.start()
+    yield completion_jobs
+    await completion_jobs.shutdown()
+
+
+async def wait_for_job(get, job_id):
+    for _ in range(200):
+        record = await get(job_id)
+        if record["status"] in (JobStatus.SUCCEEDED.value, JobStatus.FAILED.value):
+            return record
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+async def test_jobs_run_in_the_background_and_notify(jobs):
+    notified = []
+
+    async def handler():
+        return {"content": "done"}
+
+    async def notify(record):
+        notified.append(record)
+
+    record = await jobs.submit(7, handler, notify=notify, session_id=3)
+    assert record["status"] == JobStatus.QUEUED.value
+    assert record["session_id"] == 3
+
+    finished = await wait_for_job(jobs.get, record["job_id"])
+    assert finished["result"] == {"content": "done"}
+    assert finished["owner_id"] == 7
+    assert finished["started_at"] and finished["finished_at"]
+    assert notified == [finished]
+    assert jobs.stats()["succeeded"] == 1
+
+
+async def test_failed_jobs_record_the_error(jobs):
+    async def handler():
+        raise RuntimeError("provider down")
+
+    async def notify(record):
+        raise ConnectionError("client went away")
+
+    record = await jobs.submit(7, handler, notify=notify)
+
+    finished = await wait_for_job(jobs.get, record["job_id"])
+    assert finished["status"] == JobStatus.FAILED.value
+    assert finished["error"] == "provider down"
+    assert jobs.stats()["failed"] == 1
+
+
+async def test_submissions_beyond_the_queue_are_rejected(jobs):
+    release = asyncio.Event()
+
+    async def handler():
+        await release.wait()
+        return {}
+
+    await jobs.submit(7, handler)
+    await asyncio.sleep(0)  # the worker takes the first job
+    await jobs.submit(7, handler)
+
+    with pytest.raises(JobQueueFullError):
+        await jobs.submit(7, handler)
+
+    assert jobs.stats()["rejected"] == 1
+    release.set()
+
+
+async def test_submitting_without_workers_fails():
+    with pytest.raises(RuntimeError):
+        await CompletionJobManager().submit(7, lambda: None)
+
+
+async def test_job_reply_is_stored_and_polled(client, auth_headers, db, job_workers):
+    response = await client.post("/api/ai/jobs", headers=auth_headers, json={"message": "Summarize caching"})
+
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "queued"
+
+    async def poll(job_id):
+        response = await client.get(f"/api/ai/jobs/{job_id}", headers=auth_headers)
+        assert response.status_code == 200
+        return response.json()
+
+    finished = await wait_for_job(poll, job["job_id"])
+    assert finished["status"] == "succeeded"
+    assert finished["result"]["content"]
+    assert finished["result"]["session_id"] == job["session_id"]
+
+    messages = (await db.execute(
+        select(Message).where(Message.session_id == job["session_id"]).order_by(Message.id)
+    )).scalars().all()
+    assert [msg.role for msg in messages] == [MessageRole.USER, MessageRole.ASSISTANT]
+    session = await db.get(AISession, job["session_id"])
+    assert session.total_messages == 2
+
+
+async def test_jobs_are_private_to_their_owner(client, auth_headers, db, job_workers):
+    job = (await client.post("/api/ai/jobs", headers=auth_headers, json={"message": "Mine"})).json()
+    bob = User(email="bob@example.com", username="bob", hashed_password="not-a-real-hash", is_active=True)
+    db.add(bob)
+    await db.commit()
+
+    response = await client.get(
+        f"/api/ai/jobs/{job['job_id']}",
+        headers={"Authorization": f"Bearer {create_access_token({'sub': str(bob.id)})}"}
+    )
+
+    assert response.status_code == 404
+
+
+async def test_websocket_notice_carries_only_the_job_status(client, auth_headers, job_workers, monkeypatch):
+    sent = []
+
+    async def send_personal_message(message, client_id):
+        sent.append((client_id, json.loads(message)))
+
+    monkeypatch.setattr(ws_manager, "send_personal_message", send_personal_message)
+
+    job = (await client.post(
+        "/api/ai/jobs",
+        headers=auth_headers,
+        json={"message": "Notify me", "client_id": "tab-1"}
+    )).json()
+    for _ in range(200):
+        if sent:
+            break
+        await asyncio.sleep(0.01)
+
+    # Anyone can connect as a client_id, so the reply itself is only served to the owner over HTTP
+    assert sent == [("tab-1", {"type": "ai_job", "data": {"job_id": job["job_id"], "status": "succeeded"}})]
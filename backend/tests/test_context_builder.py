@@ -0,0 +1,66 @@
+"""
+Packing conversation history into a token budget
+"""
+from app.core.config import settings
+from app.services.context_builder import pack_history
+
+
+def count(message):
+    return len(message["content"])
+
+
+def turns(*contents):
+    return [{"role": "user", "content": content} for content in contents]
+
+
+def test_everything_fits():
+    messages, dropped = pack_history(turns("sys"), turns("aa", "bb", "cc"), 100, count)
+
+    assert messages == turns("sys", "aa", "bb", "cc")
+    assert dropped == 0
+
+
+def test_oldest_turns_are_dropped_first():
+    messages, dropped = pack_history([], turns("aaaa", "bbbb", "cccc"), 9, count)
+
+    assert messages == turns("bbbb", "cccc")
+    assert dropped == 1
+
+
+def test_system_messages_are_charged_first():
+    messages, dropped = pack_history(turns("system"), turns("aaaa", "bbbb"), 10, count)
+
+    assert messages == turns("system", "bbbb")
+    assert dropped == 1
+
+
+def test_packing_stops_at_the_first_turn_that_does_not_fit():
+    # "cc" would fit after "bbbbbb" is skipped, but history must stay contiguous
+    messages, dropped = pack_history([], turns("cc", "bbbbbb", "aa"), 5, count)
+
+    assert messages == turns("aa")
+    assert dropped == 2
+
+
+def test_newest_turn_is_kept_even_over_budget():
+    messages, dropped = pack_history([], turns("old", "a very long current message"), 3, count)
+
+    assert messages == turns("a very long current message")
+    assert dropped == 1
+
+
+async def test_long_sessions_report_dropped_turns(client, auth_headers, monkeypatch):
+    first = await client.post("/api/ai/process", headers=auth_headers, json={"message": "first " * 50})
+    session_id = first.json()["session_id"]
+    assert first.json()["dropped_turns"] == 0
+
+    monkeypatch.setattr(settings, "AI_CONTEXT_MAX_PROMPT_TOKENS", 60)
+    response = await client.post(
+        "/api/ai/process",
+        headers=auth_headers,
+        json={"message": "second", "session_id": session_id}
+    )
+
+    # The short fake reply still fits, the long first question does not
+    assert response.status_code == 200
+    assert response.json()["dropped_turns"] == 1
@@ -0,0 +1,137 @@
+"""
+Instrumented database connection pool and its settings
+"""
+import asyncio
+import math
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import InstrumentedQueuePool
+from app.services.ai_service import ai_router
+
+
+@pytest.fixture
+async def pooled_engine(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path}/pool.db",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05
+    )
+    yield engine
+    await engine.dispose()
+
+
+async def test_checkouts_are_counted_and_timed(pooled_engine):
+    for _ in range(3):
+        async with pooled_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    stats = pooled_engine.sync_engine.pool.stats()
+    assert stats["checkouts_total"] == 3
+    assert stats["checkout_wait_ms"]["samples"] == 3
+    assert stats["checkout_wait_ms"]["max"] >= stats["checkout_wait_ms"]["p50"] >= 0
+    assert stats["connections"] == stats["idle_connections"] == 1
+    assert stats["in_use"] == 0
+
+
+async def test_overflow_and_exhaustion(pooled_engine):
+    pool = pooled_engine.sync_engine.pool
+    first = await pooled_engine.connect()
+    second = await pooled_engine.connect()
+
+    stats = pool.stats()
+    assert stats["in_use"] == 2
+    assert stats["overflow"] == 1
+    assert stats["utilization"] == 1.0
+
+    with pytest.raises(PoolTimeoutError):
+        await pooled_engine.connect()
+    assert pool.stats()["checkout_timeouts"] == 1
+
+    await second.close()
+    await first.close()
+    assert pool.stats()["in_use"] == 0
+
+
+def test_engine_options_follow_the_pool_mode(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_MODE", "queue")
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 7)
+
+    options = database._engine_options("sqlite+aiosqlite:///./app.db")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_size"] == 7
+
+    monkeypatch.setattr(settings, "DB_POOL_MODE", "null")
+    assert database._engine_options("sqlite+aiosqlite:///./app.db")["poolclass"] is NullPool
+
+
+def test_pgbouncer_disables_prepared_statement_caches(monkeypatch):
+    monkeypatch.setattr(settings, "DB_PGBOUNCER", True)
+
+    options = database._engine_options("postgresql+asyncpg://app@localhost/app")
+    assert options["connect_args"]["statement_cache_size"] == 0
+    assert options["connect_args"]["prepared_statement_cache_size"] == 0
+    names = {options["connect_args"]["prepared_statement_name_func"]() for _ in range(2)}
+    assert len(names) == 2
+
+    assert "connect_args" not in database._engine_options("sqlite+aiosqlite:///./app.db")
+
+
+async def test_pool_stats_endpoint(client, auth_headers, admin_headers, monkeypatch):
+    monkeypatch.setattr(database, "_recent_writes", {})
+    assert (await client.get("/api/ai/db/stats", headers=auth_headers)).status_code == 403
+
+    response = await client.get("/api/ai/db/stats", headers=admin_headers)
+
+    assert response.status_code == 200
+    # The tests run without a pool (DB_POOL_MODE=null)
+    assert response.json() == {"pgbouncer": False, "mode": "null", "replicas": [], "sticky_users": 0}
+
+
+@pytest.fixture
+async def app_pool(client, monkeypatch):
+    """Serve the app from a two-connection pool on the test database"""
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        poolclass=InstrumentedQueuePool,
+        pool_size=2,
+        max_overflow=0,
+        pool_timeout=1
+    )
+    monkeypatch.setattr(database, "engine", engine)
+    yield engine
+    await engine.dispose()
+
+
+async def test_provider_calls_do_not_hold_connections(client, auth_headers, app_pool, monkeypatch):
+    for name in ("openai", "anthropic", "google"):
+        monkeypatch.setattr(ai_router.providers.get(name), "latency_median_ms", 1500)
+
+    responses = await asyncio.gather(*(
+        client.post("/api/ai/process", headers=auth_headers, json={"message": f"Question {i}", "bypass_cache": True})
+        for i in range(6)
+    ))
+
+    assert [response.status_code for response in responses] == [200] * 6
+    assert app_pool.sync_engine.pool.stats()["checkout_timeouts"] == 0
+
+
+async def test_exhausted_pool_is_a_503(client, auth_headers, app_pool, monkeypatch):
+    monkeypatch.setattr(app_pool.sync_engine.pool, "_timeout", 0.05)
+    held = [await app_pool.connect() for _ in range(2)]
+    try:
+        response = await client.post("/api/ai/process", headers=auth_headers, json={"message": "Hello"})
+    finally:
+        for conn in held:
+            await conn.close()
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(math.ceil(settings.DB_POOL_TIMEOUT))
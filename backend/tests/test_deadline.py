@@ -0,0 +1,146 @@
+"""
+Request deadlines propagated through completion calls
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.services.ai_service import ai_router
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.deadline import Deadline, DeadlineExceeded
+from app.services.rate_limiter import AdmissionTimeoutError
+from app.services.whisper_service import whisper_service
+
+MESSAGES = [{"role": "user", "content": "Take your time"}]
+
+
+@pytest.fixture
+def slow_providers(monkeypatch):
+    def slow(router):
+        for name in ("openai", "anthropic", "google"):
+            monkeypatch.setattr(router.providers.get(name), "latency_median_ms", 500)
+        return router
+    return slow
+
+
+@pytest.fixture
+def transcription(monkeypatch):
+    """Whisper answers after ``seconds``"""
+    def transcribe(seconds=0.0):
+        async def transcribe_audio(audio_file, filename, language=None, prompt=None):
+            await asyncio.sleep(seconds)
+            return {"transcription": "Take your time", "duration": 3.0, "language": "en"}
+        monkeypatch.setattr(whisper_service, "transcribe_audio", transcribe_audio)
+    return transcribe
+
+
+def post_voice(client, headers):
+    return client.post("/api/voice/process", headers=headers, files={"audio": ("note.wav", b"RIFF", "audio/wav")})
+
+
+def test_cap_and_check():
+    deadline = Deadline(10)
+
+    assert deadline.cap(2) == 2
+    assert 9 < deadline.cap(None) <= 10
+    deadline.check("routing")
+
+    expired = Deadline(0)
+    assert expired.expired
+    assert expired.cap(5) == 0
+    with pytest.raises(DeadlineExceeded) as info:
+        expired.check("routing")
+    assert info.value.stage == "routing"
+
+
+async def test_run_times_out_with_the_remaining_budget():
+    deadline = Deadline(0.05)
+
+    with pytest.raises(DeadlineExceeded) as info:
+        await deadline.run(asyncio.sleep(1), "provider call")
+
+    assert info.value.stage == "provider call"
+    assert info.value.budget == 0.05
+    assert await Deadline(1).run(asyncio.sleep(0, result="done"), "provider call") == "done"
+
+
+async def test_run_on_an_expired_deadline_does_not_start_the_call():
+    started = False
+
+    async def call():
+        nonlocal started
+        started = True
+
+    with pytest.raises(DeadlineExceeded):
+        await Deadline(0).run(call(), "provider call")
+
+    assert started is False
+
+
+async def test_inner_timeouts_are_not_mistaken_for_the_deadline():
+    async def call():
+        async with asyncio.timeout(0.01):
+            await asyncio.sleep(1)
+
+    with pytest.raises(TimeoutError):
+        await Deadline(5).run(call(), "provider call")
+
+
+async def test_fallbacks_stop_at_the_deadline(router, slow_providers):
+    slow_providers(router)
+    started = time.monotonic()
+
+    with pytest.raises(DeadlineExceeded):
+        await router.generate_completion(MESSAGES, use_cache=False, deadline=Deadline(0.1))
+
+    assert time.monotonic() - started < 0.4
+
+
+async def test_client_timeout_header_yields_504(client, auth_headers, slow_providers):
+    slow_providers(ai_router)
+
+    response = await client.post(
+        "/api/ai/process",
+        headers={**auth_headers, "X-Request-Timeout": "0.1"},
+        json={"message": "Take your time", "bypass_cache": True}
+    )
+
+    assert response.status_code == 504
+
+
+async def test_invalid_timeout_header_is_rejected(client, auth_headers):
+    response = await client.post(
+        "/api/ai/process",
+        headers={**auth_headers, "X-Request-Timeout": "soon"},
+        json={"message": "Hello"}
+    )
+
+    assert response.status_code == 400
+
+
+async def test_voice_deadline_includes_transcription(client, auth_headers, transcription):
+    # The reply alone would fit in the budget; transcription already used it up
+    transcription(seconds=0.2)
+
+    response = await post_voice(client, {**auth_headers, "X-Request-Timeout": "0.1"})
+
+    assert response.status_code == 504
+
+
+@pytest.mark.parametrize("error, status_code", [
+    (AdmissionTimeoutError("gpt-3.5-turbo", 2.0), 429),
+    (CircuitOpenError("openai", 2.0), 503)
+])
+async def test_voice_capacity_errors_match_process(client, auth_headers, transcription, monkeypatch, error, status_code):
+    transcription()
+
+    async def unavailable(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(ai_router, "generate_completion", unavailable)
+
+    response = await post_voice(client, auth_headers)
+
+    assert response.status_code == status_code
+    assert response.headers["Retry-After"] == "2"
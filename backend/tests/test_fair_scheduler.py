@@ -0,0 +1,139 @@
+"""
+Weighted fair scheduling of completions across users
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services.fair_scheduler import FairScheduler, weight_for_user
+from app.services.rate_limiter import AdmissionTimeoutError
+
+
+async def run_in_grant_order(scheduler, jobs):
+    """
+    Queue ``jobs`` (name, user_id, weight, cost) behind a slot held by user 0,
+    release it and return the names in the order their slots were granted
+    """
+    order = []
+
+    async def job(name, user_id, weight, cost):
+        async with scheduler.slot(user_id, weight=weight, cost=cost, max_wait=5):
+            order.append(name)
+
+    release = asyncio.Event()
+
+    async def holder():
+        async with scheduler.slot(0):
+            await release.wait()
+
+    holding = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+    tasks = []
+    for spec in jobs:
+        tasks.append(asyncio.create_task(job(*spec)))
+        await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.gather(holding, *tasks)
+    return order
+
+
+async def test_users_take_turns():
+    scheduler = FairScheduler(max_concurrent=1, per_user_limit=1, quantum=100)
+
+    order = await run_in_grant_order(scheduler, [
+        ("a1", 1, 1.0, 10),
+        ("a2", 1, 1.0, 10),
+        ("a3", 1, 1.0, 10),
+        ("b1", 2, 1.0, 10)
+    ])
+
+    assert order == ["a1", "b1", "a2", "a3"]
+    assert scheduler.pending() == 0
+
+
+async def test_expensive_jobs_wait_for_enough_credit():
+    scheduler = FairScheduler(max_concurrent=1, per_user_limit=1, quantum=100)
+
+    order = await run_in_grant_order(scheduler, [
+        ("heavy", 1, 1.0, 300),
+        ("light-1", 2, 1.0, 100),
+        ("light-2", 2, 1.0, 100)
+    ])
+
+    # The heavy prompt needs three visits' worth of credit
+    assert order == ["light-1", "light-2", "heavy"]
+
+
+async def test_weights_scale_each_users_credit():
+    scheduler = FairScheduler(max_concurrent=1, per_user_limit=1, quantum=100)
+
+    order = await run_in_grant_order(scheduler, [
+        ("standard", 1, 1.0, 200),
+        ("staff", 2, 2.0, 200)
+    ])
+
+    assert order == ["staff", "standard"]
+
+
+async def test_per_user_limit_leaves_slots_for_others():
+    scheduler = FairScheduler(max_concurrent=3, per_user_limit=1, quantum=100)
+    release = asyncio.Event()
+
+    async def job(user_id):
+        async with scheduler.slot(user_id, max_wait=5):
+            await release.wait()
+
+    tasks = [asyncio.create_task(job(user_id)) for user_id in (1, 1, 2)]
+    await asyncio.sleep(0)
+
+    stats = scheduler.stats()
+    assert stats["in_flight"] == 2
+    assert stats["users"][1] == {"queued": 1, "in_flight": 1}
+    assert stats["users"][2] == {"queued": 0, "in_flight": 1}
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert scheduler.stats()["in_flight"] == 0
+
+
+async def test_waiting_too_long_times_out_and_leaves_the_queue():
+    scheduler = FairScheduler(max_concurrent=1, per_user_limit=1, quantum=100)
+
+    async with scheduler.slot(1):
+        with pytest.raises(AdmissionTimeoutError) as info:
+            async with scheduler.slot(2, max_wait=0.01):
+                pass
+
+        assert info.value.key == "user:2"
+        assert scheduler.stats()["queued"] == 0
+
+    assert scheduler.pending() == 0
+
+
+async def test_cancelled_waiters_leave_the_queue():
+    scheduler = FairScheduler(max_concurrent=1, per_user_limit=1, quantum=100)
+
+    async def waiter():
+        async with scheduler.slot(2, max_wait=5):
+            pass
+
+    async with scheduler.slot(1):
+        task = asyncio.create_task(waiter())
+        await asyncio.sleep(0)
+        assert scheduler.stats()["queued"] == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert scheduler.stats()["queued"] == 0
+
+    assert scheduler.pending() == 0
+
+
+def test_weight_for_user(monkeypatch):
+    monkeypatch.setattr(settings, "AI_FAIR_PLAN_WEIGHTS", {"standard": 1.0, "staff": 4.0})
+
+    assert weight_for_user(SimpleNamespace(is_superuser=False)) == 1.0
+    assert weight_for_user(SimpleNamespace(is_superuser=True)) == 4.0
@@ -0,0 +1,81 @@
+"""
+Hedged requests for latency-sensitive task types
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.core.config import settings
+
+MESSAGES = [{"role": "user", "content": "Quick one"}]
+
+
+@pytest.fixture
+def hedging(monkeypatch, router):
+    monkeypatch.setattr(settings, "AI_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "AI_HEDGE_DEFAULT_DELAY_MS", 10)
+    monkeypatch.setattr(settings, "AI_HEDGE_MIN_DELAY_MS", 10)
+    monkeypatch.setattr(settings, "AI_HEDGE_MAX_RATE", 1.0)
+    # The primary for quick_response (gemini-pro) is slow, the hedge (gpt-3.5-turbo) fast
+    router.providers.get("google").latency_median_ms = 200
+    router.providers.get("openai").latency_median_ms = 5
+    return router
+
+
+async def test_slow_primary_is_hedged(hedging):
+    result = await hedging.generate_completion(MESSAGES, task_type="quick_response", use_cache=False)
+
+    assert result["provider"] == "openai"
+    assert result["hedged"] is True
+    # The cancelled primary was sent, so its prompt is billed
+    assert [usage["model"] for usage in result["auxiliary_usage"]] == ["gemini-pro"]
+    assert len(hedging._hedges_sent) == 1
+
+
+async def test_hedge_cancelled_during_admission_is_not_counted(hedging, monkeypatch):
+    hedging.providers.get("google").latency_median_ms = 50
+    acquire = hedging.rate_limiter.acquire
+
+    async def stalled_acquire(key, *args, **kwargs):
+        if key == "gpt-3.5-turbo":
+            await asyncio.sleep(10)
+        return await acquire(key, *args, **kwargs)
+
+    monkeypatch.setattr(hedging.rate_limiter, "acquire", stalled_acquire)
+
+    result = await hedging.generate_completion(MESSAGES, task_type="quick_response", use_cache=False)
+
+    assert result["provider"] == "google"
+    assert "hedged" not in result
+    assert result.get("auxiliary_usage", []) == []
+    assert len(hedging._hedges_sent) == 0
+    assert hedging.providers.get("openai").calls == 0
+
+
+async def test_hedges_are_capped(hedging, monkeypatch):
+    monkeypatch.setattr(settings, "AI_HEDGE_MAX_RATE", 0.0)
+
+    result = await hedging.generate_completion(MESSAGES, task_type="quick_response", use_cache=False)
+
+    assert result["provider"] == "google"
+    assert "hedged" not in result
+
+
+async def test_other_task_types_are_not_hedged(hedging):
+    result = await hedging.generate_completion(MESSAGES, task_type="general", use_cache=False)
+
+    assert "hedged" not in result
+    assert hedging.providers.get("openai").calls == 0
+
+
+async def test_fast_primaries_do_not_grow_the_hedge_window(hedging, monkeypatch):
+    hedging.providers.get("google").latency_median_ms = 1
+    monkeypatch.setattr(settings, "AI_HEDGE_DEFAULT_DELAY_MS", 1000)
+    hedging._hedge_eligible.extend([time.monotonic() - 120] * 100)  # Outside the window
+
+    for _ in range(3):
+        result = await hedging.generate_completion(MESSAGES, task_type="quick_response", use_cache=False)
+        assert "hedged" not in result
+
+    assert len(hedging._hedge_eligible) == 3
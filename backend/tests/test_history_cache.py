@@ -0,0 +1,191 @@
+"""
+Versioned cache of each session's recent turns, and atomic session counters
+"""
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import AISession, Message, MessageRole
+from app.services.ai_service import ai_router
+from app.services.history_cache import SessionHistoryCache, history_cache
+from app.services.session_stats import add_session_usage
+
+
+def turn(id, role="user"):
+    return {"id": id, "role": role, "content": f"Turn {id}"}
+
+
+class FailingRedis:
+    async def get(self, key):
+        raise ConnectionError("redis down")
+
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("redis down")
+
+    async def delete(self, key):
+        raise ConnectionError("redis down")
+
+
+async def test_entries_are_served_only_at_their_version():
+    cache = SessionHistoryCache()
+    await cache.set(1, 2, [turn(1), turn(2, "assistant")])
+
+    assert await cache.get(1, 2) == [turn(1), turn(2, "assistant")]
+    assert await cache.get(1, 3) is None
+    assert await cache.get(2, 2) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["stale"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+async def test_appends_advance_the_version():
+    cache = SessionHistoryCache(max_messages=3)
+    await cache.set(1, 2, [turn(1), turn(2)])
+
+    await cache.append(1, 2, 4, [turn(3), turn(4)])
+
+    # Only the newest max_messages turns are kept
+    assert await cache.get(1, 4) == [turn(2), turn(3), turn(4)]
+
+
+async def test_append_after_a_missed_write_drops_the_entry():
+    cache = SessionHistoryCache()
+    await cache.set(1, 2, [turn(1), turn(2)])
+
+    await cache.append(1, 3, 4, [turn(4)])
+
+    assert await cache.get(1, 2) is None
+    assert await cache.get(1, 4) is None
+
+
+async def test_record_keeps_only_prompt_history():
+    cache = SessionHistoryCache()
+    await cache.set(1, 1, [turn(1)])
+    session = AISession(id=1, total_messages=3)
+    new = [
+        Message(id=2, role=MessageRole.ERROR, content="Error: provider down"),
+        Message(id=3, role=MessageRole.ASSISTANT, content="Turn 3")
+    ]
+
+    await cache.record(session, new)
+
+    assert await cache.get(1, 3) == [turn(1), turn(3, "assistant")]
+
+
+async def test_least_recently_used_sessions_are_evicted():
+    cache = SessionHistoryCache(max_sessions=2)
+    await cache.set(1, 1, [turn(1)])
+    await cache.set(2, 1, [turn(1)])
+    await cache.get(1, 1)
+    await cache.set(3, 1, [turn(1)])
+
+    assert await cache.get(2, 1) is None
+    assert await cache.get(1, 1) is not None
+
+
+async def test_expired_entries_are_misses():
+    cache = SessionHistoryCache(ttl_seconds=0)
+    await cache.set(1, 1, [turn(1)])
+
+    assert await cache.get(1, 1) is None
+
+
+async def test_disabled_cache_stores_nothing(monkeypatch):
+    monkeypatch.setattr(settings, "AI_HISTORY_CACHE_ENABLED", False)
+    cache = SessionHistoryCache()
+    await cache.set(1, 1, [turn(1)])
+
+    assert await cache.get(1, 1) is None
+    assert cache.stats()["local_sessions"] == 0
+
+
+async def test_redis_errors_are_misses():
+    cache = SessionHistoryCache()
+    cache._redis = FailingRedis()
+
+    await cache.set(1, 1, [turn(1)])
+    await cache.invalidate(1)
+
+    assert await cache.get(1, 1) is None
+    assert cache.stats()["redis_errors"] == 3
+
+
+async def test_concurrent_usage_updates_add_up(chat_session):
+    async with AsyncSessionLocal() as first, AsyncSessionLocal() as second:
+        # Both requests loaded the session before either wrote
+        one = await first.get(AISession, chat_session.id)
+        two = await second.get(AISession, chat_session.id)
+
+        assert await add_session_usage(first, one, messages=2, tokens=100, cost=3) == 2
+        await first.commit()
+        assert await add_session_usage(second, two, messages=1, tokens=50, cost=1) == 3
+        await second.commit()
+
+        # The loaded objects hold the new totals without another query
+        assert (two.total_messages, two.total_tokens_used, two.total_cost) == (3, 150, 4)
+
+    async with AsyncSessionLocal() as db:
+        session = await db.get(AISession, chat_session.id)
+        assert (session.total_messages, session.total_tokens_used, session.total_cost) == (3, 150, 4)
+
+
+async def test_follow_up_turns_are_served_from_the_cache(client, auth_headers, monkeypatch):
+    prompts = []
+    generate = ai_router.generate_completion
+
+    async def capture(messages, *args, **kwargs):
+        prompts.append([msg["content"] for msg in messages])
+        return await generate(messages, *args, **kwargs)
+
+    monkeypatch.setattr(ai_router, "generate_completion", capture)
+
+    first = await client.post("/api/ai/process", headers=auth_headers, json={"message": "One"})
+    session_id = first.json()["session_id"]
+    for message in ("Two", "Three"):
+        response = await client.post(
+            "/api/ai/process",
+            headers=auth_headers,
+            json={"message": message, "session_id": session_id}
+        )
+        assert response.status_code == 200
+
+    # Loaded from the database for "Two", then kept current by write-through
+    assert history_cache.stats()["hits"] >= 1
+    assert await history_cache.get(session_id, 6) is not None
+    assert prompts[2][0] == "One"
+    assert prompts[2][2] == "Two"
+    assert prompts[2][-1] == "Three"
+    assert len(prompts[2]) == 5
+
+
+async def test_writes_the_cache_did_not_see_fall_back_to_the_database(client, auth_headers, db, chat_session):
+    response = await client.post(
+        "/api/ai/process",
+        headers=auth_headers,
+        json={"message": "First", "session_id": chat_session.id}
+    )
+    assert response.status_code == 200
+    await client.post(
+        "/api/ai/process",
+        headers=auth_headers,
+        json={"message": "Second", "session_id": chat_session.id}
+    )
+
+    # Another process adds a turn and bumps the counter without touching this cache
+    db.add(Message(
+        session_id=chat_session.id,
+        user_id=chat_session.user_id,
+        content="Elsewhere",
+        role=MessageRole.USER
+    ))
+    await add_session_usage(db, chat_session, messages=1)
+    await db.commit()
+
+    stale_before = history_cache.stats()["stale"]
+    await client.post(
+        "/api/ai/process",
+        headers=auth_headers,
+        json={"message": "Third", "session_id": chat_session.id}
+    )
+
+    assert history_cache.stats()["stale"] == stale_before + 1
+    entry = await history_cache.get(chat_session.id, chat_session.total_messages + 2)
+    assert "Elsewhere" in [turn["content"] for turn in entry]
@@ -0,0 +1,92 @@
+"""
+Shared, instrumented HTTP pool for provider clients
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.http_client import InstrumentedTransport
+
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nContent-Type: text/plain\r\n\r\nok"
+
+
+@pytest.fixture
+async def server():
+    """A local HTTP/1.1 server that keeps connections alive; yields its URL and connection counters"""
+    connections = {"opened": 0, "open": 0, "peak_open": 0}
+
+    async def handle(reader, writer):
+        connections["opened"] += 1
+        connections["open"] += 1
+        connections["peak_open"] = max(connections["peak_open"], connections["open"])
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                writer.write(RESPONSE)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            connections["open"] -= 1
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}", connections
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.fixture
+async def transport():
+    transport = InstrumentedTransport(limits=httpx.Limits(max_connections=4, max_keepalive_connections=4))
+    yield transport
+    await transport.aclose()
+
+
+async def test_sequential_requests_reuse_one_connection(server, transport):
+    url, connections = server
+    async with httpx.AsyncClient(transport=transport) as client:
+        for _ in range(3):
+            response = await client.get(url)
+            assert response.text == "ok"
+
+        stats = transport.stats()
+
+    assert connections["opened"] == 1
+    assert stats["connections"] == 1
+    assert stats["idle_connections"] == 1
+    assert stats["utilization"] == 0.0
+    assert stats["requests_total"] == 3
+    assert stats["requests_in_flight"] == 0
+    assert stats["peak_requests_in_flight"] == 1
+
+
+async def test_concurrent_requests_are_capped_by_the_pool(server, transport):
+    url, connections = server
+    async with httpx.AsyncClient(transport=transport) as client:
+        responses = await asyncio.gather(*(client.get(url) for _ in range(10)))
+
+    assert all(response.status_code == 200 for response in responses)
+    assert connections["peak_open"] <= 4
+    assert transport.stats()["requests_total"] == 10
+
+
+async def test_connection_errors_are_counted(transport):
+    async with httpx.AsyncClient(transport=transport) as client:
+        with pytest.raises(httpx.ConnectError):
+            # Port 9 (discard) is closed on test machines
+            await client.get("http://127.0.0.1:9")
+
+    stats = transport.stats()
+    assert stats["errors_total"] == 1
+    assert stats["requests_in_flight"] == 0
+
+
+async def test_pool_stats_are_admin_only(client, auth_headers, admin_headers):
+    assert (await client.get("/api/ai/http/stats", headers=auth_headers)).status_code == 403
+
+    response = await client.get("/api/ai/http/stats", headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.json()["max_connections"] == 100
@@ -0,0 +1,78 @@
+"""
+Load shedding of new AI work by priority
+"""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.models import AISession
+from app.services.load_shedder import LoadShedder, OverloadedError, load_shedder
+from app.services.rate_limiter import Priority
+
+
+def shedder(pending=0, oldest_wait=0.0):
+    scheduler = SimpleNamespace(pending=lambda: pending, oldest_wait=lambda: oldest_wait)
+    return LoadShedder(scheduler, max_pending=100, max_queue_wait=10.0)
+
+
+@pytest.fixture(autouse=True)
+def fractions(monkeypatch):
+    monkeypatch.setattr(settings, "AI_SHED_PRIORITY_FRACTIONS", {"low": 0.5, "normal": 0.8, "high": 1.0})
+
+
+def test_idle_service_admits_everything():
+    idle = shedder()
+
+    for priority in Priority:
+        idle.check(priority)
+
+    assert idle.stats()["admitted"] == 3
+
+
+@pytest.mark.parametrize("pending, shed", [
+    (49, []),
+    (50, ["low"]),
+    (80, ["low", "normal"]),
+    (100, ["low", "normal", "high"])
+])
+def test_pending_completions_shed_low_priority_first(pending, shed):
+    busy = shedder(pending=pending)
+
+    rejected = []
+    for priority in Priority:
+        try:
+            busy.check(priority)
+        except OverloadedError:
+            rejected.append(priority.name.lower())
+
+    assert sorted(rejected) == sorted(shed)
+    assert busy.stats()["shed"] == {name: int(name in shed) for name in ("high", "normal", "low")}
+
+
+def test_long_queue_waits_shed_with_a_retry_hint():
+    backed_up = shedder(oldest_wait=8.5)
+
+    backed_up.check(Priority.HIGH)
+    with pytest.raises(OverloadedError) as info:
+        backed_up.check(Priority.NORMAL)
+
+    assert info.value.reason == "queue wait too long"
+    assert info.value.retry_after == 8.5
+
+
+def test_shedding_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "AI_SHED_ENABLED", False)
+
+    shedder(pending=1000).check(Priority.LOW)
+
+
+async def test_overloaded_service_answers_503_before_touching_the_database(client, auth_headers, db, monkeypatch):
+    monkeypatch.setattr(load_shedder, "max_pending", 0)
+
+    response = await client.post("/api/ai/process", headers=auth_headers, json={"message": "Hello"})
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert (await db.execute(select(func.count()).select_from(AISession))).scalar() == 0
@@ -0,0 +1,118 @@
+"""
+Keyset (cursor) pagination of sessions and messages
+"""
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert
+
+from app.models import AISession, Message, MessageRole
+from app.services.pagination import InvalidCursorError, decode_cursor, encode_cursor, keyset_page
+
+T0 = datetime(2024, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+@pytest.fixture
+async def messages(db, chat_session):
+    """Seven messages; the middle three share one created_at"""
+    offsets = [0, 1, 2, 2, 2, 3, 4]
+    await db.execute(insert(Message), [
+        {
+            "session_id": chat_session.id,
+            "user_id": chat_session.user_id,
+            "content": f"Message {i}",
+            "role": MessageRole.USER,
+            "created_at": T0 + timedelta(seconds=offset)
+        }
+        for i, offset in enumerate(offsets)
+    ])
+    await db.commit()
+    return chat_session
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42)) == 42
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", raw_cursor(["42"]), raw_cursor([True]), raw_cursor([1, 2]), ""])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
+def test_before_and_after_are_exclusive():
+    with pytest.raises(InvalidCursorError):
+        keyset_page(None, [Message.created_at, Message.id], 10, before=encode_cursor(1), after=encode_cursor(2))
+
+
+async def test_walking_back_visits_every_message_once(client, auth_headers, messages):
+    url = f"/api/ai/sessions/{messages.id}/messages"
+    response = await client.get(url, headers=auth_headers, params={"latest": "true", "limit": 3})
+    pages = [[msg["content"] for msg in response.json()]]
+
+    while "X-Before-Cursor" in response.headers:
+        response = await client.get(url, headers=auth_headers, params={
+            "before": response.headers["X-Before-Cursor"],
+            "limit": 3
+        })
+        assert response.status_code == 200
+        if response.json():
+            pages.append([msg["content"] for msg in response.json()])
+
+    assert pages == [
+        ["Message 4", "Message 5", "Message 6"],
+        ["Message 1", "Message 2", "Message 3"],
+        ["Message 0"]
+    ]
+
+
+async def test_after_cursor_returns_newer_messages_oldest_first(client, auth_headers, messages):
+    url = f"/api/ai/sessions/{messages.id}/messages"
+    first = await client.get(url, headers=auth_headers, params={"limit": 3})
+
+    response = await client.get(url, headers=auth_headers, params={
+        "after": first.headers["X-After-Cursor"],
+        "limit": 2
+    })
+
+    assert [msg["content"] for msg in response.json()] == ["Message 3", "Message 4"]
+
+
+async def test_sessions_are_paged_newest_first(client, auth_headers, db, user):
+    # Two sessions share a start time, so only the id separates them
+    starts = [T0, T0 + timedelta(minutes=1), T0 + timedelta(minutes=1), T0 + timedelta(minutes=2)]
+    await db.execute(insert(AISession), [
+        {"user_id": user.id, "title": f"Session {i}", "ai_model": "gemini-pro", "is_active": True, "started_at": start}
+        for i, start in enumerate(starts)
+    ])
+    await db.commit()
+
+    first = await client.get("/api/ai/sessions", headers=auth_headers, params={"limit": 2})
+    older = await client.get("/api/ai/sessions", headers=auth_headers, params={
+        "before": first.headers["X-Before-Cursor"],
+        "limit": 2
+    })
+    newer = await client.get("/api/ai/sessions", headers=auth_headers, params={
+        "after": older.headers["X-After-Cursor"],
+        "limit": 2
+    })
+
+    assert [s["title"] for s in first.json()] == ["Session 3", "Session 2"]
+    assert [s["title"] for s in older.json()] == ["Session 1", "Session 0"]
+    assert [s["title"] for s in newer.json()] == ["Session 3", "Session 2"]
+
+
+async def test_invalid_cursor_is_a_400(client, auth_headers, chat_session):
+    response = await client.get(
+        f"/api/ai/sessions/{chat_session.id}/messages",
+        headers=auth_headers,
+        params={"before": "garbage"}
+    )
+
+    assert response.status_code == 400
@@ -0,0 +1,121 @@
+"""
+Pluggable providers and the deterministic fake provider
+"""
+import pytest
+
+from app.core.config import settings
+from app.services.ai_service import AIModel, AIRouter
+from app.services.fake_provider import FakeProvider, FakeProviderError
+from app.services.provider_registry import CompletionProvider, ProviderRegistry, load_provider_plugin
+
+MESSAGES = [{"role": "user", "content": "What is a cache?"}]
+
+
+class EchoProvider(CompletionProvider):
+    name = "openai"
+
+    async def complete(self, messages, model, temperature, max_tokens):
+        content = messages[-1]["content"]
+        return {
+            "content": content,
+            "model": model.value,
+            "provider": self.name,
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+        }
+
+    async def stream(self, messages, model, temperature, max_tokens):
+        result = await self.complete(messages, model, temperature, max_tokens)
+        yield {"type": "delta", "content": result["content"]}
+        yield {"type": "done", **result}
+
+
+def echo_provider():
+    return EchoProvider()
+
+
+def unnamed_provider():
+    provider = EchoProvider()
+    provider.name = ""
+    return provider
+
+
+def unknown_provider():
+    provider = EchoProvider()
+    provider.name = "mistral"
+    return provider
+
+
+async def test_fake_replies_are_deterministic():
+    first = FakeProvider("openai", seed=1, latency_median_ms=1, latency_sigma=0, completion_tokens=12)
+    second = FakeProvider("openai", seed=1, latency_median_ms=1, latency_sigma=0, completion_tokens=12)
+
+    reply = await first.complete(MESSAGES, AIModel.GPT_35_TURBO, 0.7, None)
+
+    assert reply == await second.complete(MESSAGES, AIModel.GPT_35_TURBO, 0.7, None)
+    assert len(reply["content"].split()) == 12
+    assert reply["model"] == "gpt-3.5-turbo"
+    assert reply["usage"]["total_tokens"] == reply["usage"]["prompt_tokens"] + reply["usage"]["completion_tokens"]
+    other = await first.complete([{"role": "user", "content": "Something else"}], AIModel.GPT_35_TURBO, 0.7, None)
+    assert other["content"] != reply["content"]
+
+
+async def test_fake_stream_matches_completion():
+    provider = FakeProvider("google", latency_median_ms=1, latency_sigma=0, completion_tokens=20, stream_chunk_tokens=8)
+
+    events = [event async for event in provider.stream(MESSAGES, AIModel.GEMINI_PRO, 0.7, None)]
+    completion = await provider.complete(MESSAGES, AIModel.GEMINI_PRO, 0.7, None)
+
+    assert [event["type"] for event in events] == ["delta", "delta", "delta", "done"]
+    assert "".join(event["content"] for event in events[:-1]) == completion["content"]
+    assert events[-1]["usage"] == completion["usage"]
+
+
+async def test_fake_errors_are_injected_and_counted():
+    provider = FakeProvider("anthropic", latency_median_ms=1, latency_sigma=0, error_rate=1.0)
+
+    with pytest.raises(FakeProviderError):
+        await provider.complete(MESSAGES, AIModel.CLAUDE_3_HAIKU, 0.7, None)
+
+    assert provider.stats() == {"calls": 1, "injected_errors": 1}
+
+
+def test_registering_a_name_again_replaces_the_provider():
+    registry = ProviderRegistry()
+    registry.register("openai", FakeProvider("openai"))
+    registry.register("openai", EchoProvider())
+
+    assert registry.names() == ["openai"]
+    assert registry.describe() == {"openai": {"implementation": "EchoProvider", "configured": True}}
+
+
+def test_providers_must_implement_complete_and_stream():
+    class CompleteOnly(CompletionProvider):
+        async def complete(self, messages, model, temperature, max_tokens):
+            return {}
+
+    with pytest.raises(TypeError):
+        CompletionProvider()
+    with pytest.raises(TypeError):
+        CompleteOnly()
+
+
+def test_plugins_must_return_a_known_provider():
+    known = ["openai", "anthropic", "google"]
+    assert isinstance(load_provider_plugin("tests.test_provider_registry:echo_provider", known), EchoProvider)
+
+    with pytest.raises(ValueError):
+        load_provider_plugin("tests.test_provider_registry", known)
+    with pytest.raises(TypeError):
+        load_provider_plugin("tests.test_provider_registry:unnamed_provider", known)
+    with pytest.raises(ValueError, match="mistral"):
+        load_provider_plugin("tests.test_provider_registry:unknown_provider", known)
+
+
+async def test_plugins_replace_built_in_providers(monkeypatch):
+    monkeypatch.setattr(settings, "AI_PROVIDER_PLUGINS", ["tests.test_provider_registry:echo_provider"])
+    router = AIRouter()
+
+    result = await router.generate_completion(MESSAGES, model=AIModel.GPT_35_TURBO, use_cache=False)
+
+    assert result["content"] == "What is a cache?"
+    assert router.get_provider_health()["openai"]["backend"]["implementation"] == "EchoProvider"
@@ -0,0 +1,54 @@
+"""
+Indexes behind the hot chat queries (benchmarks/explain_plans.py)
+"""
+import argparse
+import importlib.util
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.models import AISession, Message
+
+BENCHMARKS = Path(__file__).parent.parent / "benchmarks"
+
+
+@pytest.fixture(scope="module")
+def explain_plans():
+    spec = importlib.util.spec_from_file_location("explain_plans", BENCHMARKS / "explain_plans.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def index_columns(table):
+    return {index.name: [column.name for column in index.columns] for index in table.indexes}
+
+
+def test_composite_indexes_are_declared():
+    assert index_columns(Message.__table__)["ix_messages_session_id_created_at"] == ["session_id", "created_at", "id"]
+    assert index_columns(AISession.__table__)["ix_ai_sessions_user_id_is_active_started_at"] == [
+        "user_id", "is_active", "started_at"
+    ]
+
+
+async def test_hot_queries_use_indexes(database, explain_plans):
+    args = argparse.Namespace(users=20, sessions_per_user=5, messages_per_session=10)
+    async with engine.begin() as conn:
+        await explain_plans.seed(conn, args)
+        await conn.execute(text("ANALYZE"))
+
+    user_id = args.users // 2 + 1
+    session_id = (user_id - 1) * args.sessions_per_user + 1
+    queries = explain_plans.hot_queries(
+        user_id,
+        session_id,
+        newest_session_id=user_id * args.sessions_per_user,
+        newest_message_id=session_id * args.messages_per_session
+    )
+
+    async with engine.connect() as conn:
+        for name, statement in queries.items():
+            lines, full_scans = await explain_plans.explain(conn, statement)
+            assert full_scans == [], f"{name}: {lines}"
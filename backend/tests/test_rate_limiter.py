@@ -0,0 +1,143 @@
+"""
+Per-model RPM/TPM admission scheduling
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import Message, MessageRole
+from app.services.ai_service import ai_router
+from app.services.rate_limiter import (
+    AdmissionTimeoutError,
+    Priority,
+    RateLimitScheduler,
+    TokenBucket,
+    priority_for_task
+)
+
+
+def exhaust(scheduler, key):
+    requests, tokens = scheduler._get_buckets(key)
+    requests.consume(requests.capacity)
+    tokens.consume(tokens.capacity)
+
+
+def test_token_bucket_refills_and_caps_refunds():
+    bucket = TokenBucket(capacity=100, refill_per_second=1000)
+
+    bucket.consume(100)
+    assert 0 < bucket.time_until(50) <= 0.05
+
+    bucket.refund(500)
+    assert bucket.tokens == 100
+    # Oversized requests wait for a full bucket instead of forever
+    assert bucket.time_until(1000) == 0
+
+
+def test_priority_for_task(monkeypatch):
+    monkeypatch.setattr(settings, "AI_TASK_PRIORITIES", {"quick_response": "high", "summarization": "low"})
+
+    assert priority_for_task("quick_response") == Priority.HIGH
+    assert priority_for_task("summarization") == Priority.LOW
+    assert priority_for_task("coding") == Priority.NORMAL
+    assert priority_for_task(None) == Priority.NORMAL
+
+
+async def test_unlimited_models_are_admitted_immediately():
+    scheduler = RateLimitScheduler({})
+
+    await scheduler.acquire("unknown-model", 10_000)
+
+    assert scheduler.time_until_capacity("unknown-model", 10_000) == 0
+    assert scheduler.stats()["models"] == {}
+
+
+async def test_admission_reserves_requests_and_tokens():
+    scheduler = RateLimitScheduler({"model": {"rpm": 10, "tpm": 1000}})
+
+    await scheduler.acquire("model", 300)
+    scheduler.settle("model", reserved_tokens=300, used_tokens=100)
+
+    stats = scheduler.stats()
+    assert stats["admitted"] == 1
+    assert stats["models"]["model"]["requests_available"] == pytest.approx(9, abs=0.1)
+    assert stats["models"]["model"]["tokens_available"] == 900
+
+
+async def test_waits_longer_than_allowed_time_out():
+    scheduler = RateLimitScheduler({"model": {"rpm": 60, "tpm": 1000}})
+    exhaust(scheduler, "model")
+
+    with pytest.raises(AdmissionTimeoutError) as info:
+        await scheduler.acquire("model", 10, max_wait=0.1)
+
+    assert info.value.key == "model"
+    assert info.value.retry_after > 0.1
+    assert scheduler.stats()["timed_out"] == 1
+    assert scheduler.stats()["models"]["model"]["waiting"] == 0
+
+
+async def test_waiters_are_served_by_priority_then_fifo():
+    # Refills one request every 50ms
+    scheduler = RateLimitScheduler({"model": {"rpm": 1200, "tpm": 1_000_000}})
+    exhaust(scheduler, "model")
+    admitted = []
+
+    async def call(name, priority):
+        await scheduler.acquire("model", 1, priority, max_wait=5)
+        admitted.append(name)
+
+    tasks = [asyncio.create_task(call("low", Priority.LOW))]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(call("normal-1", Priority.NORMAL)))
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(call("normal-2", Priority.NORMAL)))
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(call("high", Priority.HIGH)))
+    await asyncio.gather(*tasks)
+
+    assert admitted == ["high", "normal-1", "normal-2", "low"]
+
+
+@pytest.fixture
+def no_capacity(monkeypatch):
+    scheduler = RateLimitScheduler(ai_router.rate_limiter.limits)
+    for key in scheduler.limits:
+        exhaust(scheduler, key)
+    monkeypatch.setattr(ai_router, "rate_limiter", scheduler)
+    monkeypatch.setattr(settings, "AI_ADMISSION_MAX_WAIT_SECONDS", 0.1)
+
+
+async def error_messages(session_id):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Message).where(Message.session_id == session_id, Message.role == MessageRole.ERROR)
+        )
+        return result.scalars().all()
+
+
+async def test_exhausted_capacity_is_a_429(client, auth_headers, chat_session, no_capacity):
+    response = await client.post(
+        "/api/ai/process",
+        headers=auth_headers,
+        json={"message": "Hello", "session_id": chat_session.id}
+    )
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert len(await error_messages(chat_session.id)) == 1
+
+
+async def test_exhausted_capacity_ends_a_stream_with_an_error(client, auth_headers, chat_session, no_capacity):
+    response = await client.post(
+        "/api/ai/process/stream",
+        headers=auth_headers,
+        json={"message": "Hello", "session_id": chat_session.id}
+    )
+
+    assert response.status_code == 200
+    assert response.text.startswith("event: error")
+    assert len(await error_messages(chat_session.id)) == 1
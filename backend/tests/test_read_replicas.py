@@ -0,0 +1,82 @@
+"""
+Read-replica routing with a read-your-writes window
+"""
+import itertools
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.core import database
+from app.core.database import AsyncSessionLocal, Base, record_write, route_reads_for_user
+from app.models import AISession, User
+
+
+@pytest.fixture
+async def replica(tmp_path, user, monkeypatch):
+    """A second database standing in for a replica that has the user but none of their sessions yet"""
+    engine = database.create_engine_for(f"sqlite+aiosqlite:///{tmp_path}/replica.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User).values(
+            id=user.id, email=user.email, username=user.username,
+            hashed_password=user.hashed_password, is_active=True
+        ))
+    monkeypatch.setattr(database, "_replica_cycle", itertools.cycle([engine]))
+    monkeypatch.setattr(database, "_recent_writes", {})
+    yield engine
+    await engine.dispose()
+
+
+async def count_sessions(db):
+    return (await db.execute(select(func.count()).select_from(AISession))).scalar()
+
+
+async def test_read_only_sessions_read_from_the_replica(replica, chat_session):
+    async with AsyncSessionLocal(info={"replica": replica}) as db:
+        assert await count_sessions(db) == 0
+
+    async with AsyncSessionLocal() as db:
+        assert await count_sessions(db) == 1
+
+
+async def test_writes_always_go_to_the_primary(replica, user):
+    async with AsyncSessionLocal(info={"replica": replica}) as db:
+        db.add(AISession(user_id=user.id, title="Written", ai_model="gemini-pro"))
+        await db.commit()
+
+    async with AsyncSessionLocal() as db:
+        assert await count_sessions(db) == 1
+
+
+async def test_recent_writers_read_from_the_primary(replica, chat_session, user):
+    record_write(user.id)
+
+    async with AsyncSessionLocal(info={"replica": replica}) as db:
+        route_reads_for_user(db, user.id)
+        assert await count_sessions(db) == 1
+
+
+async def test_only_committed_writes_start_the_window(replica, user):
+    async with AsyncSessionLocal(info={"user_id": user.id}) as db:
+        db.add(AISession(user_id=user.id, title="Rolled back", ai_model="gemini-pro"))
+        await db.flush()
+        await db.rollback()
+    assert user.id not in database._recent_writes
+
+    async with AsyncSessionLocal(info={"user_id": user.id}) as db:
+        db.add(AISession(user_id=user.id, title="Kept", ai_model="gemini-pro"))
+        await db.commit()
+    assert user.id in database._recent_writes
+
+
+async def test_new_sessions_are_listed_right_after_creating_them(client, auth_headers, replica):
+    response = await client.post("/api/ai/process", headers=auth_headers, json={"message": "Hello"})
+    assert response.status_code == 200
+
+    listed = await client.get("/api/ai/sessions", headers=auth_headers)
+    assert [session["id"] for session in listed.json()] == [response.json()["session_id"]]
+
+    # Once the window has passed, reads go back to the (lagging) replica
+    database._recent_writes.clear()
+    listed = await client.get("/api/ai/sessions", headers=auth_headers)
+    assert listed.json() == []
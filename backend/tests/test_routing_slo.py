@@ -0,0 +1,121 @@
+"""
+SLO-driven model selection from live model statistics
+"""
+import pytest
+
+from app.core.config import settings
+from app.services.ai_service import AIModel
+from app.services.latency import ModelStats
+from app.services.routing_slo import RoutingSLO
+
+
+@pytest.fixture
+def measured(router, monkeypatch):
+    """Gemini answers in 3s and GPT-3.5 in 200ms, both with enough samples to count"""
+    monkeypatch.setattr(settings, "AI_ROUTING_MIN_SAMPLES", 5)
+    for _ in range(5):
+        router.model_stats[AIModel.GEMINI_PRO].record_success(3.0, output_tokens=100)
+        router.model_stats[AIModel.GPT_35_TURBO].record_success(0.2, output_tokens=100)
+    return router
+
+
+def test_parse_latency_error_rate_and_objective():
+    slo = RoutingSLO.parse("p95 < 3s, error_rate < 5% and fastest")
+
+    assert slo.latency_bounds == {"p95": 3.0}
+    assert slo.max_error_rate == 0.05
+    assert slo.objective == "fastest"
+    assert slo.max_cost is None
+
+
+def test_parse_units_and_aliases():
+    slo = RoutingSLO.parse("latency <= 800ms; p99.9 < 2")
+
+    assert slo.latency_bounds == {"ewma": 0.8, "p99.9": 2.0}
+
+
+def test_parse_costs_keep_the_tightest_limit():
+    assert RoutingSLO.parse("cheapest under budget", budget=0.02).max_cost == 2.0
+    assert RoutingSLO.parse("cost < $0.05, cheapest under 0.01").max_cost == 1.0
+
+
+@pytest.mark.parametrize("text, budget", [
+    ("p95 fast please", None),
+    ("cheapest under budget", None),
+    ("error_rate > 5%", None)
+])
+def test_parse_rejects_unknown_clauses(text, budget):
+    with pytest.raises(ValueError):
+        RoutingSLO.parse(text, budget)
+
+
+def test_describe_round_trips():
+    text = RoutingSLO.parse("p95 < 2s, error_rate < 5%, cost < $0.01, cheapest").describe()
+
+    assert text == "p95 < 2s, error_rate < 5.0%, cost < $0.01, cheapest"
+    assert RoutingSLO.parse(text).describe() == text
+
+
+def test_model_stats_percentiles_and_error_rate():
+    stats = ModelStats(alpha=0.5)
+    for latency in (1.0, 2.0, 3.0, 4.0):
+        stats.record_success(latency)
+    stats.record_failure()
+    stats.record_timeout()
+
+    assert stats.percentile(50) == 2.0
+    assert stats.percentile(95) == 4.0
+    assert stats.ewma == pytest.approx(3.125)
+    assert stats.error_rate() == pytest.approx(2 / 6)
+    assert stats.timeout_rate() == pytest.approx(1 / 6)
+
+
+def test_latency_bound_skips_slow_models(measured):
+    assert measured.select_model_for_slo(RoutingSLO.parse("p95 < 1s"), "general") == AIModel.GPT_35_TURBO
+
+
+def test_models_without_enough_samples_are_not_ruled_out(router, monkeypatch):
+    monkeypatch.setattr(settings, "AI_ROUTING_MIN_SAMPLES", 5)
+    router.model_stats[AIModel.GEMINI_PRO].record_success(3.0)
+
+    assert router.select_model_for_slo(RoutingSLO.parse("p95 < 1s"), "general") == AIModel.GEMINI_PRO
+
+
+def test_error_rate_bound_skips_failing_models(measured):
+    for _ in range(5):
+        measured.model_stats[AIModel.GEMINI_PRO].record_failure()
+
+    slo = RoutingSLO.parse("error_rate < 10%")
+
+    assert measured.select_model_for_slo(slo, "general") == AIModel.GPT_35_TURBO
+
+
+def test_objectives(measured):
+    assert measured.select_model_for_slo(RoutingSLO.parse("cheapest"), "general") == AIModel.CLAUDE_3_HAIKU
+    assert measured.select_model_for_slo(RoutingSLO.parse("fastest"), "general") == AIModel.GPT_35_TURBO
+
+
+def test_unmeetable_slo_falls_back_to_the_fastest_model(measured):
+    for model in AIModel:
+        if model in measured.model_stats and model not in (AIModel.GEMINI_PRO, AIModel.GPT_35_TURBO):
+            for _ in range(5):
+                measured.model_stats[model].record_success(5.0)
+
+    assert measured.select_model_for_slo(RoutingSLO.parse("p95 < 100ms"), "general") == AIModel.GPT_35_TURBO
+
+
+async def test_invalid_slos_are_rejected_by_the_api(client, auth_headers):
+    for body in ({"message": "Hi", "slo": "as fast as possible"}, {"message": "Hi", "slo": "cheapest under budget"}):
+        response = await client.post("/api/ai/process", headers=auth_headers, json=body)
+        assert response.status_code == 422
+
+
+async def test_slo_requests_are_served(client, auth_headers):
+    response = await client.post(
+        "/api/ai/process",
+        headers=auth_headers,
+        json={"message": "Hi", "slo": "cheapest under budget", "max_cost": 0.05}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["model"] == AIModel.CLAUDE_3_HAIKU.value
@@ -0,0 +1,120 @@
+"""
+Single-flight coalescing of identical in-flight calls
+"""
+import asyncio
+
+import pytest
+
+from app.services.deadline import Deadline, DeadlineExceeded
+from app.services.singleflight import SingleFlight
+
+
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    assert calls == 1
+    assert results.count(("result", False)) == 1
+    assert results.count(("result", True)) == 4
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "followers": 4, "handoffs": 0}
+
+
+async def test_errors_are_shared():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(*(flight.do("key", work) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+async def test_cancelled_waiter_does_not_cancel_the_others():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "result"
+
+    leader = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await follower == ("result", True)
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+async def test_last_waiter_leaving_cancels_the_call():
+    flight = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def work():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiter = asyncio.create_task(flight.do("key", work))
+    await started.wait()
+    waiter.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+
+    assert flight.stats()["in_flight"] == 0
+
+
+async def test_follower_takes_over_when_the_leaders_deadline_ends_the_call():
+    flight = SingleFlight()
+    budgets = []
+
+    def work(budget):
+        async def run():
+            budgets.append(budget)
+            return await Deadline(budget).run(asyncio.sleep(0.05, result=budget), "work")
+        return run
+
+    leader = asyncio.create_task(flight.do("key", work(0.01), handoff=(DeadlineExceeded,)))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", work(1.0), handoff=(DeadlineExceeded,)))
+
+    with pytest.raises(DeadlineExceeded):
+        await leader
+    # The follower restarted the call under its own, longer budget
+    assert await follower == (1.0, False)
+    assert budgets == [0.01, 1.0]
+    assert flight.handoffs == 1
+
+
+async def test_handoff_exceptions_reach_the_leader_itself():
+    flight = SingleFlight()
+
+    async def work():
+        raise DeadlineExceeded("work", 0.01)
+
+    with pytest.raises(DeadlineExceeded):
+        await flight.do("key", work, handoff=(DeadlineExceeded,))
+
+
+async def test_identical_completions_share_one_provider_call(router):
+    messages = [{"role": "user", "content": "Explain coalescing"}]
+
+    results = await asyncio.gather(*(router.generate_completion(messages) for _ in range(3)))
+
+    assert len({result["content"] for result in results}) == 1
+    assert sorted(result["cached"] for result in results) == [False, True, True]
+    assert router.providers.get(results[0]["provider"]).calls == 1
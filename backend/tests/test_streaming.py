@@ -0,0 +1,67 @@
+"""
+Streaming completions over server-sent events (POST /api/ai/process/stream)
+"""
+import json
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import select
+
+from app.models import AISession, Message, MessageRole
+
+
+def parse_events(body: str) -> List[Tuple[str, Dict[str, Any]]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+async def test_stream_emits_deltas_then_done(client, auth_headers, db):
+    response = await client.post(
+        "/api/ai/process/stream",
+        headers=auth_headers,
+        json={"message": "Tell me about caching"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    kinds = [kind for kind, _ in events]
+    assert kinds[-1] == "done"
+    assert kinds[:-1] and set(kinds[:-1]) == {"delta"}
+
+    done = events[-1][1]
+    assert done["usage"]["completion_tokens"] > 0
+    assert done["cost"] > 0
+
+    # The streamed reply is persisted after the user turn
+    messages = (await db.execute(
+        select(Message).where(Message.session_id == done["session_id"]).order_by(Message.id)
+    )).scalars().all()
+    assert [msg.role for msg in messages] == [MessageRole.USER, MessageRole.ASSISTANT]
+    assert messages[1].content == "".join(data["content"] for kind, data in events if kind == "delta")
+
+    session = await db.get(AISession, done["session_id"])
+    assert session.total_messages == 2
+    assert session.total_tokens_used == done["usage"]["total_tokens"]
+
+
+async def test_stream_shares_the_process_rate_limit(client, auth_headers):
+    for i in range(10):
+        response = await client.post("/api/ai/process", headers=auth_headers, json={"message": f"Question {i}"})
+        assert response.status_code == 200
+
+    response = await client.post("/api/ai/process/stream", headers=auth_headers, json={"message": "One more"})
+
+    assert response.status_code == 429
+
+
+async def test_stream_rejects_unknown_session(client, auth_headers):
+    response = await client.post(
+        "/api/ai/process/stream",
+        headers=auth_headers,
+        json={"message": "Hello", "session_id": 12345}
+    )
+
+    assert response.status_code == 404
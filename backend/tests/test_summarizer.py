@@ -0,0 +1,105 @@
+"""
+Background compaction of long conversations into a rolling summary
+"""
+import pytest
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models import AISession, Message, MessageRole
+from app.services import summarizer as summarizer_module
+from app.services.session_stats import add_session_usage
+from app.services.summarizer import ConversationSummarizer, summary_message
+
+
+@pytest.fixture
+async def long_session(db, chat_session, monkeypatch):
+    """A session with six alternating turns, of which the last two are kept verbatim"""
+    monkeypatch.setattr(settings, "AI_SUMMARY_ENABLED", True)
+    monkeypatch.setattr(settings, "AI_SUMMARY_TRIGGER_MESSAGES", 4)
+    monkeypatch.setattr(settings, "AI_SUMMARY_KEEP_RECENT", 2)
+
+    for i in range(6):
+        db.add(Message(
+            session_id=chat_session.id,
+            user_id=chat_session.user_id,
+            content=f"Turn {i}",
+            role=MessageRole.USER if i % 2 == 0 else MessageRole.ASSISTANT
+        ))
+    await add_session_usage(db, chat_session, messages=6, tokens=100)
+    await db.commit()
+    return chat_session
+
+
+async def load_session(session_id):
+    async with AsyncSessionLocal() as db:
+        return await db.get(AISession, session_id)
+
+
+async def load_messages(session_id):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Message).where(Message.session_id == session_id).order_by(Message.id))
+        return result.scalars().all()
+
+
+async def test_compaction_summarizes_all_but_recent_turns(long_session):
+    await ConversationSummarizer()._compact(long_session.id)
+
+    session = await load_session(long_session.id)
+    ids = [msg.id for msg in await load_messages(long_session.id)]
+    assert session.context["summary"]
+    assert session.context["summary_until_message_id"] == ids[3]
+    assert session.context["summarized_messages"] == 4
+    assert session.total_messages == 6
+    assert session.total_tokens_used > 100
+
+
+async def test_compaction_keeps_concurrent_usage_updates(long_session, monkeypatch):
+    generate = summarizer_module.ai_router.generate_completion
+
+    async def generate_while_chatting(*args, **kwargs):
+        # A chat request on the same session commits while the summary is generated
+        async with AsyncSessionLocal() as other:
+            session = await other.get(AISession, long_session.id)
+            await add_session_usage(other, session, messages=2, tokens=50)
+            await other.commit()
+        return await generate(*args, **kwargs)
+
+    monkeypatch.setattr(summarizer_module.ai_router, "generate_completion", generate_while_chatting)
+
+    await ConversationSummarizer()._compact(long_session.id)
+
+    session = await load_session(long_session.id)
+    assert session.context["summary"]
+    assert session.total_messages == 8
+    assert session.total_tokens_used > 150
+
+
+async def test_short_sessions_are_not_compacted(chat_session, monkeypatch):
+    monkeypatch.setattr(settings, "AI_SUMMARY_ENABLED", True)
+    summarizer = ConversationSummarizer()
+
+    summarizer.maybe_schedule(chat_session)
+
+    assert summarizer._running == {}
+
+
+async def test_compaction_runs_once_per_session(long_session):
+    summarizer = ConversationSummarizer()
+
+    summarizer.maybe_schedule(long_session)
+    task = summarizer._running[long_session.id]
+    summarizer.maybe_schedule(long_session)
+
+    assert summarizer._running[long_session.id] is task
+    await task
+    assert summarizer._running == {}
+
+
+def test_summary_message():
+    assert summary_message(None) is None
+    assert summary_message({"summary": ""}) is None
+    assert summary_message({"summary": "They like tea"}) == {
+        "role": "system",
+        "content": "Summary of the earlier conversation:\nThey like tea"
+    }
@@ -0,0 +1,95 @@
+"""
+Token counting and context-window aware model selection
+"""
+import hashlib
+import os
+
+import tiktoken
+
+from app.services.ai_service import AIModel
+from app.services.token_counter import CL100K_BASE_URL, TOKENS_PER_MESSAGE, TOKENS_PER_REPLY, TokenCounter
+
+
+def offline_counter() -> TokenCounter:
+    counter = TokenCounter()
+    counter._encoding_loaded = True  # Approximation only
+    return counter
+
+
+def test_ascii_text_uses_the_family_ratio():
+    counter = offline_counter()
+
+    assert counter.count("a" * 40, "openai") == 10
+    assert counter.count("a" * 35, "anthropic") == 10
+    assert counter.count("", "openai") == 0
+
+
+def test_non_ascii_text_costs_more_tokens():
+    counter = offline_counter()
+
+    assert counter.count("é" * 12, "google") > counter.count("e" * 12, "google")
+
+
+def test_counts_are_memoized():
+    counter = offline_counter()
+    counter.count("hello world")
+    counter.count("hello world")
+
+    assert counter.stats()["hits"] == 1
+    assert counter.stats()["misses"] == 1
+
+
+def test_memo_is_bounded():
+    counter = TokenCounter(max_entries=2)
+    counter._encoding_loaded = True
+    for text in ("one", "two", "three"):
+        counter.count(text)
+
+    assert counter.stats()["memo_entries"] == 2
+
+
+class WordEncoding:
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+
+def test_encoding_is_never_downloaded(tmp_path, monkeypatch):
+    def fetch(name):
+        raise AssertionError("encoding fetched")
+
+    monkeypatch.setattr(tiktoken, "get_encoding", fetch)
+    monkeypatch.delenv("TIKTOKEN_CACHE_DIR", raising=False)
+
+    for counter in (TokenCounter(), TokenCounter(cache_dir=str(tmp_path))):
+        assert counter.count("a" * 40) == 10
+        assert counter.stats()["backend"] == "approximation"
+
+
+def test_cached_encoding_file_is_used(tmp_path, monkeypatch):
+    (tmp_path / hashlib.sha1(CL100K_BASE_URL.encode()).hexdigest()).write_bytes(b"")
+    monkeypatch.setattr(tiktoken, "get_encoding", lambda name: WordEncoding())
+    monkeypatch.delenv("TIKTOKEN_CACHE_DIR", raising=False)
+    counter = TokenCounter(cache_dir=str(tmp_path))
+
+    assert counter.count("three short words") == 3
+    assert counter.stats()["backend"] == "tiktoken"
+    assert os.environ["TIKTOKEN_CACHE_DIR"] == str(tmp_path)
+
+
+def test_message_lists_include_formatting_overhead():
+    counter = offline_counter()
+    messages = [{"role": "user", "content": "a" * 40}, {"role": "assistant", "content": "b" * 40}]
+
+    assert counter.count_messages(messages) == 20 + 2 * TOKENS_PER_MESSAGE + TOKENS_PER_REPLY
+
+
+def test_context_tokens_reserve_the_reply_budget(router):
+    messages = [{"role": "user", "content": "a" * 40}]
+
+    assert router.count_context_tokens(messages, 500) == router.count_message_tokens(messages[0]) + TOKENS_PER_REPLY + 500
+
+
+def test_models_whose_window_is_too_small_are_skipped(router):
+    # gemini-pro (32k) is preferred for general tasks, but cannot fit 100k tokens
+    assert router.select_best_model("general", context_length=1000) == AIModel.GEMINI_PRO
+    assert router.select_best_model("general", context_length=100_000) != AIModel.GEMINI_PRO